@@ -0,0 +1,49 @@
+"""
+Compare the integration time of a mine built with and without a build profile.
+
+Runs two complete builds with `builder_job`, the first without a profile and
+the second with it, then compares the integrate steps of their build reports.
+Expects the same environment as `builder_job`, e.g. the services of the
+Compose file with the biotestmine from the README:
+
+    python example/bench_profile.py --mine-path data/mine/biotestmine
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import click
+
+from intermine_builder.properties import PROFILES
+from intermine_builder.report import compare_reports, format_comparison, latest_reports, load_report
+
+
+def _integrate_time(report):
+    return sum(step["wall_time"] for step in report["steps"] if step["task"].startswith("integrate "))
+
+
+@click.command()
+@click.option("--mine-path", type=click.Path(exists=True, file_okay=False), required=True, help="Path to mine directory to be built.")
+@click.option("--profile", type=click.Choice(list(PROFILES)), default="build-performance", show_default=True, help="Profile to compare against no profile.")
+@click.option("--jobs", type=int, default=1, show_default=True, help="Max sources integrated at once. One keeps the timings of the sources apart.")
+def main(**options):
+    mine_path = Path(options["mine_path"])
+    job = ["builder_job", "--mine-path", str(mine_path), "--no-checkpoints", "--jobs", str(options["jobs"])]
+
+    subprocess.run(job, check=True)
+    subprocess.run(job + ["--profile", options["profile"]], check=True)
+
+    baseline, current = (load_report(path) for path in latest_reports(mine_path))
+    rows = [row for row in compare_reports(baseline, current) if row["task"].startswith("integrate ")]
+    click.echo(format_comparison(rows))
+
+    before, after = _integrate_time(baseline), _integrate_time(current)
+    if not before:
+        sys.exit("No integrate steps in the baseline build")
+    click.echo(f"\nintegrate: {before:.1f}s without a profile, {after:.1f}s with "
+               f"{options['profile']} ({(after - before) / before:+.0%})")
+
+
+if __name__ == "__main__":
+    main()
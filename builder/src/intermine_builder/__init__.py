@@ -1,23 +1,40 @@
 import os
 from pathlib import Path
-from typing import Any, ByteString, Dict, List, Optional, TypedDict
+from typing import Any, ByteString, Callable, Dict, List, Optional, TypedDict
 import subprocess
+import time
 
 import docker
 
-from intermine_builder.properties import create_properties, write_properties
+from intermine_builder.minecompose import MineCompose
+from intermine_builder.properties import apply_property_overrides, create_properties, write_properties
 from intermine_builder import project_xml
+from intermine_builder.pool import ContainerPool, unique_name
+from intermine_builder.report import BuildReport, ContainerStats, LogStream, StepReport, run_measured, step_log_path
 from intermine_builder.types import DataSource
 
 DOCKER_NETWORK_NAME = "builder_default"
 
+# Where the gradle build cache is mounted in builder containers
+GRADLE_BUILD_CACHE_BIND = "/home/intermine/.gradle-build-cache"
+GRADLE_INIT_SCRIPT = Path(".builder") / "build-cache.init.gradle"
+
 
 class MineBuilder:
     """A mine to run build commands on.
 
     Constructor takes a config to initialise and verify environment. Each
     method starts a docker container in which a command is run, then exits with
-    only changes to volumes persisting.
+    only changes to volumes persisting. In warm mode, up to `pool_size`
+    containers are kept running and commands are exec'd into an idle one; call
+    `close` when done.
+
+    Output of containers is streamed to gzipped logs, see `LogStream`, and
+    tasks return its last lines. Pass `on_output` to follow it line by line.
+
+    Container names are unique, so several mines can be built on one host.
+    Give each its own `data_path`, and its own postgres and solr containers,
+    named with `services_prefix`, on its own `network`.
     """
 
     def __init__(self, mine: str,
@@ -25,16 +42,40 @@ class MineBuilder:
             data_path: Optional[os.PathLike] = None,
             mine_path: Optional[os.PathLike] = None,
             volumes: Optional[Dict] = None,
-            containerless: bool = False):
+            containerless: bool = False,
+            warm: bool = False,
+            build_cache_dir: Optional[os.PathLike] = None,
+            pool_size: int = 1,
+            network: str = DOCKER_NETWORK_NAME,
+            services_prefix: str = "intermine",
+            on_output: Optional[Callable[[bytes], None]] = None):
 
         self.mine = mine
+        self.on_output = on_output
+        self.report = BuildReport(mine)
+        self.containerless = containerless
 
         self.data_path = Path(data_path) if data_path else (Path.cwd() / "data")
         self.mine_path = Path(mine_path) if mine_path else (self.data_path / "mine")
 
+        # Warm mode keeps a gradle daemon, and a container to exec into,
+        # alive across tasks instead of paying JVM startup for each of them
+        self.warm = warm
+        self.pool = None
+
+        self.network = network
+        self.postgres_container = services_prefix + "-postgres"
+        self.solr_container = services_prefix + "-solr"
+
+        self.build_cache_dir = Path(build_cache_dir).resolve() if build_cache_dir else None
+        if self.build_cache_dir:
+            self.build_cache_dir.mkdir(parents=True, exist_ok=True)
+            self.__write_build_cache_init(
+                self.build_cache_dir if containerless else GRADLE_BUILD_CACHE_BIND
+            )
+
         # Remaining setup only makes sense when using a container.
         if containerless:
-            self.containerless = True
             return
 
         self.user = str(os.getuid()) + ":" + str(os.getgid())
@@ -52,9 +93,12 @@ class MineBuilder:
         }
         if volumes:
             self.volumes.update(volumes)
+        if self.build_cache_dir:
+            self.volumes[self.build_cache_dir] = {"bind": GRADLE_BUILD_CACHE_BIND, "mode": "rw"}
 
 
         self.client = docker.from_env()
+        self.name = "intermine-builder-" + mine
 
         if build_image:
             self.image = self.client.images.build(path=".")[0]
@@ -66,8 +110,8 @@ class MineBuilder:
 
         try:
             if (
-                self.client.containers.get("intermine-postgres").status != "running"
-                or self.client.containers.get("intermine-solr").status != "running"
+                self.client.containers.get(self.postgres_container).status != "running"
+                or self.client.containers.get(self.solr_container).status != "running"
             ):
                 raise RuntimeError("postgres and solr containers need to be running")
         except docker.errors.NotFound as exc:
@@ -76,41 +120,152 @@ class MineBuilder:
             ) from exc
 
         try:
-            self.client.networks.get(DOCKER_NETWORK_NAME)
+            self.client.networks.get(self.network)
         except docker.errors.NotFound as exc:
             raise RuntimeError(
-                "Missing docker network: " + DOCKER_NETWORK_NAME
+                "Missing docker network: " + self.network
             ) from exc
 
-    def __run(self, command, **kwargs):
+        if warm:
+            self.pool = ContainerPool(self.__start_pooled_container, unique_name(self.name), pool_size)
+
+    def __run(self, command, step: Optional[StepReport] = None, **kwargs):
         cwd = kwargs.get("cwd")
 
         if self.containerless:
-            res = subprocess.run(
-                command,
-                cwd=cwd or (self.mine_path / self.mine),
-                check=True
-            )
+            cwd = cwd or (self.mine_path / self.mine)
+            if step:
+                res = run_measured(command, cwd, step_log_path(self.mine_path / self.mine, step.task), step)
+            else:
+                res = subprocess.run(command, cwd=cwd, check=True)
+        elif self.pool:
+            res = self.__exec_pooled_container(command, step, cwd)
         else:
-            res = self.client.containers.run(
-                image=self.image,
-                name="intermine-builder",
-                user=self.user,
-                volumes=self.volumes,
-                network=DOCKER_NETWORK_NAME,
-                command=command,
-                remove=True,
-                stdout=True,
-                stderr=True,
-                working_dir=cwd or ("/home/intermine/intermine/" + self.mine),
-            )
+            res = self.__run_container(command, step, cwd)
 
         return res
 
+    def __log_stream(self, step: Optional[StepReport]) -> LogStream:
+        path = step_log_path(self.mine_path / self.mine, step.task) if step else None
+        return LogStream(path, on_line=self.on_output)
+
+    @staticmethod
+    def __measure(step: StepReport, start: float, exit_code: int, stats: ContainerStats, log: LogStream):
+        step.wall_time = time.monotonic() - start
+        step.exit_status = exit_code
+        step.cpu_time = stats.cpu_time
+        step.peak_rss = stats.peak_rss
+        step.log_bytes = log.bytes_written
+
+    def __run_container(self, command, step: Optional[StepReport] = None, cwd=None):
+        # Detached, to stream the output and sample docker stats meanwhile
+        container = self.client.containers.run(
+            image=self.image,
+            name=unique_name(self.name),
+            user=self.user,
+            volumes=self.volumes,
+            network=self.network,
+            command=command,
+            detach=True,
+            working_dir=cwd or ("/home/intermine/intermine/" + self.mine),
+        )
+        start = time.monotonic()
+        stats = ContainerStats(container).start() if step else None
+        try:
+            with self.__log_stream(step) as log:
+                log.write_all(container.logs(stdout=True, stderr=True, stream=True, follow=True))
+            exit_code = container.wait()["StatusCode"]
+        finally:
+            container.remove(force=True)
+            if stats:
+                stats.stop()
+        if step:
+            self.__measure(step, start, exit_code, stats, log)
+
+        if exit_code:
+            # Output is not demultiplexed, so stderr is the tail of the whole output
+            raise docker.errors.ContainerError(container, exit_code, command, self.image, log.tail())
+        return log.tail()
+
+    def __start_pooled_container(self, name):
+        return self.client.containers.run(
+            image=self.image,
+            name=name,
+            user=self.user,
+            volumes=self.volumes,
+            network=self.network,
+            command=["sleep", "infinity"],
+            detach=True,
+        )
+
+    def __exec_pooled_container(self, command, step: Optional[StepReport] = None, cwd=None):
+        with self.pool.container() as container:
+            return self.__exec_container(container, command, step, cwd)
+
+    def __exec_container(self, container, command, step: Optional[StepReport] = None, cwd=None):
+        start = time.monotonic()
+        stats = ContainerStats(container, relative=True).start() if step else None
+        # exec_run can't both stream the output and report the exit code
+        exec_id = self.client.api.exec_create(
+            container.id,
+            command,
+            user=self.user,
+            workdir=cwd or ("/home/intermine/intermine/" + self.mine),
+        )["Id"]
+        try:
+            with self.__log_stream(step) as log:
+                log.write_all(self.client.api.exec_start(exec_id, stream=True))
+        finally:
+            if stats:
+                stats.stop()
+        exit_code = self.client.api.exec_inspect(exec_id)["ExitCode"]
+        if step:
+            self.__measure(step, start, exit_code, stats, log)
+
+        if exit_code:
+            # Output is not demultiplexed, so stderr is the tail of the whole output
+            raise docker.errors.ContainerError(container, exit_code, command, self.image, log.tail())
+        return log.tail()
+
+    def __write_build_cache_init(self, cache_dir):
+        init_path = self.mine_path / self.mine / GRADLE_INIT_SCRIPT
+        init_path.parent.mkdir(parents=True, exist_ok=True)
+        init_path.write_text(
+            "gradle.settingsEvaluated { settings ->\n"
+            "    settings.buildCache {\n"
+            "        local {\n"
+            f"            directory = new File('{cache_dir}')\n"
+            "        }\n"
+            "    }\n"
+            "}\n"
+        )
+
+    def close(self):
+        """Stop what warm mode keeps running between tasks.
+
+        Without containers this runs `gradlew --stop`, which stops every
+        daemon of the mine's gradle version on the host, including those of
+        other builds running there.
+        """
+        if not self.warm:
+            return
+        if self.containerless:
+            subprocess.run(["./gradlew", "--stop"], cwd=self.mine_path / self.mine, check=False)
+        elif self.pool is not None:
+            self.pool.close()
+
+    def write_report(self) -> Path:
+        """Write the report of the tasks run so far next to the mine.
+
+        Returns:
+            Path of the written report.
+        """
+        return self.report.write(self.mine_path / self.mine)
+
     # Changes to filesystem
 
     def create_properties_file(self, overrides: Dict[str, str]):
-        properties = create_properties(overrides=overrides)
+        properties = create_properties(PGHOST=self.postgres_container, overrides=overrides)
         write_properties(
             self.mine_path / "intermine" / (self.mine + ".properties"), properties
         )
@@ -118,6 +273,23 @@ class MineBuilder:
     def add_data_source(self, source: DataSource):
         project_xml.append_source(self.mine_path / self.mine / "project.xml", source)
 
+    def add_data_sources(self, sources: List[DataSource]):
+        """Add or replace data sources in project.xml, writing it once."""
+        project_xml.append_sources(self.mine_path / self.mine / "project.xml", sources)
+
+    def apply_property_overrides(self, overrides: Dict[str, str]):
+        """Set properties of the mine properties file, writing it once."""
+        path = self.mine_path / "intermine" / (self.mine + ".properties")
+        if path.exists():
+            apply_property_overrides(path, overrides)
+        else:
+            self.create_properties_file(overrides)
+
+    def apply_minecompose(self, minecompose: MineCompose):
+        """Configure the properties and data sources of a mine in one go."""
+        self.apply_property_overrides(minecompose.properties)
+        self.add_data_sources([source.dict() for source in minecompose.datasources])
+
     # Gradle commands
 
     def __gradle(self, args: List[str], **kwargs):
@@ -131,8 +303,20 @@ class MineBuilder:
             command += ["--debug"]
         if kwargs.get("scan"):
             command += ["--scan"]
+        if self.warm:
+            command += ["--daemon"]
+        if self.build_cache_dir:
+            mine_dir = (
+                (self.mine_path / self.mine).resolve() if self.containerless
+                else Path("/home/intermine/intermine/" + self.mine)
+            )
+            command += ["--build-cache", "--init-script", str(mine_dir / GRADLE_INIT_SCRIPT)]
 
-        return self.__run(command, **kwargs)
+        step = StepReport(task=" ".join(args))
+        try:
+            return self.__run(command, step=step, **kwargs)
+        finally:
+            self.report.add(step)
 
     def clean(self, **kwargs):
         args = ["clean"]
@@ -0,0 +1,97 @@
+"""
+Checkpoints taken between build steps: a snapshot of the production database
+and, once post-processing touched them, a backup of the Solr cores.
+"""
+
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Optional
+
+from intermine_builder import postgres, solr
+
+CHECKPOINTS_PATH = Path(".builder") / "checkpoints"
+
+# Ways to snapshot the production database, see `postgres`
+METHODS = ("template", "dump")
+
+
+class Checkpointer:
+    """Takes, restores and drops checkpoints of a mine."""
+
+    def __init__(self, properties: Dict[str, str], mine_dir: os.PathLike,
+                 method: str = "template", jobs: int = 4,
+                 solr_host: Optional[str] = None):
+        """
+        Args:
+            properties: Mine properties, see `create_properties`.
+            mine_dir: Mine directory, dumps are written to it.
+            method: `template` to copy the database on the postgres server,
+                `dump` for parallel directory format dumps.
+            jobs: Parallel jobs of dumps and restores.
+            solr_host: Host of the Solr server, None to never back up Solr.
+        """
+        if method not in METHODS:
+            raise ValueError("Unknown checkpoint method: " + method)
+        self.properties = properties
+        self.mine_dir = Path(mine_dir)
+        self.method = method
+        self.jobs = jobs
+        self.solr_host = solr_host
+
+    def take(self, name: str, with_solr: bool = False) -> dict:
+        """Snapshot the database, and the Solr cores if asked to.
+
+        Args:
+            name: Name of the checkpoint, an existing one is replaced.
+            with_solr: Also back up the Solr cores.
+
+        Returns:
+            Where the snapshots are, to restore or drop them later.
+        """
+        database = postgres.production_database(self.properties) + "_" + name
+        if self.method == "template":
+            postgres.snapshot_database(self.properties, database)
+            snapshot = database
+        else:
+            snapshot = str(self.mine_dir / CHECKPOINTS_PATH / name)
+            postgres.dump_database(self.properties, snapshot, self.jobs)
+
+        checkpoint = {"method": self.method, "snapshot": snapshot, "solr": None}
+        if with_solr and self.solr_host:
+            try:
+                solr.backup_cores(self.solr_host, name)
+            except BaseException:
+                # Half a checkpoint can't be restored
+                self.drop(checkpoint)
+                raise
+            checkpoint["solr"] = name
+
+        return checkpoint
+
+    def restore(self, checkpoint: dict) -> None:
+        """Restore the database, and the Solr cores if they were backed up.
+
+        Args:
+            checkpoint: Checkpoint, as returned by `take`.
+        """
+        if checkpoint.get("method", "template") == "template":
+            postgres.restore_database(self.properties, checkpoint["snapshot"])
+        else:
+            postgres.restore_dump(self.properties, checkpoint["snapshot"], self.jobs)
+        if checkpoint.get("solr") and self.solr_host:
+            solr.restore_cores(self.solr_host, checkpoint["solr"])
+
+    def drop(self, checkpoint: dict) -> None:
+        """Delete the snapshots of a checkpoint.
+
+        Args:
+            checkpoint: Checkpoint, as returned by `take`.
+        """
+        if checkpoint.get("method", "template") == "template":
+            postgres.drop_database(self.properties, checkpoint["snapshot"])
+        else:
+            shutil.rmtree(checkpoint["snapshot"], ignore_errors=True)
+        if checkpoint.get("solr") and self.solr_host:
+            for core in solr.SOLR_CORES:
+                solr.drop_backup(self.solr_host, core, checkpoint["solr"])
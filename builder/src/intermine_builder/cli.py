@@ -1,4 +1,5 @@
 """CLI interface to builder."""
+import json
 import os
 import sys
 from pathlib import Path
@@ -10,31 +11,40 @@ import traceback
 import click
 import docker
 
-from intermine_builder import MineBuilder, intermine
-from intermine_builder.properties import create_properties, write_properties, write_solr_host
+from intermine_builder import DOCKER_NETWORK_NAME, MineBuilder, intermine, project_xml
+from intermine_builder.checkpoint import METHODS as CHECKPOINT_METHODS, Checkpointer
+from intermine_builder.postgres import tuned_database
+from intermine_builder.properties import PROFILES, create_properties, write_properties, write_solr_host
+from intermine_builder.minecompose import parse_minecompose
+from intermine_builder.plan import DEPENDENCIES_FILE, build_plan, load_dependencies, restrict_plan, run_sources
 from intermine_builder.project_xml import parse_project_xml
+from intermine_builder.rebuild import RebuildState, base_fingerprint, plan_steps, source_fingerprints
+from intermine_builder.report import compare_reports, format_comparison, latest_reports, load_report
 
 # There really is no (clean) way to have both separate commands for the methods
 # that need to be handled differently, and dynamic resolution of method names.
 # This means we can't leverage option validation for each command, and need to
 # do it manually. Trust us; we tried hard.
 
-BUILDER_CONSTRUCTOR_OPTIONS = ["build_image", "data_path", "mine_path", "volumes", "containerless"]
+BUILDER_CONSTRUCTOR_OPTIONS = ["build_image", "data_path", "mine_path", "volumes", "containerless", "build_cache_dir",
+                               "network", "services_prefix", "warm", "pool_size"]
 
 def _task(mine, task, **options):
 
-    builder_options = {k: options.get(k) for k in BUILDER_CONSTRUCTOR_OPTIONS}
+    builder_options = {k: options[k] for k in BUILDER_CONSTRUCTOR_OPTIONS if options.get(k) is not None}
+    if options.get("log"):
+        # Follow the output as it streams, it isn't kept whole in memory
+        builder_options["on_output"] = lambda line: click.echo(line, nl=False)
     builder = MineBuilder(mine, **builder_options)
 
     try:
         method = getattr(builder, task)
     except AttributeError:
         click.echo("No task named: " + task, err=True)
+        builder.close()
         return
 
     try:
-        log = None
-
         if task == "create_properties_file":
             # TODO parse options.get('overrides_properties') which is path to .properties file
             click.echo(task + " task is not implemented yet", err=True)
@@ -51,26 +61,38 @@ def _task(mine, task, **options):
                 else []
             )
             source = {"name": options.get("name"), "type": options.get("type"), "properties": props}
-            log = method(source)
+            method(source)
+        elif task == "apply_minecompose":
+            if not options.get("minecompose"):
+                click.echo(task + " task requires --minecompose", err=True)
+                return
+            method(parse_minecompose(options.get("minecompose")))
         elif task == "integrate":
-            if not options.get("source"):
+            sources = options.pop("source", None)
+            if not sources:
                 click.echo(task + " task requires --source", err=True)
                 return
-            log = method(options.get("source"), **options)
+            if len(sources) == 1:
+                method(sources[0], **options)
+            else:
+                # Keep the order project.xml imposes among the given sources
+                run_sources(restrict_plan(_plan(builder.mine_path / mine), sources),
+                            lambda source: method(source, **options), jobs=options.get("jobs") or 1)
         elif task == "post_process":
-            if not options.get("process"):
+            process = options.pop("process", None)
+            if not process:
                 click.echo(task + " task requires --process", err=True)
                 return
-            log = method(options.get("process"), **options)
+            method(process, **options)
         else:
-            log = method(**options)
-
-        if options.get("log") and log:
-            click.echo(log)
+            method(**options)
 
     except docker.errors.ContainerError as err:
         click.echo(str(err.stderr, 'utf-8'), err=True)
         sys.exit(err.exit_status)
+    finally:
+        # Removes the containers kept running in warm mode
+        builder.close()
 
 
 @click.command()
@@ -81,8 +103,14 @@ def _task(mine, task, **options):
 @click.option("--build-image", is_flag=True)
 @click.option("--data-path", type=click.Path(exists=True))
 @click.option("--data-dir", multiple=True, type=click.Path(exists=True), help="Example: --data-dir ~/mydata:/data --data-dir /malaria:/data/malaria")
+@click.option("--build-cache-dir", type=click.Path(file_okay=False), help="Directory of the gradle build cache, enables it.")
+@click.option("--network", help="Docker network of the postgres and solr containers. Defaults to " + DOCKER_NETWORK_NAME + ".")
+@click.option("--services-prefix", help="Name prefix of the postgres and solr containers, e.g. mymine for mymine-postgres. Defaults to intermine.")
+@click.option("--warm", is_flag=True, help="Keep builder containers running and exec each task into an idle one, instead of starting a container per task.")
+@click.option("--pool-size", type=click.IntRange(min=1), help="Max builder containers kept running with --warm. Defaults to --jobs.")
 # integrate method
-@click.option("--source")
+@click.option("--source", multiple=True, help="Example: --source uniprot --source go. Several sources are integrated concurrently as project.xml allows.")
+@click.option("--jobs", type=click.IntRange(min=1), default=1, show_default=True, help="Max sources integrated at once. Concurrent sources share the gradle build outputs of the mine directory, only raise it if they don't write the same ones.")
 @click.option("--action")
 # post_process method
 @click.option("--process")
@@ -92,6 +120,8 @@ def _task(mine, task, **options):
 @click.option("--name")
 @click.option("--type")
 @click.option("--property", multiple=True, help="Example: --property 'name=src.data.dir,location=/data/panther' --property 'name=panther.organisms,value=7227 6239 9606'")
+# apply_minecompose method
+@click.option("--minecompose", type=click.Path(exists=True, dir_okay=False), help="Path to minecompose.json with the properties and data sources of the mine.")
 # methods that use gradle
 @click.option("--stacktrace", is_flag=True)
 @click.option("--info", is_flag=True)
@@ -110,6 +140,8 @@ def main(mine, task, **options):
             }
 
     options['volumes'] = volumes
+    if options['warm'] and options['pool_size'] is None:
+        options['pool_size'] = options['jobs']
     _task(mine, task, **options)
 
 
@@ -118,10 +150,13 @@ def _prepare(**options):
     mine_name = mine_path.name
 
     overrides = {}
-    if 'properties_path' in options:
+    if options.get('properties_path'):
         with open(options['properties_path'], 'r') as f:
             d = eval(f.read())
             overrides.update(d)
+    minecompose = parse_minecompose(options['minecompose']) if options.get('minecompose') else None
+    if minecompose:
+        overrides.update(minecompose.properties)
     if options['override']:
         for kv in options['override']:
             (k, v) = kv.split('=')
@@ -132,33 +167,90 @@ def _prepare(**options):
                      'TOMCAT_HOST', 'TOMCAT_PORT', 'TOMCAT_USER', 'TOMCAT_PWD']
                     if envvar in os.environ])
     kwargs['overrides'] = overrides
+    kwargs['profile'] = options.get('profile')
 
     properties = create_properties(**kwargs)
     write_properties(Path.home() / '.intermine' / (mine_name + '.properties'), properties)
     write_solr_host(mine_path, os.getenv('SOLR_HOST', 'localhost'))
+    if minecompose:
+        project_xml.append_sources(mine_path / "project.xml",
+                                   [source.dict() for source in minecompose.datasources])
+    return properties
 
 
 @click.command()
 @click.option("--mine-path", type=click.Path(exists=True, file_okay=False), required=True, help="Path to mine directory to be prepared.")
 @click.option("--properties-path", type=click.Path(exists=True), required=False, help="Path to pickle file containing a dict of property overrides.")
 @click.option("--override", multiple=True, help="Example: --override webapp.path=kittenmine --override project.title=KittenMine")
+@click.option("--minecompose", type=click.Path(exists=True, dir_okay=False), required=False, help="Path to minecompose.json. Its properties are overridden by --override, its data sources are added to project.xml.")
+@click.option("--profile", type=click.Choice(list(PROFILES)), required=False, help="Tune the mine properties and the production database for a kind of build.")
 def prepare(**options):
     """Make changes to the filesystem to faciliate building a mine - no containers used.
     Expects envvars for dependent services to be present."""
     _prepare(**options)
 
 
+def _plan(mine_path, dependencies_path=None):
+    project = parse_project_xml(mine_path / "project.xml")
+    declared = load_dependencies(dependencies_path or (mine_path / DEPENDENCIES_FILE))
+    return build_plan(project, declared)
+
+
+@click.command()
+@click.option("--mine-path", type=click.Path(exists=True, file_okay=False), required=True, help="Path to mine directory to be planned.")
+@click.option("--dependencies-path", type=click.Path(exists=True), required=False, help="Path to JSON source dependency map. Defaults to " + DEPENDENCIES_FILE + " in the mine directory.")
+def plan(**options):
+    """Print the build plan of a mine as JSON, for use in a build job specification."""
+    click.echo(json.dumps(_plan(Path(options['mine_path']), options.get('dependencies_path')), indent=2))
+
+
+@click.command()
+@click.option("--mine-path", type=click.Path(exists=True, file_okay=False), required=False, help="Mine directory to compare the latest two build reports of.")
+@click.option("--threshold", type=float, default=0.1, show_default=True, help="Relative increase of a metric reported as a regression.")
+@click.option("--fail-on-regression", is_flag=True, help="Exit with status 1 if any step regressed.")
+@click.argument("reports", nargs=-1, type=click.Path(exists=True, dir_okay=False))
+def report(reports, **options):
+    """Compare two build reports, BASELINE then CURRENT, or the latest two of a mine."""
+    if not reports and options.get('mine_path'):
+        reports = latest_reports(Path(options['mine_path']))
+    if len(reports) != 2:
+        click.echo("Expected two build reports to compare", err=True)
+        sys.exit(2)
+
+    baseline, current = (load_report(path) for path in reports)
+    rows = compare_reports(baseline, current, options['threshold'])
+    click.echo(f"{reports[0]} -> {reports[1]}")
+    click.echo(format_comparison(rows))
+
+    regressed = [row['task'] for row in rows if row['regressions']]
+    if regressed:
+        click.echo("\nRegressed: " + ", ".join(regressed), err=True)
+        if options['fail_on_regression']:
+            sys.exit(1)
+
+
 @click.command()
 @click.option("--task", required=False, help="Run a single task instead of the full job.")
-@click.option("--rebuild", is_flag=True, required=False, help="Do a rebuild instead of a full build, meaning the userprofile DB won't be touched.")
+@click.option("--rebuild", is_flag=True, required=False, help="Do a rebuild instead of a full build, meaning the userprofile DB won't be touched. Restores the database as it was after the last unchanged source and integrates only the sources that follow.")
+@click.option("--no-checkpoints", is_flag=True, required=False, help="Don't snapshot the database between steps. Saves disk space, but the next rebuild integrates every source.")
+@click.option("--keep-checkpoints", type=click.IntRange(min=1), default=3, show_default=True, help="Checkpoints of integrated sources kept for rebuilds, each holds a copy of the database. Older ones are dropped as new ones are taken.")
+@click.option("--resume-from", required=False, help="Restore the latest checkpoint taken before a step and continue from there, e.g. integrate-uniprot or postprocess-create-search-index. See `builder_plan` for the sources and post-processes.")
+@click.option("--checkpoint-method", type=click.Choice(CHECKPOINT_METHODS), default="template", show_default=True, help="Copy the database on the postgres server as a template, or dump it to the mine directory with parallel jobs.")
+@click.option("--dump-jobs", type=int, default=4, show_default=True, help="Parallel jobs of checkpoint dumps and restores.")
 @click.option("--mine-path", type=click.Path(exists=True, file_okay=False), required=True, help="Path to mine directory to be prepared.")
 @click.option("--bio-path", type=click.Path(exists=True, file_okay=False), required=False, help="Path to optional bio directory to be installed.")
 @click.option("--im-path", type=click.Path(exists=True, file_okay=False), required=False, help="Path to optional intermine directory to be installed.")
 @click.option("--properties-path", type=click.Path(exists=True), required=False, help="Path to pickle file containing a dict of property overrides.")
 @click.option("--override", multiple=True, help="Example: --override webapp.path=kittenmine --override project.title=KittenMine")
+@click.option("--minecompose", type=click.Path(exists=True, dir_okay=False), required=False, help="Path to minecompose.json. Its properties are overridden by --override, its data sources are added to project.xml.")
+@click.option("--profile", type=click.Choice(list(PROFILES)), required=False, help="Tune the mine properties and the production database for a kind of build.")
 @click.option("--keep-alive", is_flag=True, required=False, help="Keep process alive when job fails. Has no effect when used with `--task`. Useful to keep a container running for troubleshooting.")
+@click.option("--dependencies-path", type=click.Path(exists=True), required=False, help="Path to JSON source dependency map. Defaults to " + DEPENDENCIES_FILE + " in the mine directory.")
+@click.option("--jobs", type=int, default=1, show_default=True, help="Max sources integrated at once, when the dependency map allows it. Concurrent sources share the gradle build outputs of the mine directory, only raise it if they don't write the same ones.")
+@click.option("--warm", is_flag=True, required=False, help="Keep a gradle daemon running for the whole job instead of starting a JVM for every task.")
+@click.option("--build-cache-dir", type=click.Path(file_okay=False), required=False, help="Directory of the gradle build cache, enables it.")
 # integrate task
-@click.option("--source")
+@click.option("--source", multiple=True)
 @click.option("--action")
 # post_process task
 @click.option("--process")
@@ -173,13 +265,15 @@ def job(**options):
     mine_path = Path(options['mine_path'])
     mine_name = mine_path.name
 
-    _prepare(**options)
+    properties = _prepare(**options)
+    builder = MineBuilder(mine_name, mine_path=mine_path.parent, containerless=True,
+                          warm=options['warm'], build_cache_dir=options.get('build_cache_dir'))
 
+    succeeded = failed = False
     try:
         if options.get('im_path'):
             intermine.install(Path(options['im_path']))
 
-        builder = MineBuilder(mine_name, mine_path=mine_path.parent, containerless=True)
         if options.get('bio_path'):
             builder.install(cwd=options['bio_path'], stacktrace=True)
         builder.clean(stacktrace=True)
@@ -188,28 +282,104 @@ def job(**options):
         if task:
             options['mine_path'] = mine_path.parent
             options['containerless'] = True
-            return _task(mine_name, task, **options)
+            builder.close()
+            _task(mine_name, task, **options)
+            succeeded = True
+            return
 
         # If no task is defined, continue with build process.
 
-        builder.build_db(stacktrace=True)
-
-        project = parse_project_xml(mine_path / "project.xml")
-        for source in project['sources']:
-            builder.integrate(source, stacktrace=True)
-        for postprocess in project['post-processing']:
-            builder.post_process(postprocess, stacktrace=True)
+        # Same plan as the minebuilder workflow DAG
+        build = _plan(mine_path, options.get('dependencies_path'))
+
+        state = RebuildState(mine_path)
+        fingerprints = source_fingerprints(parse_project_xml(mine_path / "project.xml"), state.files)
+        base = base_fingerprint(mine_path, state.files, options.get('bio_path'))
+        checkpointer = Checkpointer(properties, mine_path, method=options['checkpoint_method'],
+                                    jobs=options['dump_jobs'], solr_host=os.getenv('SOLR_HOST', 'localhost'))
+
+        steps = plan_steps(build)
+        resume_from = options.get('resume_from')
+        if resume_from:
+            if resume_from not in steps:
+                click.echo("No step named: " + resume_from + ". Steps are: " + ", ".join(steps), err=True)
+                sys.exit(2)
+            checkpoint = state.resume_checkpoint(steps[:steps.index(resume_from)])
+            if checkpoint is None:
+                click.echo("No checkpoint before " + resume_from + ", building from the start.")
+        elif options.get('rebuild'):
+            checkpoint = state.usable_checkpoint(base, fingerprints)
+        else:
+            checkpoint = None
+
+        if checkpoint is not None:
+            restored = state.checkpoints[checkpoint]
+            done, post_processed = list(restored['sources']), list(restored['post_processes'])
+            click.echo("Restoring checkpoint, skipping: " + ", ".join(done + post_processed))
+            checkpointer.restore(restored['snapshot'])
+            stale = state.truncate(checkpoint + 1)
+        else:
+            done, post_processed = [], []
+            builder.build_db(stacktrace=True)
+            stale = state.truncate(0)
+        for snapshot in stale:
+            checkpointer.drop(snapshot)
+        state.base = base
+        state.save()
+
+        def take_checkpoint(integrated, post_processes=()):
+            name = "checkpoint_" + str(len(integrated) + len(post_processes))
+            try:
+                # Solr is only indexed by post-processes
+                snapshot = checkpointer.take(name, with_solr=bool(post_processes))
+            except Exception:
+                # The build goes on, it only can't be resumed from here
+                click.echo("Failed to take " + name + ", continuing without it.\n"
+                           + traceback.format_exc(), err=True)
+                return
+            state.add_checkpoint(integrated, fingerprints, snapshot, post_processes)
+            superseded = state.prune(options['keep_checkpoints'])
+            state.save()
+            for stale in superseded:
+                try:
+                    checkpointer.drop(stale)
+                except Exception:
+                    click.echo("Failed to drop a superseded checkpoint, continuing.\n"
+                               + traceback.format_exc(), err=True)
+
+        checkpoints = not options.get('no_checkpoints')
+        profile = options.get('profile')
+        # Prior settings are back before deploying
+        with tuned_database(properties, PROFILES[profile]['database'] if profile else {}):
+            run_sources(build, lambda source: builder.integrate(source, stacktrace=True),
+                        jobs=options['jobs'], done=done,
+                        checkpoint=take_checkpoint if checkpoints else None)
+            for postprocess in build['post_processing']:
+                if postprocess in post_processed:
+                    continue
+                builder.post_process(postprocess, stacktrace=True)
+                post_processed.append(postprocess)
+                if checkpoints:
+                    take_checkpoint(build['sources'], post_processed)
 
         if options.get('rebuild'):
             builder.redeploy(stacktrace=True)
         else:
             builder.build_user_db(stacktrace=True)
             builder.deploy(stacktrace=True)
+        succeeded = True
 
     except subprocess.CalledProcessError:
         click.echo(traceback.format_exc(), err=True)
-
-        if options['keep_alive']:
-            click.echo("Process will be kept alive to allow manual intervention and troubleshooting.")
-            while True:
-                time.sleep(60)
+        failed = True
+
+    finally:
+        # Whatever failed, the gradle daemon or containers are stopped and
+        # the steps run so far are reported
+        builder.close()
+        click.echo("Build report written to " + str(builder.write_report()), err=not succeeded)
+
+    if failed and options['keep_alive']:
+        click.echo("Process will be kept alive to allow manual intervention and troubleshooting.")
+        while True:
+            time.sleep(60)
@@ -0,0 +1,178 @@
+"""Plan the order of integration steps, running independent sources concurrently.
+
+A source must integrate after every earlier source (in project.xml order) it
+shares a written class with, and after the sources it declares in `after`.
+Sources that don't declare the classes they write are assumed to share them
+with every other source, so without a dependency map the plan is the usual
+serial chain.
+
+The dependency map is a JSON object keyed by source name or source type:
+
+    {
+        "uniprot": {"writes": ["Protein", "Gene", "BioEntity"]},
+        "malaria-gff": {"writes": ["Gene", "BioEntity"], "after": ["uniprot-malaria"]}
+    }
+
+List every class the source stores, including superclasses sharing tables,
+as sources writing a common class are never integrated concurrently.
+"""
+
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+DEPENDENCIES_FILE = "source-dependencies.json"
+
+
+def load_dependencies(path: Optional[os.PathLike]) -> Dict[str, dict]:
+    """Read a source dependency map.
+
+    Args:
+        path: Path to the JSON file, may be None or missing.
+
+    Returns:
+        Declarations by source name or type, empty if there is no file.
+    """
+    if path is None or not Path(path).exists():
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def source_dependencies(project: dict, declared: Dict[str, dict]) -> Dict[str, List[str]]:
+    """Find the sources each source has to wait for.
+
+    Args:
+        project: Parsed project.xml, see `parse_project_xml`.
+        declared: Source dependency map.
+
+    Returns:
+        Direct dependencies of every source, in project.xml order.
+
+    Raises:
+        ValueError: A source declares it runs after a later or unknown source.
+    """
+    sources = project['sources']
+    source_types = project.get('source-types', {})
+
+    def declaration(source):
+        return declared.get(source) or declared.get(source_types.get(source)) or {}
+
+    writes = {}
+    ancestors = {}
+    dependencies = {}
+    for i, source in enumerate(sources):
+        decl = declaration(source)
+        writes[source] = set(decl['writes']) if 'writes' in decl else None
+
+        direct = set()
+        for after in decl.get('after', []):
+            if after not in sources[:i]:
+                raise ValueError(f"{source} can't run after {after}, "
+                                 "which is not an earlier source in project.xml")
+            direct.add(after)
+        for earlier in sources[:i]:
+            if (writes[source] is None or writes[earlier] is None
+                    or writes[source] & writes[earlier]):
+                direct.add(earlier)
+
+        # Drop dependencies that are already implied by another one
+        implied = set().union(*(ancestors[dep] for dep in direct))
+        dependencies[source] = [s for s in sources[:i] if s in direct - implied]
+        ancestors[source] = direct | implied
+
+    return dependencies
+
+
+def build_plan(project: dict, declared: Dict[str, dict]) -> dict:
+    """Plan the integration and post-processing steps of a build.
+
+    Args:
+        project: Parsed project.xml, see `parse_project_xml`.
+        declared: Source dependency map.
+
+    Returns:
+        Build plan with `sources`, `source_dependencies` and `post_processing`,
+        in the shape of the build job specification.
+    """
+    return {
+        'sources': list(project['sources']),
+        'source_dependencies': source_dependencies(project, declared),
+        'post_processing': list(project['post-processing']),
+    }
+
+
+def restrict_plan(plan: dict, sources: Iterable[str]) -> dict:
+    """Keep only some sources of a plan, in the order the plan imposes on them.
+
+    Args:
+        plan: Build plan, see `build_plan`.
+        sources: Sources to keep, those missing from the plan depend on none.
+
+    Returns:
+        Plan of the given sources, without post-processing steps.
+    """
+    sources = list(sources)
+    ancestors: Dict[str, set] = {}
+    for source in plan['sources']:
+        direct = plan['source_dependencies'].get(source, [])
+        ancestors[source] = set(direct).union(*(ancestors[dep] for dep in direct))
+    return {
+        'sources': sources,
+        'source_dependencies': {
+            source: [dep for dep in plan['sources'] if dep in sources and dep in ancestors.get(source, ())]
+            for source in sources
+        },
+        'post_processing': [],
+    }
+
+
+def run_sources(plan: dict, integrate: Callable[[str], None], jobs: int = 1,
+                done: Iterable[str] = (),
+                checkpoint: Optional[Callable[[List[str]], None]] = None) -> None:
+    """Integrate sources following a plan, each as soon as its dependencies are done.
+
+    Args:
+        plan: Build plan, see `build_plan`.
+        integrate: Integrates a single source.
+        jobs: Max sources integrated at once.
+        done: Sources already integrated, e.g. restored from a checkpoint.
+        checkpoint: Called with the integrated sources, in completion order,
+            whenever a source finished and no other is being integrated.
+
+    Raises:
+        ValueError: Sources depend on sources that are not in the plan.
+        Exception: The first error of a failed integration, raised once the
+            running integrations finish.
+    """
+    order = [source for source in plan['sources'] if source in set(done)]
+    pending = [source for source in plan['sources'] if source not in set(done)]
+    dependencies = plan['source_dependencies']
+    running: Dict[Future, str] = {}
+
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+        while pending or running:
+            for source in list(pending):
+                if len(running) >= max(jobs, 1):
+                    break
+                if all(dep in order for dep in dependencies.get(source, [])):
+                    pending.remove(source)
+                    running[executor.submit(integrate, source)] = source
+
+            if not running:
+                raise ValueError("Unsatisfiable source dependencies: " + ", ".join(pending))
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                source = running.pop(future)
+                error = future.exception()
+                if error is not None:
+                    # Let the others finish, a half integrated source is worse
+                    wait(running)
+                    raise error
+                order.append(source)
+
+            if checkpoint and not running:
+                checkpoint(list(order))
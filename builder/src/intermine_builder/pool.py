@@ -0,0 +1,93 @@
+"""
+A pool of long-lived builder containers. Tasks are exec'd into an idle
+container instead of each starting and removing its own, and concurrent tasks
+get a container each.
+"""
+
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Iterator, List
+
+
+def unique_name(prefix: str) -> str:
+    """Name a container so that builds on the same host don't collide.
+
+    Args:
+        prefix: Start of the name, e.g. the mine.
+
+    Returns:
+        Prefix followed by a random suffix.
+    """
+    return prefix + "-" + uuid.uuid4().hex[:8]
+
+
+class ContainerPool:
+    """Up to `size` containers, started on demand and reused until `close`."""
+
+    def __init__(self, start: Callable[[str], object], name: str, size: int = 1):
+        """
+        Args:
+            start: Starts a detached container that keeps running, given its name.
+            name: Prefix of the names of the containers.
+            size: Max containers running at once.
+        """
+        self.start = start
+        self.name = name
+        self.size = max(size, 1)
+        self._idle: List[object] = []
+        self._running = 0
+        self._started = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def container(self) -> Iterator[object]:
+        """Check out a container for the duration of a task.
+
+        Blocks while all `size` containers are busy.
+        """
+        container = self._acquire()
+        try:
+            yield container
+        finally:
+            with self._condition:
+                if self._closed:
+                    self._running -= 1
+                    container.remove(force=True)
+                else:
+                    self._idle.append(container)
+                    self._condition.notify()
+
+    def _acquire(self):
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Container pool is closed")
+                if self._idle:
+                    return self._idle.pop()
+                if self._running < self.size:
+                    # Reserve the slot, starting a container takes a while
+                    self._running += 1
+                    self._started += 1
+                    name = self.name + "-" + str(self._started)
+                    break
+                self._condition.wait()
+
+        try:
+            return self.start(name)
+        except BaseException:
+            with self._condition:
+                self._running -= 1
+                self._condition.notify()
+            raise
+
+    def close(self) -> None:
+        """Remove the idle containers, busy ones once their task finishes."""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._running -= len(idle)
+            self._condition.notify_all()
+        for container in idle:
+            container.remove(force=True)
@@ -0,0 +1,187 @@
+"""
+Snapshot and restore the production database of a mine.
+
+Template snapshots copy the database with postgres template databases. This
+is a file level copy, much faster than a dump and restore, but needs the
+copied database to have no open connections and doubles the disk usage of
+the postgres server. Dump snapshots use parallel directory format dumps
+instead, which live next to the mine and can be moved to another server.
+
+Settings of the production database can be changed for the duration of the
+build. They are set on the database rather than a session, as the sessions
+belong to the gradle tasks.
+"""
+
+import os
+import shutil
+import subprocess
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+
+def _connection(properties: Dict[str, str]) -> Dict[str, str]:
+    server = properties["db.production.datasource.serverName"]
+    host, _, port = server.partition(":")
+    return {
+        "PGHOST": host,
+        "PGPORT": port or "5432",
+        "PGUSER": properties["db.production.datasource.user"],
+        "PGPASSWORD": properties["db.production.datasource.password"],
+    }
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _run(properties: Dict[str, str], command: List[str]) -> None:
+    subprocess.run(command, env={**os.environ, **_connection(properties)}, check=True)
+
+
+def _literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _query(properties: Dict[str, str], query: str) -> List[str]:
+    command = ["psql", "-v", "ON_ERROR_STOP=1", "-d", "postgres", "-At", "-c", query]
+    result = subprocess.run(command, env={**os.environ, **_connection(properties)},
+                            check=True, stdout=subprocess.PIPE, universal_newlines=True)
+    return result.stdout.splitlines()
+
+
+def _psql(properties: Dict[str, str], statements: List[str]) -> None:
+    # CREATE DATABASE can't run in a transaction, so one -c per statement
+    command = ["psql", "-v", "ON_ERROR_STOP=1", "-d", "postgres", "-q"]
+    for statement in statements:
+        command += ["-c", statement]
+    _run(properties, command)
+
+
+def _disconnect(name: str) -> str:
+    return ("SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+            "WHERE datname = '" + name.replace("'", "''") + "' AND pid <> pg_backend_pid()")
+
+
+def production_database(properties: Dict[str, str]) -> str:
+    return properties["db.production.datasource.databaseName"]
+
+
+def snapshot_database(properties: Dict[str, str], snapshot: str) -> None:
+    """Copy the production database to a snapshot, replacing an existing one.
+
+    Args:
+        properties: Mine properties, see `create_properties`.
+        snapshot: Name of the snapshot database.
+    """
+    database = production_database(properties)
+    _psql(properties, [
+        "DROP DATABASE IF EXISTS " + _quote(snapshot),
+        _disconnect(database),
+        "CREATE DATABASE " + _quote(snapshot) + " TEMPLATE " + _quote(database),
+    ])
+
+
+def restore_database(properties: Dict[str, str], snapshot: str) -> None:
+    """Replace the production database with a copy of a snapshot.
+
+    Args:
+        properties: Mine properties, see `create_properties`.
+        snapshot: Name of the snapshot database.
+    """
+    database = production_database(properties)
+    _psql(properties, [
+        _disconnect(database),
+        "DROP DATABASE IF EXISTS " + _quote(database),
+        "CREATE DATABASE " + _quote(database) + " TEMPLATE " + _quote(snapshot),
+    ])
+
+
+def drop_database(properties: Dict[str, str], name: str) -> None:
+    """Drop a snapshot database if it exists.
+
+    Args:
+        properties: Mine properties, see `create_properties`.
+        name: Name of the database.
+    """
+    _psql(properties, ["DROP DATABASE IF EXISTS " + _quote(name)])
+
+
+def dump_database(properties: Dict[str, str], path: os.PathLike, jobs: int = 4) -> None:
+    """Dump the production database with parallel jobs, replacing an existing dump.
+
+    Args:
+        properties: Mine properties, see `create_properties`.
+        path: Directory of the dump.
+        jobs: Number of tables dumped at once.
+    """
+    shutil.rmtree(path, ignore_errors=True)
+    _run(properties, ["pg_dump", "-Fd", "-j", str(jobs), "-f", str(path),
+                      production_database(properties)])
+
+
+def restore_dump(properties: Dict[str, str], path: os.PathLike, jobs: int = 4) -> None:
+    """Replace the production database with a dump.
+
+    Args:
+        properties: Mine properties, see `create_properties`.
+        path: Directory of the dump.
+        jobs: Number of tables restored at once.
+    """
+    database = production_database(properties)
+    _psql(properties, [
+        _disconnect(database),
+        "DROP DATABASE IF EXISTS " + _quote(database),
+        "CREATE DATABASE " + _quote(database),
+    ])
+    _run(properties, ["pg_restore", "-j", str(jobs), "-d", database, str(path)])
+
+
+def database_settings(properties: Dict[str, str]) -> Dict[str, str]:
+    """Read the settings set on the production database.
+
+    Args:
+        properties: Mine properties, see `create_properties`.
+
+    Returns:
+        Values by setting name, without the server defaults.
+    """
+    rows = _query(properties, (
+        "SELECT unnest(setconfig) FROM pg_db_role_setting WHERE setrole = 0 AND setdatabase = "
+        "(SELECT oid FROM pg_database WHERE datname = " + _literal(production_database(properties)) + ")"))
+    return dict(row.split("=", 1) for row in rows if "=" in row)
+
+
+def set_database_settings(properties: Dict[str, str], settings: Dict[str, Optional[str]]) -> None:
+    """Change settings of the production database, for sessions started afterwards.
+
+    Args:
+        properties: Mine properties, see `create_properties`.
+        settings: Values by setting name, None to reset to the server default.
+    """
+    database = _quote(production_database(properties))
+    _psql(properties, [
+        "ALTER DATABASE " + database + " RESET " + name if value is None
+        else "ALTER DATABASE " + database + " SET " + name + " = " + _literal(value)
+        for name, value in settings.items()
+    ])
+
+
+@contextmanager
+def tuned_database(properties: Dict[str, str], settings: Dict[str, str]) -> Iterator[None]:
+    """Change settings of the production database, then restore the prior ones.
+
+    Restoring or recreating the database within loses the changed settings.
+
+    Args:
+        properties: Mine properties, see `create_properties`.
+        settings: Values by setting name.
+    """
+    if not settings:
+        yield
+        return
+    prior = database_settings(properties)
+    set_database_settings(properties, settings)
+    try:
+        yield
+    finally:
+        set_database_settings(properties, {name: prior.get(name) for name in settings})
@@ -3,6 +3,7 @@
 import os
 import xml.etree.ElementTree as ET
 from pathlib import Path
+from typing import List
 
 from intermine_builder.types import DataSource
 
@@ -11,19 +12,26 @@ def _read(project_xml_path: os.PathLike) -> ET.ElementTree:
 
 
 def _write(project_xml_path: os.PathLike, tree: ET.ElementTree) -> None:
-    tree.write(project_xml_path)
+    # Write next to the original and swap, so a failed write leaves it intact
+    tmp_path = Path(str(project_xml_path) + '.tmp')
+    tree.write(tmp_path)
+    os.replace(tmp_path, project_xml_path)
 
 
 def parse_project_xml(project_xml_path: os.PathLike) -> dict:
     tree = _read(project_xml_path)
     root  = tree.getroot()
 
-    res = { 'sources': [], 'post-processing': [] }
+    res = { 'sources': [], 'source-types': {}, 'source-properties': {}, 'post-processing': [] }
 
     sources_el = root.find('sources')
     if sources_el:
         for source in sources_el.findall('source'):
             res['sources'].append(source.attrib['name'])
+            res['source-types'][source.attrib['name']] = source.attrib.get('type')
+            res['source-properties'][source.attrib['name']] = [
+                dict(prop.attrib) for prop in source.findall('property')
+            ]
 
     postprocessing_el = root.find('post-processing')
     if postprocessing_el:
@@ -34,20 +42,39 @@ def parse_project_xml(project_xml_path: os.PathLike) -> dict:
 
 
 def append_source(project_xml_path: os.PathLike, source: DataSource) -> None:
+    append_sources(project_xml_path, [source])
+
+
+def append_sources(project_xml_path: os.PathLike, sources: List[DataSource]) -> None:
+    """Add data sources to a project.xml, parsing and writing it once.
+
+    A source with the name of an existing one replaces it in place, so
+    applying the same sources again leaves the file unchanged.
+
+    Args:
+        project_xml_path: Path to project.xml.
+        sources: Data sources, in the order they are integrated.
+    """
     tree = _read(project_xml_path)
 
     root = tree.getroot()
     sources_el = root.find("sources")
-
-    if sources_el:
-        source_el = ET.SubElement(
-            sources_el,
-            "source", {"name": source["name"], "type": source["type"]}
-        )
-    else:
+    if sources_el is None:
         raise RuntimeError('Invalid project.xml - Cannot find sources attribute')
 
-    for prop in source["properties"]:
-        ET.SubElement(source_el, "property", prop)
+    existing = {el.attrib.get("name"): el for el in sources_el.findall("source")}
+    for source in sources:
+        source_el = ET.Element("source", {"name": source["name"], "type": source["type"]})
+        for prop in source["properties"]:
+            ET.SubElement(source_el, "property", prop)
+
+        if source["name"] in existing:
+            old_el = existing[source["name"]]
+            # Keep the indentation of whatever follows the replaced source
+            source_el.tail = old_el.tail
+            sources_el[list(sources_el).index(old_el)] = source_el
+        else:
+            sources_el.append(source_el)
+        existing[source["name"]] = source_el
 
     _write(project_xml_path, tree)
@@ -7,6 +7,29 @@ import re
 from typing import Dict, Optional
 from pathlib import Path
 
+# Named sets of settings for a kind of build. `properties` are written to the
+# mine properties, `database` are postgres settings of the production
+# database while sources are integrated and post-processed.
+PROFILES = {
+    "build-performance": {
+        "properties": {
+            # Logging the execution time of every query slows down bulk loads
+            "os.production.verboseQueryLog": "false",
+            # Objects tracked in memory before the data tracker spills to postgres
+            "integration.production.datatrackerMaxSize": "1000000",
+            # Data tracker entries written per batch
+            "integration.production.datatrackerCommitSize": "100000",
+        },
+        "database": {
+            # A crash loses the last transactions, the build is restarted anyway
+            "synchronous_commit": "off",
+            # Index builds of post-processing
+            "maintenance_work_mem": "1GB",
+            "work_mem": "64MB",
+        },
+    },
+}
+
 
 def create_properties(
     PGHOST: str = "intermine-postgres",
@@ -19,7 +42,11 @@ def create_properties(
     TOMCAT_USER: str = "tomcat",
     TOMCAT_PWD: str = "tomcat",
     overrides: Optional[Dict[str, str]] = None,
+    profile: Optional[str] = None,
 ) -> dict:
+    if profile is not None and profile not in PROFILES:
+        raise ValueError("Unknown build profile: " + profile)
+
     properties = {
         # This file specifies the how to access local postgres databases used for
         # building and running and InterMine.bio warehouse.  Also some configuration
@@ -83,6 +110,8 @@ def create_properties(
         "feedback.destination": " test_user@mail_address",
     }
 
+    if profile:
+        properties.update(PROFILES[profile]["properties"])
     if overrides:
         properties.update(overrides)
 
@@ -92,29 +121,58 @@ def create_properties(
 def write_properties(filepath: os.PathLike, properties_dict: Dict[str, str]) -> None:
     os.makedirs(os.path.dirname(filepath), exist_ok=True)
 
-    with open(filepath, "w") as f:
+    properties_string = ""
+    for key in properties_dict:
+        value = properties_dict[key]
+        properties_string += key + "=" + value + "\n"
 
-        properties_string = ""
-        for key in properties_dict:
-            value = properties_dict[key]
-            properties_string += key + "=" + value + "\n"
+    _write_atomic(filepath, properties_string)
 
-        f.write(properties_string)
 
+def _write_atomic(filepath: os.PathLike, content: str) -> None:
+    # Write next to the original and swap, so a failed write leaves it intact
+    tmp_path = str(filepath) + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(content)
+    os.replace(tmp_path, filepath)
 
-def _replace_property(filepath: os.PathLike, property: str, value: str):
+
+def _property_name(line: str) -> Optional[str]:
+    match = re.match(r'\s*([^#!\s=:][^\s=:]*)\s*[=:]', line)
+    return match.group(1) if match else None
+
+
+def apply_property_overrides(filepath: os.PathLike, overrides: Dict[str, str],
+                             append: bool = True) -> None:
+    """Set properties of a .properties file, reading and writing it once.
+
+    Existing properties are replaced in place, keeping comments and order.
+
+    Args:
+        filepath: Path to the .properties file.
+        overrides: Values by property name.
+        append: Add the properties missing from the file at its end.
+    """
     with open(filepath, 'r') as f:
-        properties = f.read().split('\n')
+        lines = f.read().split('\n')
+
+    missing = dict(overrides)
+    for i, line in enumerate(lines):
+        name = _property_name(line)
+        if name in overrides:
+            lines[i] = name + '=' + overrides[name]
+            missing.pop(name, None)
 
-    def replace_line_fn(line):
-        if re.match(re.escape(property) + r'\s*=', line):
-            return property + '=' + value
-        return line
+    if append and missing:
+        if lines and lines[-1] == '':
+            lines.pop()
+        lines += [name + '=' + value for name, value in missing.items()] + ['']
 
-    properties_replaced = map(replace_line_fn, properties)
+    _write_atomic(filepath, '\n'.join(lines))
 
-    with open(filepath, 'w') as f:
-        f.write('\n'.join(properties_replaced))
+
+def _replace_property(filepath: os.PathLike, property: str, value: str):
+    apply_property_overrides(filepath, {property: value}, append=False)
 
 
 def write_solr_host(minepath: os.PathLike, solr_host: str):
@@ -0,0 +1,254 @@
+"""
+Fingerprints of the inputs of a build and the checkpoints taken between its
+steps, so a rebuild can restore the database as it was after the last
+unchanged source and integrate only what follows, and a failed build can
+resume from the step that failed.
+
+State is kept in `.builder/rebuild.json` in the mine directory.
+"""
+
+import hashlib
+import json
+import os
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, List, Optional
+
+STATE_PATH = Path(".builder") / "rebuild.json"
+
+# Location properties of a source pointing to its data
+DATA_DIR_PROPERTIES = ("src.data.dir", "src.data.file")
+
+# Build outputs, never part of a fingerprint
+IGNORED_DIRS = {"build", ".gradle", ".builder"}
+
+
+def _hash_file(path: Path, cache: Dict[str, list]) -> str:
+    stat = path.stat()
+    key = str(path)
+    cached = cache.get(key)
+    if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+        return cached[2]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    cache[key] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+    return cache[key][2]
+
+
+def hash_path(path: os.PathLike, cache: Dict[str, list]) -> str:
+    """Hash the content of a file or directory.
+
+    File hashes are cached by size and modification time, so unchanged
+    files are not read again.
+
+    Args:
+        path: File or directory.
+        cache: Cached file hashes, updated in place.
+
+    Returns:
+        Hex digest, covering relative paths and contents of every file.
+    """
+    path = Path(path)
+    digest = hashlib.sha256()
+    if not path.exists():
+        digest.update(b'missing')
+    elif path.is_file():
+        digest.update(_hash_file(path, cache).encode())
+    else:
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if d not in IGNORED_DIRS)
+            for name in sorted(files):
+                file_path = Path(root) / name
+                digest.update(str(file_path.relative_to(path)).encode() + b'\0')
+                digest.update(_hash_file(file_path, cache).encode())
+    return digest.hexdigest()
+
+
+def source_fingerprints(project: dict, cache: Dict[str, list]) -> Dict[str, str]:
+    """Fingerprint each source by its project.xml entry and data.
+
+    Args:
+        project: Parsed project.xml, see `parse_project_xml`.
+        cache: Cached file hashes, updated in place.
+
+    Returns:
+        Fingerprints by source name.
+    """
+    fingerprints = {}
+    for source in project['sources']:
+        properties = project['source-properties'].get(source, [])
+        digest = hashlib.sha256(json.dumps(
+            [project['source-types'].get(source), properties], sort_keys=True
+        ).encode())
+        for prop in properties:
+            if prop.get('name') in DATA_DIR_PROPERTIES and 'location' in prop:
+                digest.update(hash_path(prop['location'], cache).encode())
+        fingerprints[source] = digest.hexdigest()
+    return fingerprints
+
+
+def base_fingerprint(mine_path: os.PathLike, cache: Dict[str, list],
+                     bio_path: Optional[os.PathLike] = None) -> str:
+    """Fingerprint what every source depends on: the data model and the
+    project.xml outside of its sources.
+
+    Args:
+        mine_path: Mine directory.
+        cache: Cached file hashes, updated in place.
+        bio_path: Bio sources installed for the build, if any.
+
+    Returns:
+        Hex digest.
+    """
+    mine_path = Path(mine_path)
+    root = ET.parse(mine_path / "project.xml").getroot()
+    sources_el = root.find('sources')
+    if sources_el is not None:
+        root.remove(sources_el)
+    digest = hashlib.sha256(ET.tostring(root))
+    digest.update(hash_path(mine_path / "dbmodel", cache).encode())
+    if bio_path:
+        digest.update(hash_path(bio_path, cache).encode())
+    return digest.hexdigest()
+
+
+def _upgrade(checkpoint: dict) -> dict:
+    # Checkpoints used to be template snapshots taken while integrating only
+    if isinstance(checkpoint['snapshot'], str):
+        checkpoint['snapshot'] = {'method': 'template', 'snapshot': checkpoint['snapshot'], 'solr': None}
+    checkpoint.setdefault('post_processes', [])
+    return checkpoint
+
+
+def integrate_step(source: str) -> str:
+    return 'integrate-' + source
+
+
+def postprocess_step(process: str) -> str:
+    return 'postprocess-' + process
+
+
+def plan_steps(plan: dict) -> List[str]:
+    """Name the steps of a build plan that can be resumed from.
+
+    Args:
+        plan: Build plan, see `build_plan`.
+
+    Returns:
+        Step names, in the order they run.
+    """
+    return ([integrate_step(source) for source in plan['sources']]
+            + [postprocess_step(process) for process in plan['post_processing']])
+
+
+class RebuildState:
+    """Fingerprints and checkpoints of the last build of a mine."""
+
+    def __init__(self, mine_path: os.PathLike):
+        self.path = Path(mine_path) / STATE_PATH
+        try:
+            with open(self.path, 'r') as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            state = {}
+        self.base: Optional[str] = state.get('base')
+        self.checkpoints: List[dict] = [_upgrade(c) for c in state.get('checkpoints', [])]
+        self.files: Dict[str, list] = state.get('files', {})
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'base': self.base, 'checkpoints': self.checkpoints, 'files': self.files}, f)
+        os.replace(tmp_path, self.path)
+
+    def usable_checkpoint(self, base: str, fingerprints: Dict[str, str]) -> Optional[int]:
+        """Find the latest checkpoint whose sources are all unchanged.
+
+        Args:
+            base: Current base fingerprint.
+            fingerprints: Current source fingerprints.
+
+        Returns:
+            Index of the checkpoint, None if no checkpoint can be restored.
+        """
+        if base != self.base:
+            return None
+        for index in range(len(self.checkpoints) - 1, -1, -1):
+            checkpoint = self.checkpoints[index]
+            # Sources can't be integrated after post-processing
+            if checkpoint['post_processes']:
+                continue
+            if all(fingerprints.get(source) == fingerprint
+                   for source, fingerprint in checkpoint['fingerprints'].items()):
+                return index
+        return None
+
+    def resume_checkpoint(self, steps: List[str]) -> Optional[int]:
+        """Find the latest checkpoint that only covers some of the given steps.
+
+        Args:
+            steps: Steps run before the one to resume from.
+
+        Returns:
+            Index of the checkpoint, None if no checkpoint can be restored.
+        """
+        for index in range(len(self.checkpoints) - 1, -1, -1):
+            checkpoint = self.checkpoints[index]
+            done = ([integrate_step(source) for source in checkpoint['sources']]
+                    + [postprocess_step(process) for process in checkpoint['post_processes']])
+            if set(done) <= set(steps):
+                return index
+        return None
+
+    def add_checkpoint(self, sources: List[str], fingerprints: Dict[str, str],
+                       snapshot: dict, post_processes: List[str] = ()) -> None:
+        """Record a snapshot taken once `sources` were integrated and
+        `post_processes` ran.
+
+        Args:
+            sources: Integrated sources, in completion order.
+            fingerprints: Fingerprints of the integrated sources.
+            snapshot: Snapshot, see `Checkpointer.take`.
+            post_processes: Post-processes run, in order.
+        """
+        self.checkpoints = [c for c in self.checkpoints if c['snapshot'] != snapshot]
+        self.checkpoints.append({
+            'sources': list(sources),
+            'post_processes': list(post_processes),
+            'fingerprints': {source: fingerprints[source] for source in sources},
+            'snapshot': snapshot,
+        })
+
+    def prune(self, keep: int) -> List[dict]:
+        """Forget checkpoints of integrated sources but the latest `keep`, and
+        checkpoints of post-processing but the latest, as each holds a copy of
+        the database. Rebuilds can't use the latter, only resuming a failed
+        build can.
+
+        Args:
+            keep: Number of checkpoints of integrated sources to keep.
+
+        Returns:
+            Snapshots of the forgotten checkpoints, to be dropped.
+        """
+        integrated = [c for c in self.checkpoints if not c['post_processes']]
+        post_processed = [c for c in self.checkpoints if c['post_processes']]
+        stale = integrated[:max(len(integrated) - keep, 0)] + post_processed[:-1]
+        self.checkpoints = [c for c in self.checkpoints if c not in stale]
+        return [c['snapshot'] for c in stale]
+
+    def truncate(self, keep: int) -> List[dict]:
+        """Forget checkpoints after the first `keep`, as the database diverged.
+
+        Args:
+            keep: Number of checkpoints to keep.
+
+        Returns:
+            Snapshots of the forgotten checkpoints, to be dropped.
+        """
+        dropped = [c['snapshot'] for c in self.checkpoints[keep:]]
+        self.checkpoints = self.checkpoints[:keep]
+        return dropped
@@ -0,0 +1,365 @@
+"""
+Structured reports of builds: wall time, CPU time, peak memory and log size
+of every gradle task, and comparison of two builds to surface regressions.
+
+Reports are written as JSON to `.builder/reports` in the mine directory, the
+output of every task as rotating gzipped logs to `.builder/logs`.
+"""
+
+import gzip
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+REPORTS_PATH = Path(".builder") / "reports"
+LOGS_PATH = Path(".builder") / "logs"
+
+# Uncompressed size of a log file before it is rotated, and rotated files kept
+LOG_MAX_BYTES = 64 << 20
+LOG_BACKUPS = 4
+# Lines of output kept in memory, returned by tasks and in their errors
+TAIL_LINES = 200
+
+# Compared metrics and the unit they are printed in
+METRICS = {"wall_time": "s", "cpu_time": "s", "peak_rss": "MiB", "log_bytes": "KiB"}
+UNITS = {"s": 1, "MiB": 1 << 20, "KiB": 1 << 10}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+@dataclass
+class StepReport:
+    """Measurements of a single gradle task."""
+
+    task: str
+    started_at: str = field(default_factory=_now)
+    wall_time: float = 0.0
+    cpu_time: Optional[float] = None
+    peak_rss: Optional[int] = None
+    log_bytes: int = 0
+    exit_status: int = 0
+
+
+@dataclass
+class BuildReport:
+    """Measurements of every gradle task of a build, in completion order."""
+
+    mine: str
+    started_at: str = field(default_factory=_now)
+    steps: List[StepReport] = field(default_factory=list)
+
+    def __post_init__(self):
+        self._lock = threading.Lock()
+
+    def add(self, step: StepReport) -> None:
+        with self._lock:
+            self.steps.append(step)
+
+    def write(self, mine_dir: os.PathLike) -> Path:
+        """Write the report to the reports directory of a mine.
+
+        Args:
+            mine_dir: Mine directory.
+
+        Returns:
+            Path of the written report.
+        """
+        path = Path(mine_dir) / REPORTS_PATH / ("build-" + self.started_at.replace(":", "") + ".json")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            report = {"mine": self.mine, "started_at": self.started_at,
+                      "steps": [asdict(step) for step in self.steps]}
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        return path
+
+
+def step_log_path(mine_dir: os.PathLike, task: str) -> Path:
+    """Path of the log of a gradle task.
+
+    Args:
+        mine_dir: Mine directory.
+        task: Gradle task with its arguments.
+
+    Returns:
+        Gzipped log file path, named after the task.
+    """
+    name = "".join(c if c.isalnum() or c in "-_." else "_" for c in task)
+    return Path(mine_dir) / LOGS_PATH / (name + ".log.gz")
+
+
+class LogStream:
+    """Tees output to a rotating gzipped log, keeping only its last lines.
+
+    Output is handled as it arrives, so memory stays flat however verbose a
+    task is. Once a log file holds `max_bytes` of output, it is renamed with
+    a `.1` suffix, shifting older ones up to `backups`.
+    """
+
+    def __init__(self, path: Optional[Path] = None,
+                 on_line: Optional[Callable[[bytes], None]] = None,
+                 max_bytes: int = LOG_MAX_BYTES, backups: int = LOG_BACKUPS,
+                 tail_lines: int = TAIL_LINES):
+        """
+        Args:
+            path: Log file, None to only keep the tail.
+            on_line: Called with every complete line of output, e.g. to
+                report progress.
+            max_bytes: Uncompressed size of a log file before it is rotated.
+            backups: Rotated log files kept.
+            tail_lines: Lines of output kept in memory.
+        """
+        self.path = path
+        self.on_line = on_line
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.bytes_written = 0
+        self._lines = deque(maxlen=tail_lines)
+        self._partial = b""
+        self._file = None
+        self._file_bytes = 0
+        if path:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Fastest level, verbose logs compress well anyway
+            self._file = gzip.open(path, "wb", compresslevel=1)
+
+    def write(self, chunk: bytes) -> None:
+        self.bytes_written += len(chunk)
+        if self._file:
+            if self._file_bytes >= self.max_bytes:
+                self._rotate()
+            self._file.write(chunk)
+            self._file_bytes += len(chunk)
+
+        lines = (self._partial + chunk).split(b"\n")
+        self._partial = lines.pop()
+        # A line that never ends is cut rather than buffered
+        if len(self._partial) > 1 << 16:
+            lines.append(self._partial)
+            self._partial = b""
+        for line in lines:
+            self._lines.append(line)
+            if self.on_line:
+                self.on_line(line + b"\n")
+
+    def write_all(self, chunks: Iterable[bytes]) -> "LogStream":
+        for chunk in chunks:
+            self.write(chunk)
+        return self
+
+    def _rotated(self, index: int) -> Path:
+        # build.log.gz to build.log.1.gz
+        base, _, suffix = self.path.name.rpartition(".")
+        return self.path.with_name(base + "." + str(index) + "." + suffix)
+
+    def _rotate(self) -> None:
+        self._file.close()
+        for index in range(self.backups, 0, -1):
+            source = self._rotated(index - 1) if index > 1 else self.path
+            if source.exists():
+                os.replace(source, self._rotated(index))
+        self._file = gzip.open(self.path, "wb", compresslevel=1)
+        self._file_bytes = 0
+
+    def tail(self) -> bytes:
+        """Last lines of the output, ending with an unfinished line if any."""
+        return b"\n".join(list(self._lines) + [self._partial])
+
+    def close(self) -> None:
+        if self._partial and self.on_line:
+            self.on_line(self._partial)
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "LogStream":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def run_measured(command: List[str], cwd: os.PathLike, log_path: Path,
+                 step: StepReport) -> subprocess.CompletedProcess:
+    """Run a process, tee its output to a log stream and measure its resources.
+
+    CPU time and peak RSS come from the rusage of this very process, which
+    includes the descendants it waited for, so concurrent steps are measured
+    independently.
+
+    Args:
+        command: Command to run.
+        cwd: Working directory.
+        log_path: Gzipped log the output is written to, see `LogStream`.
+        step: Report of the step, filled in.
+
+    Returns:
+        Completed process, without captured output.
+
+    Raises:
+        CalledProcessError: The process exited with a non-zero status.
+    """
+    start = time.monotonic()
+    with LogStream(log_path) as log:
+        proc = subprocess.Popen(command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        for chunk in iter(lambda: proc.stdout.read1(1 << 16), b""):
+            sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            log.write(chunk)
+        proc.stdout.close()
+        _, status, rusage = os.wait4(proc.pid, 0)
+    step.log_bytes = log.bytes_written
+
+    # Popen can't reap the process anymore, so decode the status here
+    proc.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+    step.wall_time = time.monotonic() - start
+    step.cpu_time = rusage.ru_utime + rusage.ru_stime
+    # Kilobytes on Linux
+    step.peak_rss = rusage.ru_maxrss * 1024
+    step.exit_status = proc.returncode
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, command)
+    return subprocess.CompletedProcess(command, proc.returncode)
+
+
+class ContainerStats:
+    """Peak memory and CPU time of a container while sampled from docker stats.
+
+    With `relative`, CPU time is the usage since the first sample, so a
+    long-lived container can be measured for the duration of a single exec.
+    Memory is always the peak of the whole container.
+    """
+
+    def __init__(self, container, relative: bool = False):
+        self.container = container
+        self.peak_rss: Optional[int] = None
+        self.cpu_time: Optional[float] = None
+        self._cpu_start: Optional[int] = None if relative else 0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def start(self) -> "ContainerStats":
+        self._thread.start()
+        return self
+
+    def _sample(self) -> None:
+        try:
+            for stats in self.container.stats(stream=True, decode=True):
+                memory = stats.get("memory_stats") or {}
+                usage = memory.get("max_usage") or memory.get("usage")
+                if usage:
+                    self.peak_rss = max(self.peak_rss or 0, usage)
+                total = ((stats.get("cpu_stats") or {}).get("cpu_usage") or {}).get("total_usage")
+                if total:
+                    if self._cpu_start is None:
+                        self._cpu_start = total
+                    # Nanoseconds
+                    self.cpu_time = (total - self._cpu_start) / 1e9
+                if self._stopped.is_set():
+                    return
+        except Exception:
+            # The stream ends with an error once the container is removed
+            pass
+
+    def stop(self, timeout: float = 5.0) -> None:
+        # Samples arrive every second, the next one ends the stream
+        self._stopped.set()
+        self._thread.join(timeout)
+
+
+def load_report(path: os.PathLike) -> dict:
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def latest_reports(mine_dir: os.PathLike, count: int = 2) -> List[Path]:
+    """Find the latest reports of a mine.
+
+    Args:
+        mine_dir: Mine directory.
+        count: Number of reports.
+
+    Returns:
+        Report paths, oldest first.
+    """
+    return sorted((Path(mine_dir) / REPORTS_PATH).glob("build-*.json"))[-count:]
+
+
+def _keyed_steps(report: dict) -> Dict[Tuple[str, int], dict]:
+    # Tasks like clean may run more than once, match them by occurrence
+    seen: Dict[str, int] = {}
+    steps = {}
+    for step in report["steps"]:
+        occurrence = seen.get(step["task"], 0)
+        seen[step["task"]] = occurrence + 1
+        steps[(step["task"], occurrence)] = step
+    return steps
+
+
+def compare_reports(baseline: dict, current: dict, threshold: float = 0.1) -> List[dict]:
+    """Compare the steps of two builds.
+
+    Args:
+        baseline: Earlier build report.
+        current: Later build report.
+        threshold: Relative increase of a metric flagged as a regression.
+
+    Returns:
+        One row per step with the metrics of both builds, the relative
+        changes and the regressed metrics, in the order of the current build.
+    """
+    old_steps = _keyed_steps(baseline)
+    new_steps = _keyed_steps(current)
+    keys = list(new_steps) + [key for key in old_steps if key not in new_steps]
+
+    rows = []
+    for key in keys:
+        old = old_steps.get(key, {})
+        new = new_steps.get(key, {})
+        row = {"task": key[0], "baseline": {}, "current": {}, "change": {}, "regressions": []}
+        for metric in METRICS:
+            before, after = old.get(metric), new.get(metric)
+            row["baseline"][metric] = before
+            row["current"][metric] = after
+            if before and after is not None:
+                change = (after - before) / before
+                row["change"][metric] = change
+                if change > threshold:
+                    row["regressions"].append(metric)
+        rows.append(row)
+    return rows
+
+
+def format_comparison(rows: List[dict]) -> str:
+    """Format compared steps as a table.
+
+    Args:
+        rows: Rows from `compare_reports`.
+
+    Returns:
+        Table, regressed metrics marked with `!`.
+    """
+    def cell(row, metric):
+        unit = METRICS[metric]
+        before, after = row["baseline"][metric], row["current"][metric]
+        fmt = lambda value: "-" if value is None else f"{value / UNITS[unit]:.1f}"  # noqa: E731
+        text = f"{fmt(before)} -> {fmt(after)}"
+        if metric in row["change"]:
+            text += f" ({row['change'][metric]:+.0%})"
+        return text + ("!" if metric in row["regressions"] else "")
+
+    header = ["task"] + [f"{metric} [{unit}]" for metric, unit in METRICS.items()]
+    table = [header] + [[row["task"]] + [cell(row, metric) for metric in METRICS] for row in rows]
+    widths = [max(len(line[i]) for line in table) for i in range(len(header))]
+    return "\n".join("  ".join(value.ljust(width) for value, width in zip(line, widths)).rstrip()
+                     for line in table)
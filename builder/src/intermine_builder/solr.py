@@ -0,0 +1,108 @@
+"""
+Back up and restore the Solr cores of a mine with the Solr replication
+handler. Backups are written by the Solr server, to the data directory of
+each core.
+"""
+
+import json
+import time
+from typing import Callable, Union
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+# Cores set up by `write_solr_host`
+SOLR_CORES = ("mine-search", "mine-autocomplete")
+
+
+def _replication(solr_host: str, core: str, **params) -> dict:
+    # Named lists as objects, they default to flat [name, value, ...] arrays
+    url = ("http://" + solr_host + ":8983/solr/" + core + "/replication?"
+           + urlencode({**params, "wt": "json", "json.nl": "map"}))
+    with urlopen(url, timeout=60) as res:
+        try:
+            response = json.load(res)
+        except ValueError as e:
+            raise RuntimeError("Unexpected Solr replication response") from e
+    if not isinstance(response, dict):
+        raise RuntimeError("Unexpected Solr replication response")
+    return response
+
+
+def _section(response: dict, name: str) -> dict:
+    """Get a named list of a response, in either of its JSON shapes.
+
+    Args:
+        response: Response, or named list, of the replication handler.
+        name: Name of the section.
+
+    Returns:
+        Section as a dict, empty if it is missing or of an unknown shape.
+    """
+    section: Union[dict, list, None] = response.get(name)
+    if isinstance(section, list) and len(section) % 2 == 0:
+        section = dict(zip(section[::2], section[1::2]))
+    return section if isinstance(section, dict) else {}
+
+
+def _wait(check: Callable[[], str], timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        status = check()
+        if status == "success":
+            return
+        if status == "failed":
+            raise RuntimeError("Solr replication command failed")
+        if time.monotonic() > deadline:
+            raise TimeoutError("Solr replication command timed out")
+        time.sleep(1)
+
+
+def backup_cores(solr_host: str, name: str, timeout: float = 3600) -> None:
+    """Back up every core of the mine under a name, replacing an existing backup.
+
+    Args:
+        solr_host: Host of the Solr server.
+        name: Name of the backup.
+        timeout: Seconds to wait for each core.
+    """
+    for core in SOLR_CORES:
+        drop_backup(solr_host, core, name)
+        _replication(solr_host, core, command="backup", name=name)
+
+        def backup_status():
+            backup = _section(_section(_replication(solr_host, core, command="details"), "details"),
+                              "backup")
+            if backup.get("snapshotName") != name:
+                return "In Progress"
+            return backup.get("status", "In Progress")
+
+        _wait(backup_status, timeout)
+
+
+def restore_cores(solr_host: str, name: str, timeout: float = 3600) -> None:
+    """Restore every core of the mine from a named backup.
+
+    Args:
+        solr_host: Host of the Solr server.
+        name: Name of the backup.
+        timeout: Seconds to wait for each core.
+    """
+    for core in SOLR_CORES:
+        _replication(solr_host, core, command="restore", name=name)
+        _wait(lambda: _section(_replication(solr_host, core, command="restorestatus"),
+                               "restorestatus").get("status", "In Progress"), timeout)
+
+
+def drop_backup(solr_host: str, core: str, name: str) -> None:
+    """Delete a named backup of a core, if it exists.
+
+    Args:
+        solr_host: Host of the Solr server.
+        core: Name of the core.
+        name: Name of the backup.
+    """
+    try:
+        _replication(solr_host, core, command="deletebackup", name=name)
+    except OSError:
+        # Solr answers 500 when there is no such backup
+        pass
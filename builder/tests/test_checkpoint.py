@@ -0,0 +1,81 @@
+"""Checkpointer tests."""
+
+import pytest
+
+from intermine_builder import checkpoint as checkpoint_module
+from intermine_builder.checkpoint import Checkpointer
+
+PROPERTIES = {'db.production.datasource.databaseName': 'biotestmine'}
+
+
+@pytest.fixture()
+def calls(monkeypatch):
+    calls = []
+
+    def record(name):
+        def call(*args):
+            calls.append((name,) + args[1:])
+        return call
+
+    postgres = checkpoint_module.postgres
+    for name in ('snapshot_database', 'restore_database', 'drop_database',
+                 'dump_database', 'restore_dump'):
+        monkeypatch.setattr(postgres, name, record(name))
+    monkeypatch.setattr(postgres, 'production_database', lambda properties: 'biotestmine')
+    solr = checkpoint_module.solr
+    monkeypatch.setattr(solr, 'backup_cores', lambda *args: calls.append(('backup_cores',) + args))
+    monkeypatch.setattr(solr, 'restore_cores', lambda *args: calls.append(('restore_cores',) + args))
+    monkeypatch.setattr(solr, 'drop_backup', lambda *args: calls.append(('drop_backup',) + args))
+    return calls
+
+
+def test_template_checkpoint(calls, tmp_path):
+    checkpointer = Checkpointer(PROPERTIES, tmp_path, solr_host='solr')
+    taken = checkpointer.take('checkpoint_3')
+    assert taken == {'method': 'template', 'snapshot': 'biotestmine_checkpoint_3', 'solr': None}
+
+    checkpointer.restore(taken)
+    checkpointer.drop(taken)
+    assert calls == [('snapshot_database', 'biotestmine_checkpoint_3'),
+                     ('restore_database', 'biotestmine_checkpoint_3'),
+                     ('drop_database', 'biotestmine_checkpoint_3')]
+
+
+def test_dump_checkpoint_with_solr(calls, tmp_path):
+    checkpointer = Checkpointer(PROPERTIES, tmp_path, method='dump', jobs=2, solr_host='solr')
+    taken = checkpointer.take('checkpoint_5', with_solr=True)
+    dump = str(tmp_path / '.builder' / 'checkpoints' / 'checkpoint_5')
+    assert taken == {'method': 'dump', 'snapshot': dump, 'solr': 'checkpoint_5'}
+
+    checkpointer.restore(taken)
+    (tmp_path / '.builder' / 'checkpoints' / 'checkpoint_5').mkdir(parents=True)
+    checkpointer.drop(taken)
+    assert calls == [('dump_database', dump, 2),
+                     ('backup_cores', 'solr', 'checkpoint_5'),
+                     ('restore_dump', dump, 2),
+                     ('restore_cores', 'solr', 'checkpoint_5'),
+                     ('drop_backup', 'solr', 'mine-search', 'checkpoint_5'),
+                     ('drop_backup', 'solr', 'mine-autocomplete', 'checkpoint_5')]
+    assert not (tmp_path / '.builder' / 'checkpoints' / 'checkpoint_5').exists()
+
+
+def test_failed_solr_backup_drops_snapshot(calls, monkeypatch, tmp_path):
+    def fail(*args):
+        raise TimeoutError('Solr replication command timed out')
+    monkeypatch.setattr(checkpoint_module.solr, 'backup_cores', fail)
+
+    checkpointer = Checkpointer(PROPERTIES, tmp_path, solr_host='solr')
+    with pytest.raises(TimeoutError):
+        checkpointer.take('checkpoint_5', with_solr=True)
+    assert calls == [('snapshot_database', 'biotestmine_checkpoint_5'),
+                     ('drop_database', 'biotestmine_checkpoint_5')]
+
+
+def test_legacy_checkpoint_is_a_template(calls, tmp_path):
+    Checkpointer(PROPERTIES, tmp_path).restore({'snapshot': 'biotestmine_checkpoint_1'})
+    assert calls == [('restore_database', 'biotestmine_checkpoint_1')]
+
+
+def test_unknown_method(tmp_path):
+    with pytest.raises(ValueError):
+        Checkpointer(PROPERTIES, tmp_path, method='rsync')
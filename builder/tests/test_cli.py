@@ -0,0 +1,89 @@
+"""builder_job tests."""
+
+from pathlib import Path
+import subprocess
+
+from click.testing import CliRunner
+import pytest
+
+from intermine_builder import cli
+
+
+class FakeBuilder:
+    """Fails to clean the mine with the given error."""
+
+    def __init__(self, error):
+        self.error = error
+        self.calls = []
+
+    def clean(self, **options):
+        raise self.error
+
+    def close(self):
+        self.calls.append('close')
+
+    def write_report(self):
+        self.calls.append('write_report')
+        return 'report.json'
+
+
+@pytest.mark.parametrize('error', [subprocess.CalledProcessError(1, 'gradlew'),
+                                   RuntimeError('gradle daemon vanished')])
+def test_job_reports_failed_builds(monkeypatch, tmp_path, error):
+    builder = FakeBuilder(error)
+    monkeypatch.setattr(cli, 'MineBuilder', lambda *args, **kwargs: builder)
+    monkeypatch.setattr(cli, '_prepare', lambda **options: {})
+
+    result = CliRunner().invoke(cli.job, ['--mine-path', str(tmp_path)])
+    assert builder.calls == ['close', 'write_report']
+    assert 'Build report written to report.json' in result.output
+    if isinstance(error, RuntimeError):
+        assert result.exception is error
+    else:
+        assert result.exit_code == 0
+
+
+PROJECT_XML = """<project type="bio">
+  <sources>
+    <source name="uniprot" type="uniprot"/>
+    <source name="go" type="go"/>
+    <source name="pubmed" type="pubmed"/>
+  </sources>
+  <post-processing/>
+</project>
+"""
+
+
+class FakeMineBuilder:
+    """Records the sources it integrates."""
+
+    def __init__(self, mine, **options):
+        self.options = options
+        self.mine_path = Path(options['data_path']) / 'mine'
+        self.integrated = []
+        self.closed = False
+
+    def integrate(self, source, action=None, **options):
+        assert not self.closed
+        self.integrated.append(source)
+
+    def close(self):
+        self.closed = True
+
+
+def test_integrate_several_sources_in_warm_containers(monkeypatch, tmp_path):
+    (tmp_path / 'mine' / 'kittenmine').mkdir(parents=True)
+    (tmp_path / 'mine' / 'kittenmine' / 'project.xml').write_text(PROJECT_XML)
+    builders = []
+    monkeypatch.setattr(cli, 'MineBuilder',
+                        lambda *args, **kwargs: builders.append(FakeMineBuilder(*args, **kwargs)) or builders[-1])
+
+    result = CliRunner().invoke(cli.main, ['kittenmine', 'integrate', '--data-path', str(tmp_path),
+                                           '--source', 'pubmed', '--source', 'uniprot', '--jobs', '2', '--warm'])
+    assert result.exit_code == 0, result.output
+    [builder] = builders
+    assert builder.options['warm'] is True
+    assert builder.options['pool_size'] == 2
+    # Without a dependency map every source waits for the earlier ones
+    assert builder.integrated == ['uniprot', 'pubmed']
+    assert builder.closed
@@ -0,0 +1,77 @@
+"""MineBuilder gradle command tests."""
+
+from types import SimpleNamespace
+
+import pytest
+
+import intermine_builder
+from intermine_builder import GRADLE_BUILD_CACHE_BIND, MineBuilder
+
+
+class FakeDockerClient:
+    """Has the builder image, running postgres and solr and the network."""
+
+    def __init__(self):
+        running = SimpleNamespace(status='running')
+        self.images = SimpleNamespace(get=lambda name: 'intermine/builder')
+        self.containers = SimpleNamespace(get=lambda name: running)
+        self.networks = SimpleNamespace(get=lambda name: None)
+
+
+@pytest.fixture()
+def commands(monkeypatch):
+    commands = []
+
+    def run(self, command, step=None, **kwargs):
+        commands.append(command)
+
+    monkeypatch.setattr(MineBuilder, '_MineBuilder__run', run)
+    monkeypatch.setattr(intermine_builder.docker, 'from_env', FakeDockerClient, raising=False)
+    return commands
+
+
+def init_script(mine_dir):
+    return (mine_dir / '.builder' / 'build-cache.init.gradle').read_text()
+
+
+def test_containerless_warm_build_with_cache(commands, tmp_path):
+    cache = tmp_path / 'gradle-cache'
+    builder = MineBuilder('biotestmine', mine_path=tmp_path, containerless=True, warm=True,
+                          build_cache_dir=cache)
+    builder.integrate('uniprot', stacktrace=True)
+
+    mine_dir = (tmp_path / 'biotestmine').resolve()
+    assert commands == [['./gradlew', 'integrate', '-Psource=uniprot', '--stacktrace', '--daemon',
+                         '--build-cache', '--init-script', str(mine_dir / '.builder' / 'build-cache.init.gradle')]]
+    assert f"directory = new File('{cache.resolve()}')" in init_script(mine_dir)
+    assert cache.is_dir()
+
+
+def test_container_build_with_cache(commands, tmp_path):
+    cache = tmp_path / 'gradle-cache'
+    builder = MineBuilder('biotestmine', mine_path=tmp_path, build_cache_dir=cache)
+    builder.post_process('do-sources')
+
+    assert commands == [['./gradlew', 'postProcess', '-Pprocess=do-sources', '--build-cache', '--init-script',
+                         '/home/intermine/intermine/biotestmine/.builder/build-cache.init.gradle']]
+    # Paths inside the container, where the cache is mounted
+    assert f"directory = new File('{GRADLE_BUILD_CACHE_BIND}')" in init_script(tmp_path / 'biotestmine')
+    assert builder.volumes[cache.resolve()] == {'bind': GRADLE_BUILD_CACHE_BIND, 'mode': 'rw'}
+
+
+def test_cold_build_without_cache(commands, tmp_path):
+    builder = MineBuilder('biotestmine', mine_path=tmp_path, containerless=True)
+    builder.build_db()
+
+    assert commands == [['./gradlew', 'buildDB']]
+    assert not (tmp_path / 'biotestmine' / '.builder').exists()
+
+
+@pytest.mark.parametrize('warm', [True, False])
+def test_close_stops_the_gradle_daemon(monkeypatch, tmp_path, warm):
+    runs = []
+    monkeypatch.setattr(intermine_builder.subprocess, 'run', lambda command, **kwargs: runs.append((command, kwargs)))
+
+    MineBuilder('biotestmine', mine_path=tmp_path, containerless=True, warm=warm).close()
+    expected = [(['./gradlew', '--stop'], {'cwd': tmp_path / 'biotestmine', 'check': False})]
+    assert runs == (expected if warm else [])
@@ -0,0 +1,94 @@
+"""Build plan tests."""
+
+import threading
+import time
+
+import pytest
+
+from intermine_builder.plan import restrict_plan, run_sources, source_dependencies
+
+
+def test_restrict_plan_keeps_transitive_dependencies():
+    plan = {'sources': ['uniprot', 'go', 'kegg', 'pubmed'],
+            'source_dependencies': {'uniprot': [], 'go': ['uniprot'], 'kegg': ['go'], 'pubmed': []},
+            'post_processing': ['do-sequences']}
+
+    assert restrict_plan(plan, ['kegg', 'uniprot', 'pubmed', 'flybase']) == {
+        'sources': ['kegg', 'uniprot', 'pubmed', 'flybase'],
+        'source_dependencies': {'kegg': ['uniprot'], 'uniprot': [], 'pubmed': [], 'flybase': []},
+        'post_processing': [],
+    }
+
+
+PROJECT = {
+    'sources': ['uniprot', 'go', 'malaria-gff', 'pubmed'],
+    'source-types': {'uniprot': 'uniprot', 'go': 'go', 'malaria-gff': 'malaria-gff', 'pubmed': 'pubmed'},
+}
+
+
+def test_sources_without_declarations_run_serially():
+    assert source_dependencies(PROJECT, {}) == {
+        'uniprot': [], 'go': ['uniprot'], 'malaria-gff': ['go'], 'pubmed': ['malaria-gff'],
+    }
+
+
+def test_sources_writing_other_classes_run_concurrently():
+    declared = {
+        'uniprot': {'writes': ['Protein', 'Gene']},
+        'go': {'writes': ['GOTerm']},
+        'malaria-gff': {'writes': ['Gene'], 'after': ['go']},
+        'pubmed': {'writes': ['Publication']},
+    }
+    assert source_dependencies(PROJECT, declared) == {
+        'uniprot': [], 'go': [], 'malaria-gff': ['uniprot', 'go'], 'pubmed': [],
+    }
+
+
+def test_after_a_later_source_is_rejected():
+    with pytest.raises(ValueError):
+        source_dependencies(PROJECT, {'go': {'writes': [], 'after': ['pubmed']}})
+
+
+def test_run_sources_follows_dependencies():
+    plan = {'sources': ['uniprot', 'go', 'kegg'],
+            'source_dependencies': {'uniprot': [], 'go': [], 'kegg': ['uniprot', 'go']}}
+    lock = threading.Lock()
+    running = set()
+    started = []
+    checkpoints = []
+
+    def integrate(source):
+        with lock:
+            assert all(dep not in running for dep in plan['source_dependencies'][source])
+            running.add(source)
+            started.append(source)
+        time.sleep(0.05)
+        with lock:
+            running.discard(source)
+
+    run_sources(plan, integrate, jobs=2, done=['uniprot'], checkpoint=checkpoints.append)
+    assert started == ['go', 'kegg']
+    assert checkpoints == [['uniprot', 'go'], ['uniprot', 'go', 'kegg']]
+
+
+def test_run_sources_raises_the_first_error_once_others_finish():
+    plan = {'sources': ['uniprot', 'go', 'kegg'],
+            'source_dependencies': {'uniprot': [], 'go': [], 'kegg': ['go']}}
+    finished = []
+
+    def integrate(source):
+        if source == 'uniprot':
+            raise RuntimeError('uniprot failed')
+        time.sleep(0.05)
+        finished.append(source)
+
+    with pytest.raises(RuntimeError, match='uniprot failed'):
+        run_sources(plan, integrate, jobs=2)
+    # go was running and got to finish, kegg never started
+    assert finished == ['go']
+
+
+def test_run_sources_rejects_unsatisfiable_dependencies():
+    plan = {'sources': ['go'], 'source_dependencies': {'go': ['uniprot']}}
+    with pytest.raises(ValueError):
+        run_sources(plan, lambda source: None)
@@ -0,0 +1,81 @@
+"""Container pool tests."""
+
+import threading
+
+import pytest
+
+from intermine_builder.pool import ContainerPool
+
+
+class FakeContainer:
+
+    def __init__(self, name):
+        self.name = name
+        self.removed = False
+
+    def remove(self, force=False):
+        self.removed = True
+
+
+def test_containers_are_reused():
+    started = []
+    pool = ContainerPool(lambda name: started.append(FakeContainer(name)) or started[-1], 'builder', 2)
+
+    with pool.container() as first:
+        pass
+    with pool.container() as second:
+        assert second is first
+    assert [c.name for c in started] == ['builder-1']
+
+
+def test_at_most_size_containers_run():
+    started = []
+    pool = ContainerPool(lambda name: started.append(FakeContainer(name)) or started[-1], 'builder', 2)
+    checked_out = []
+
+    def task():
+        with pool.container() as container:
+            checked_out.append(container)
+
+    with pool.container() as first, pool.container() as second:
+        assert first is not second
+        waiting = threading.Thread(target=task)
+        waiting.start()
+        # The third task waits for a container rather than starting one
+        waiting.join(timeout=0.2)
+        assert waiting.is_alive()
+    waiting.join(timeout=5)
+    assert len(started) == 2
+    assert checked_out[0] in started
+
+
+def test_failed_start_frees_the_slot():
+    attempts = []
+
+    def start(name):
+        attempts.append(name)
+        if len(attempts) == 1:
+            raise RuntimeError('no such image')
+        return FakeContainer(name)
+
+    pool = ContainerPool(start, 'builder', 1)
+    with pytest.raises(RuntimeError):
+        with pool.container():
+            pass
+    with pool.container() as container:
+        assert container.name == 'builder-2'
+
+
+def test_close_removes_idle_and_busy_containers():
+    pool = ContainerPool(FakeContainer, 'builder', 2)
+    with pool.container() as busy:
+        with pool.container() as idle:
+            pass
+        pool.close()
+        assert idle.removed
+        assert not busy.removed
+    assert busy.removed
+
+    with pytest.raises(RuntimeError):
+        with pool.container():
+            pass
@@ -0,0 +1,69 @@
+"""Production database settings tests."""
+
+import re
+
+import pytest
+
+from intermine_builder import postgres
+from intermine_builder.postgres import database_settings, set_database_settings, tuned_database
+
+PROPERTIES = {'db.production.datasource.databaseName': "kitten'mine"}
+ALTER = re.compile(r'ALTER DATABASE "kitten\'mine" (SET|RESET) (\w+)(?: = \'(.*)\')?$')
+
+
+@pytest.fixture()
+def server(monkeypatch):
+    server = {'settings': {}, 'queries': [], 'statements': []}
+
+    def query(properties, query):
+        server['queries'].append(query)
+        return [name + '=' + value for name, value in server['settings'].items()]
+
+    def psql(properties, statements):
+        for statement in statements:
+            server['statements'].append(statement)
+            action, name, value = ALTER.match(statement).groups()
+            if action == 'RESET':
+                server['settings'].pop(name, None)
+            else:
+                server['settings'][name] = value.replace("''", "'")
+
+    monkeypatch.setattr(postgres, '_query', query)
+    monkeypatch.setattr(postgres, '_psql', psql)
+    return server
+
+
+def test_database_settings_are_read_from_the_production_database(server):
+    server['settings'] = {'work_mem': '16MB', 'search_path': 'public'}
+    assert database_settings(PROPERTIES) == {'work_mem': '16MB', 'search_path': 'public'}
+    assert "WHERE datname = 'kitten''mine'" in server['queries'][0]
+
+
+def test_set_database_settings(server):
+    set_database_settings(PROPERTIES, {'work_mem': "64'MB", 'synchronous_commit': None})
+    assert server['statements'] == ['ALTER DATABASE "kitten\'mine" SET work_mem = \'64\'\'MB\'',
+                                    'ALTER DATABASE "kitten\'mine" RESET synchronous_commit']
+
+
+def test_tuned_database_restores_prior_settings(server):
+    server['settings'] = {'work_mem': '16MB', 'search_path': 'public'}
+    with tuned_database(PROPERTIES, {'work_mem': '64MB', 'synchronous_commit': 'off'}):
+        assert server['settings'] == {'work_mem': '64MB', 'search_path': 'public',
+                                      'synchronous_commit': 'off'}
+    assert server['settings'] == {'work_mem': '16MB', 'search_path': 'public'}
+    # Settings unset before the build are reset rather than set to a server default
+    assert server['statements'][-1] == 'ALTER DATABASE "kitten\'mine" RESET synchronous_commit'
+
+
+def test_tuned_database_restores_on_error(server):
+    server['settings'] = {'work_mem': '16MB'}
+    with pytest.raises(RuntimeError):
+        with tuned_database(PROPERTIES, {'work_mem': '64MB', 'maintenance_work_mem': '1GB'}):
+            raise RuntimeError('integrate failed')
+    assert server['settings'] == {'work_mem': '16MB'}
+
+
+def test_tuned_database_without_settings_touches_nothing(server):
+    with tuned_database(PROPERTIES, {}):
+        pass
+    assert server['queries'] == [] and server['statements'] == []
@@ -0,0 +1,46 @@
+"""project.xml tests."""
+
+import pytest
+
+from intermine_builder.project_xml import append_sources, parse_project_xml
+
+PROJECT_XML = """<project type="bio">
+  <sources>
+    <source name="uniprot" type="uniprot">
+      <property name="uniprot.organisms" value="7227"/>
+    </source>
+    <source name="go" type="go"/>
+  </sources>
+  <post-processing>
+    <post-process name="do-sequences"/>
+  </post-processing>
+</project>
+"""
+
+
+def test_sources_are_appended_or_replaced_in_place(tmp_path):
+    path = tmp_path / 'project.xml'
+    path.write_text(PROJECT_XML)
+    sources = [
+        {'name': 'pubmed', 'type': 'pubmed', 'properties': []},
+        {'name': 'uniprot', 'type': 'uniprot', 'properties': [{'name': 'uniprot.organisms', 'value': '9606'}]},
+    ]
+
+    append_sources(path, sources)
+    project = parse_project_xml(path)
+    assert project['sources'] == ['uniprot', 'go', 'pubmed']
+    assert project['source-properties']['uniprot'] == [{'name': 'uniprot.organisms', 'value': '9606'}]
+    assert project['post-processing'] == ['do-sequences']
+
+    # Applying the same sources again changes nothing
+    written = path.read_text()
+    append_sources(path, sources)
+    assert path.read_text() == written
+
+
+def test_project_without_sources_is_rejected(tmp_path):
+    path = tmp_path / 'project.xml'
+    path.write_text('<project type="bio"/>')
+    with pytest.raises(RuntimeError):
+        append_sources(path, [{'name': 'go', 'type': 'go', 'properties': []}])
+    assert path.read_text() == '<project type="bio"/>'
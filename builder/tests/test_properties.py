@@ -0,0 +1,47 @@
+"""Mine properties tests."""
+
+import pytest
+
+from intermine_builder.properties import apply_property_overrides, create_properties, PROFILES
+
+
+def test_overrides_replace_in_place_and_append(tmp_path):
+    path = tmp_path / 'biotestmine.properties'
+    path.write_text('# Database\n'
+                    'db.production.datasource.serverName=localhost\n'
+                    '! webapp\n'
+                    'webapp.path : biotestmine\n')
+
+    apply_property_overrides(path, {'webapp.path': 'kittenmine', 'project.title': 'KittenMine',
+                                     'db.production.datasource.serverName': 'postgres'})
+    assert path.read_text() == ('# Database\n'
+                                'db.production.datasource.serverName=postgres\n'
+                                '! webapp\n'
+                                'webapp.path=kittenmine\n'
+                                'project.title=KittenMine\n')
+
+
+def test_overrides_skip_comments_and_missing_properties(tmp_path):
+    path = tmp_path / 'keyword_search.properties'
+    path.write_text('#index.solrurl=http://localhost\nindex.solrurl=http://localhost:8983/solr/mine-search\n')
+
+    apply_property_overrides(path, {'index.solrurl': 'http://solr:8983/solr/mine-search',
+                                    'index.batch.size': '1000'}, append=False)
+    assert path.read_text() == '#index.solrurl=http://localhost\nindex.solrurl=http://solr:8983/solr/mine-search\n'
+    assert not (tmp_path / 'keyword_search.properties.tmp').exists()
+
+
+def test_profile_is_applied_before_overrides():
+    assert create_properties()['os.production.verboseQueryLog'] == 'true'
+
+    properties = create_properties(profile='build-performance',
+                                   overrides={'integration.production.datatrackerMaxSize': '5000'})
+    profile = PROFILES['build-performance']['properties']
+    assert properties['os.production.verboseQueryLog'] == profile['os.production.verboseQueryLog']
+    assert properties['integration.production.datatrackerCommitSize'] == '100000'
+    assert properties['integration.production.datatrackerMaxSize'] == '5000'
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError, match='Unknown build profile: fastest'):
+        create_properties(profile='fastest')
@@ -0,0 +1,104 @@
+"""Rebuild state tests."""
+
+import json
+
+from intermine_builder.rebuild import RebuildState
+
+
+def snapshot(name):
+    return {'method': 'template', 'snapshot': 'biotestmine_' + name, 'solr': None}
+
+
+def add(state, sources, post_processes=()):
+    name = 'checkpoint_' + str(len(sources) + len(post_processes))
+    state.add_checkpoint(sources, {source: source + '-v1' for source in sources},
+                         snapshot(name), post_processes)
+
+
+def test_prune_keeps_latest_integrate_checkpoints(tmp_path):
+    state = RebuildState(tmp_path)
+    for count in range(1, 5):
+        add(state, ['uniprot', 'go', 'kegg', 'pubmed'][:count])
+
+    dropped = state.prune(2)
+    assert dropped == [snapshot('checkpoint_1'), snapshot('checkpoint_2')]
+    assert [c['snapshot'] for c in state.checkpoints] == [snapshot('checkpoint_3'),
+                                                          snapshot('checkpoint_4')]
+    assert state.prune(2) == []
+
+
+def test_state_is_saved(tmp_path):
+    state = RebuildState(tmp_path)
+    state.base = 'base'
+    add(state, ['uniprot'])
+    state.save()
+
+    loaded = RebuildState(tmp_path)
+    assert loaded.base == 'base'
+    assert loaded.checkpoints == state.checkpoints
+
+
+def test_prune_keeps_latest_post_process_checkpoint(tmp_path):
+    state = RebuildState(tmp_path)
+    sources = ['uniprot', 'go']
+    add(state, sources[:1])
+    add(state, sources)
+    add(state, sources, ['do-sources'])
+    add(state, sources, ['do-sources', 'create-search-index'])
+
+    assert state.prune(5) == [snapshot('checkpoint_3')]
+    assert [c['snapshot'] for c in state.checkpoints] == [snapshot('checkpoint_1'),
+                                                          snapshot('checkpoint_2'),
+                                                          snapshot('checkpoint_4')]
+
+
+def test_usable_checkpoint_skips_changed_sources(tmp_path):
+    state = RebuildState(tmp_path)
+    state.base = 'base'
+    sources = ['uniprot', 'go', 'kegg']
+    for count in range(1, 4):
+        add(state, sources[:count])
+    add(state, sources, ['do-sources'])
+    fingerprints = {source: source + '-v1' for source in sources}
+
+    # Post-processed checkpoints can't be integrated into
+    assert state.usable_checkpoint('base', fingerprints) == 2
+    assert state.usable_checkpoint('base', {**fingerprints, 'go': 'go-v2'}) == 0
+    assert state.usable_checkpoint('base', {**fingerprints, 'uniprot': 'uniprot-v2'}) is None
+    assert state.usable_checkpoint('new-model', fingerprints) is None
+
+
+def test_resume_checkpoint_covers_steps_before(tmp_path):
+    state = RebuildState(tmp_path)
+    sources = ['uniprot', 'go']
+    add(state, sources[:1])
+    add(state, sources)
+    add(state, sources, ['do-sources'])
+    steps = ['integrate-uniprot', 'integrate-go', 'postprocess-do-sources',
+             'postprocess-create-search-index']
+
+    assert state.resume_checkpoint(steps[:3]) == 2
+    assert state.resume_checkpoint(steps[:2]) == 1
+    assert state.resume_checkpoint(steps[:1]) == 0
+    assert state.resume_checkpoint([]) is None
+
+
+def test_truncate_forgets_diverged_checkpoints(tmp_path):
+    state = RebuildState(tmp_path)
+    add(state, ['uniprot'])
+    add(state, ['uniprot', 'go'])
+    assert state.truncate(1) == [snapshot('checkpoint_2')]
+    assert len(state.checkpoints) == 1
+
+
+def test_legacy_checkpoints_are_upgraded(tmp_path):
+    path = tmp_path / '.builder' / 'rebuild.json'
+    path.parent.mkdir()
+    path.write_text(json.dumps({'base': 'base', 'checkpoints': [
+        {'sources': ['uniprot'], 'fingerprints': {'uniprot': 'v1'},
+         'snapshot': 'biotestmine_checkpoint_1'}]}))
+
+    checkpoint = RebuildState(tmp_path).checkpoints[0]
+    assert checkpoint['snapshot'] == {'method': 'template', 'snapshot': 'biotestmine_checkpoint_1',
+                                      'solr': None}
+    assert checkpoint['post_processes'] == []
@@ -0,0 +1,68 @@
+"""Build report tests."""
+
+import gzip
+
+from intermine_builder.report import LogStream, compare_reports
+
+
+def report(*steps):
+    return {'mine': 'biotestmine', 'started_at': '2026-10-18T00:00:00+00:00',
+            'steps': [{'task': task, 'wall_time': wall_time, 'cpu_time': None,
+                       'peak_rss': 1 << 30, 'log_bytes': 0} for task, wall_time in steps]}
+
+
+def test_regressions_are_flagged_above_the_threshold():
+    baseline = report(('clean', 10.0), ('integrate -Psource=uniprot', 100.0), ('clean', 10.0))
+    current = report(('clean', 10.0), ('integrate -Psource=uniprot', 105.0), ('clean', 20.0))
+
+    rows = compare_reports(baseline, current, threshold=0.1)
+    assert [row['task'] for row in rows] == ['clean', 'integrate -Psource=uniprot', 'clean']
+    assert [row['regressions'] for row in rows] == [[], [], ['wall_time']]
+    assert rows[1]['change']['wall_time'] == 0.05
+    assert rows[2]['change']['peak_rss'] == 0.0
+    # Missing metrics are compared as unknown, not as zero
+    assert 'cpu_time' not in rows[0]['change']
+    assert 'log_bytes' not in rows[0]['change']
+
+
+def test_steps_of_only_one_build_are_kept():
+    rows = compare_reports(report(('integrate -Psource=go', 5.0)),
+                           report(('integrate -Psource=kegg', 5.0)))
+    assert [(row['task'], row['baseline']['wall_time'], row['current']['wall_time']) for row in rows] == [
+        ('integrate -Psource=kegg', None, 5.0),
+        ('integrate -Psource=go', 5.0, None),
+    ]
+    assert all(row['regressions'] == [] for row in rows)
+
+
+def test_log_stream_rotates_and_keeps_the_tail(tmp_path):
+    path = tmp_path / 'logs' / 'integrate.log.gz'
+    lines = []
+    with LogStream(path, on_line=lines.append, max_bytes=10, backups=2, tail_lines=2) as log:
+        log.write_all([b'first\nsec', b'ond\n', b'third\n', b'fourth\n', b'fifth\nunfinished'])
+        assert log.tail() == b'fourth\nfifth\nunfinished'
+
+    assert lines == [b'first\n', b'second\n', b'third\n', b'fourth\n', b'fifth\n', b'unfinished']
+    assert log.bytes_written == len(b'first\nsecond\nthird\nfourth\nfifth\nunfinished')
+    # A file is rotated by the first write after it got full
+    assert sorted(p.name for p in path.parent.iterdir()) == [
+        'integrate.log.1.gz', 'integrate.log.2.gz', 'integrate.log.gz']
+    assert gzip.decompress(path.read_bytes()) == b'fifth\nunfinished'
+    assert gzip.decompress((path.parent / 'integrate.log.1.gz').read_bytes()) == b'third\nfourth\n'
+    assert gzip.decompress((path.parent / 'integrate.log.2.gz').read_bytes()) == b'first\nsecond\n'
+
+
+def test_log_stream_drops_the_oldest_rotated_file(tmp_path):
+    path = tmp_path / 'build.log.gz'
+    with LogStream(path, max_bytes=1, backups=2) as log:
+        log.write_all([b'1\n', b'2\n', b'3\n', b'4\n'])
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['build.log.1.gz', 'build.log.2.gz', 'build.log.gz']
+    assert gzip.decompress((tmp_path / 'build.log.2.gz').read_bytes()) == b'2\n'
+
+
+def test_log_stream_cuts_lines_that_never_end():
+    log = LogStream()
+    log.write(b'x' * ((1 << 16) + 1))
+    log.write(b'y\n')
+    assert log.tail() == b'x' * ((1 << 16) + 1) + b'\ny\n'
@@ -0,0 +1,66 @@
+"""Solr backup tests."""
+
+import io
+import json
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from intermine_builder import solr
+
+
+class FakeSolr:
+    """Answers replication commands with the given responses by command."""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.requests = []
+
+    def urlopen(self, url, timeout):
+        query = {k: v[0] for k, v in parse_qs(urlparse(url).query).items()}
+        self.requests.append(query)
+        response = self.responses.get(query['command'], {})
+        body = response if isinstance(response, bytes) else json.dumps(response).encode()
+        return io.BytesIO(body)
+
+
+@pytest.fixture()
+def fake_solr(monkeypatch):
+    def install(responses):
+        fake = FakeSolr(responses)
+        monkeypatch.setattr(solr, 'urlopen', fake.urlopen)
+        monkeypatch.setattr(solr.time, 'sleep', lambda seconds: None)
+        return fake
+    return install
+
+
+@pytest.mark.parametrize('backup', [
+    {'snapshotName': 'checkpoint_5', 'status': 'success'},
+    # Flat named list, as answered without json.nl=map
+    ['snapshotName', 'checkpoint_5', 'status', 'success'],
+])
+def test_backup_cores(fake_solr, backup):
+    fake = fake_solr({'details': {'details': {'backup': backup}}})
+    solr.backup_cores('solr', 'checkpoint_5')
+
+    commands = [request['command'] for request in fake.requests]
+    assert commands == ['deletebackup', 'backup', 'details'] * len(solr.SOLR_CORES)
+    assert all(request['json.nl'] == 'map' for request in fake.requests)
+
+
+def test_backup_of_unknown_shape_times_out(fake_solr):
+    fake_solr({'details': {'details': 'not a named list'}})
+    with pytest.raises(TimeoutError):
+        solr.backup_cores('solr', 'checkpoint_5', timeout=0)
+
+
+def test_failed_restore_raises(fake_solr):
+    fake_solr({'restorestatus': {'restorestatus': {'status': 'failed'}}})
+    with pytest.raises(RuntimeError):
+        solr.restore_cores('solr', 'checkpoint_5')
+
+
+def test_non_json_response_raises(fake_solr):
+    fake_solr({'details': b'<html>Bad gateway</html>'})
+    with pytest.raises(RuntimeError):
+        solr.backup_cores('solr', 'checkpoint_5')
@@ -1,6 +1,6 @@
 """Data BLoCs."""
 
-from typing import List
+from typing import Generator, List, Optional, Tuple
 
 from blackcap.db import DBSession
 from blackcap.flow import Flow, FlowExecError, FuncProp, get_outer_function, Prop, Step
@@ -9,8 +9,9 @@ from blackcap.schemas.user import User
 from logzero import logger
 from pydantic import ValidationError
 from pydantic.error_wrappers import ErrorWrapper
-from sqlalchemy import select
+from sqlalchemy import false, select
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql import Select
 
 
 from compose.blocs.file import (
@@ -25,6 +26,7 @@ from compose.schemas.api.data.post import DataCreate
 from compose.schemas.api.data.put import DataUpdate
 from compose.schemas.data import Data
 from compose.schemas.file import File
+from compose.utils.pagination import KeysetPage, paginate, stream_rows
 
 
 ###
@@ -64,21 +66,20 @@ def create_data(data_create_list: List[DataCreate], user_creds: User) -> List[Da
             raise e
 
 
-def get_data(query_params: DataGetQueryParams, user_creds: User) -> List[Data]:
-    """Query DB for Data.
+def _select_data(query_params: DataGetQueryParams, user_creds: User) -> Select:
+    """Build paginated select statement for Data.
 
     Args:
         query_params (DataGetQueryParams): Query params from request
         user_creds (User): User credentials.
 
     Raises:
-        Exception: database error
-        e : Missing parameter
+        e: Missing parameter
 
     Returns:
-        List[Data]: List of Data returned from DB
+        Select: select statement
     """
-    stmt = ""
+    stmt = select(DataDB).where(false())
 
     if query_params.query_type == DataQueryType.GET_ALL_DATA:
         stmt = select(DataDB).where(DataDB.protagonist_id == user_creds.user_id)
@@ -105,16 +106,69 @@ def get_data(query_params: DataGetQueryParams, user_creds: User) -> List[Data]:
             raise e
         stmt = select(DataDB).where(DataDB.id == user_creds.user_id)
 
+    return paginate(stmt, DataDB, query_params)
+
+
+def get_data(query_params: DataGetQueryParams, user_creds: User) -> List[Data]:
+    """Query DB for Data.
+
+    Args:
+        query_params (DataGetQueryParams): Query params from request
+        user_creds (User): User credentials.
+
+    Returns:
+        List[Data]: List of Data returned from DB
+    """
+    return get_data_page(query_params, user_creds)[0]
+
+
+def get_data_page(
+    query_params: DataGetQueryParams, user_creds: User
+) -> Tuple[List[Data], Optional[str]]:
+    """Query DB for one page of Data.
+
+    Args:
+        query_params (DataGetQueryParams): Query params from request
+        user_creds (User): User credentials.
+
+    Raises:
+        Exception: error
+
+    Returns:
+        Tuple[List[Data], Optional[str]]: Data and cursor of the next page
+    """
+    stmt = _select_data(query_params, user_creds)
+
     with DBSession() as session:
         try:
-            data_list: List[DataDB] = session.execute(stmt).scalars().all()
-            return [Data(data_id=obj.id, **obj.to_dict()) for obj in data_list]
+            page = KeysetPage(session.execute(stmt).scalars(), query_params.limit)
+            data_list = [Data(data_id=obj.id, **obj.to_dict()) for obj in page]
+            return data_list, page.next_cursor
         except Exception as e:
             session.rollback()
             logger.error(f"Unable to fetch data due to {e}")
             raise e
 
 
+def stream_data(
+    query_params: DataGetQueryParams, user_creds: User
+) -> Generator[Data, None, Optional[str]]:
+    """Stream Data from DB without loading the whole list.
+
+    Args:
+        query_params (DataGetQueryParams): Query params from request
+        user_creds (User): User credentials.
+
+    Returns:
+        Generator[Data, None, Optional[str]]: Data, returns next page cursor
+    """
+    return stream_rows(
+        _select_data(query_params, user_creds),
+        query_params,
+        lambda obj: Data(data_id=obj.id, **obj.to_dict()),
+    )
+
+
 def update_data(data_update_list: List[DataUpdate], user_creds: User) -> List[Data]:
     """Update Data in the DB from DataUpdate request.
 
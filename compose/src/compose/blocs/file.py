@@ -1,8 +1,8 @@
 """File BLoCs."""
 
 from ctypes import Union
-from datetime import timedelta
-from typing import List
+from datetime import datetime, timedelta
+from typing import BinaryIO, Dict, Generator, List, Optional, Sequence, Tuple
 
 from blackcap.db import DBSession
 from blackcap.flow import FlowExecError, get_outer_function, Prop
@@ -10,8 +10,9 @@ from blackcap.schemas.user import User
 from logzero import logger
 from minio import Minio
 from minio.deleteobjects import DeleteObject
-from sqlalchemy import select
+from sqlalchemy import false, select
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql import Select
 
 
 from compose.configs import config_registry
@@ -23,6 +24,9 @@ from compose.schemas.api.file.put import FileUpdate
 from compose.schemas.data import Data
 from compose.schemas.file import File
 from compose.schemas.template import RenderedTemplate, Template
+from compose.utils.multipart import MultipartUploads
+from compose.utils.pagination import KeysetPage, paginate, stream_rows
+from compose.utils.presign import PresignedURLCache
 
 
 config = config_registry.get_config()
@@ -34,25 +38,260 @@ minio_client = Minio(
     secret_key=config.MINIO_SECRET_KEY,
     secure=config.MINIO_SECURE,
 )
+multipart_uploads = MultipartUploads(minio_client)
 
+PRESIGNED_URL_EXPIRY = timedelta(days=7)
 
-def create_presigned_url(file: File, user_creds: User, method: str) -> str:
+# Signed urls are reused across requests until they get close to expiry
+presigned_url_cache = PresignedURLCache(
+    expires=PRESIGNED_URL_EXPIRY,
+    refresh_margin=timedelta(seconds=config.PRESIGNED_URL_REFRESH_MARGIN),
+    max_size=config.PRESIGNED_URL_CACHE_SIZE,
+)
+
+
+def _get_bucket_name(user_creds: User) -> str:
+    return f"protagonist-{user_creds.user_id}"
+
+
+def _get_object_name(file: File) -> str:
+    return f"{str(file.file_id)}.{file.ext}"
+
+
+def create_presigned_url(
+    file: File,
+    user_creds: User,
+    method: str,
+    request_date: Optional[datetime] = None,
+) -> str:
     """Create presigned post url for the file.
 
     Args:
         file (File): File object
         user_creds (User): User credentials.
         method (str): HTTP Method
+        request_date (Optional[datetime]): Signing date, defaults to now.
 
     Returns:
         str: Presigned url
     """
-    return minio_client.get_presigned_url(
-        method,
-        f"protagonist-{user_creds.user_id}",
-        f"{str(file.file_id)}.{file.ext}",
-        expires=timedelta(days=7),
-    )
+    bucket_name = _get_bucket_name(user_creds)
+    object_name = _get_object_name(file)
+    key = (bucket_name, object_name, method)
+    url = presigned_url_cache.get(key)
+    if url is None:
+        request_date = request_date or datetime.utcnow()
+        url = minio_client.get_presigned_url(
+            method,
+            bucket_name,
+            object_name,
+            expires=PRESIGNED_URL_EXPIRY,
+            request_date=request_date,
+        )
+        presigned_url_cache.put(key, url, request_date)
+    return url
+
+
+def create_presigned_urls(
+    file_list: List[File],
+    user_creds: User,
+    methods: Sequence[str] = ("GET", "PUT"),
+) -> List[File]:
+    """Sign urls for a list of files in one pass.
+
+    All urls missing from the cache are signed with the same request date,
+    so they share the credential scope and expire together.
+
+    Args:
+        file_list (List[File]): File objects
+        user_creds (User): User credentials.
+        methods (Sequence[str]): HTTP methods to sign
+
+    Returns:
+        List[File]: Same file objects with presigned urls set
+    """
+    request_date = datetime.utcnow()
+    for file in file_list:
+        for method in methods:
+            url = create_presigned_url(file, user_creds, method, request_date)
+            if method == "GET":
+                file.presigned_get = url
+            elif method == "PUT":
+                file.presigned_put = url
+    return file_list
+
+
+def get_file_etag(file: File, user_creds: User) -> str:
+    """Get etag of the object of the file.
+
+    Args:
+        file (File): File object
+        user_creds (User): User credentials.
+
+    Raises:
+        Exception: Object storage error
+
+    Returns:
+        str: Etag of the object
+    """
+    try:
+        return minio_client.stat_object(
+            _get_bucket_name(user_creds), _get_object_name(file)
+        ).etag
+    except Exception as e:
+        logger.error(f"Unable to stat file {file.file_id} due to {e}")
+        raise e
+
+
+def upload_file_stream(
+    file: File, user_creds: User, stream: BinaryIO, content_type: str
+) -> None:
+    """Upload a stream of unknown length to the object of the file.
+
+    The stream is sent as a multipart upload in MULTIPART_PART_SIZE parts,
+    so at most one part is held in memory.
+
+    Args:
+        file (File): File object
+        user_creds (User): User credentials.
+        stream (BinaryIO): Readable stream
+        content_type (str): Content type of the object
+
+    Raises:
+        Exception: Object storage error
+    """
+    try:
+        minio_client.put_object(
+            _get_bucket_name(user_creds),
+            _get_object_name(file),
+            stream,
+            length=-1,
+            content_type=content_type,
+            part_size=config.MULTIPART_PART_SIZE,
+        )
+    except Exception as e:
+        logger.error(f"Unable to upload file {file.file_id} due to {e}")
+        raise e
+
+
+def create_multipart_upload(file: File, user_creds: User) -> str:
+    """Start a multipart upload to the object of the file.
+
+    Args:
+        file (File): File object
+        user_creds (User): User credentials.
+
+    Raises:
+        Exception: Object storage error
+
+    Returns:
+        str: Upload id
+    """
+    try:
+        return multipart_uploads.create(
+            _get_bucket_name(user_creds), _get_object_name(file), "application/x-tar"
+        )
+    except Exception as e:
+        logger.error(f"Unable to start upload of file {file.file_id} due to {e}")
+        raise e
+
+
+def create_part_presigned_urls(
+    file: File, user_creds: User, upload_id: str, part_numbers: Sequence[int]
+) -> Dict[int, str]:
+    """Sign PUT urls for parts of a multipart upload.
+
+    Args:
+        file (File): File object
+        user_creds (User): User credentials.
+        upload_id (str): Upload id
+        part_numbers (Sequence[int]): Part numbers starting from 1
+
+    Returns:
+        Dict[int, str]: Presigned url of each part
+    """
+    request_date = datetime.utcnow()
+    return {
+        part_number: minio_client.get_presigned_url(
+            "PUT",
+            _get_bucket_name(user_creds),
+            _get_object_name(file),
+            expires=PRESIGNED_URL_EXPIRY,
+            request_date=request_date,
+            extra_query_params={
+                "partNumber": str(part_number),
+                "uploadId": upload_id,
+            },
+        )
+        for part_number in part_numbers
+    }
+
+
+def list_uploaded_parts(file: File, user_creds: User, upload_id: str) -> Dict[int, str]:
+    """List parts already stored for a multipart upload.
+
+    Args:
+        file (File): File object
+        user_creds (User): User credentials.
+        upload_id (str): Upload id
+
+    Raises:
+        Exception: Object storage error, NoSuchUploadError once the upload
+            was completed, aborted or expired
+
+    Returns:
+        Dict[int, str]: Etag of each uploaded part
+    """
+    try:
+        return multipart_uploads.list_parts(
+            _get_bucket_name(user_creds), _get_object_name(file), upload_id
+        )
+    except Exception as e:
+        logger.error(f"Unable to list parts of file {file.file_id} due to {e}")
+        raise e
+
+
+def complete_multipart_upload(
+    file: File, user_creds: User, upload_id: str, parts: Dict[int, str]
+) -> None:
+    """Assemble uploaded parts into the object of the file.
+
+    Args:
+        file (File): File object
+        user_creds (User): User credentials.
+        upload_id (str): Upload id
+        parts (Dict[int, str]): Etag of each uploaded part
+
+    Raises:
+        Exception: Object storage error
+    """
+    try:
+        multipart_uploads.complete(
+            _get_bucket_name(user_creds), _get_object_name(file), upload_id, parts
+        )
+    except Exception as e:
+        logger.error(f"Unable to complete upload of file {file.file_id} due to {e}")
+        raise e
+
+
+def abort_multipart_upload(file: File, user_creds: User, upload_id: str) -> None:
+    """Abort a multipart upload of the file and drop its stored parts.
+
+    Args:
+        file (File): File object
+        user_creds (User): User credentials.
+        upload_id (str): Upload id
+
+    Raises:
+        Exception: Object storage error
+    """
+    try:
+        multipart_uploads.abort(
+            _get_bucket_name(user_creds), _get_object_name(file), upload_id
+        )
+    except Exception as e:
+        logger.error(f"Unable to abort upload of file {file.file_id} due to {e}")
+        raise e
 
 
 def create_file(file_create_list: List[FileCreate], user_creds: User) -> List[File]:
@@ -91,22 +330,17 @@ def create_file(file_create_list: List[FileCreate], user_creds: User) -> List[Fi
             raise e
 
 
-def get_file(query_params: FileGetQueryParams, user_creds: User) -> List[File]:
-    """Query DB for Files.
+def _select_file(query_params: FileGetQueryParams, user_creds: User) -> Select:
+    """Build paginated select statement for Files.
 
     Args:
         query_params (FileGetQueryParams): Query params from request
         user_creds (User): User credentials.
 
-    Raises:
-        Exception: error
-
     Returns:
-        List[File]: List of Files returned from DB
+        Select: select statement
     """
-    file_list: List[FileDB] = []
-
-    stmt = ""
+    stmt = select(FileDB).where(false())
 
     if query_params.query_type == FileQueryType.GET_ALL_FILES:
         stmt = select(FileDB).where(FileDB.protagonist_id == user_creds.user_id)
@@ -119,28 +353,73 @@ def get_file(query_params: FileGetQueryParams, user_creds: User) -> List[File]:
     if query_params.query_type == FileQueryType.GET_FILES_BY_PROTAGONIST_ID:
         stmt = select(FileDB).where(FileDB.id == user_creds.user_id)
 
+    return paginate(stmt, FileDB, query_params)
+
+
+def get_file(query_params: FileGetQueryParams, user_creds: User) -> List[File]:
+    """Query DB for Files.
+
+    Args:
+        query_params (FileGetQueryParams): Query params from request
+        user_creds (User): User credentials.
+
+    Returns:
+        List[File]: List of Files returned from DB
+    """
+    return get_file_page(query_params, user_creds)[0]
+
+
+def get_file_page(
+    query_params: FileGetQueryParams, user_creds: User
+) -> Tuple[List[File], Optional[str]]:
+    """Query DB for one page of Files.
+
+    Args:
+        query_params (FileGetQueryParams): Query params from request
+        user_creds (User): User credentials.
+
+    Raises:
+        Exception: error
+
+    Returns:
+        Tuple[List[File], Optional[str]]: Files and cursor of the next page
+    """
+    stmt = _select_file(query_params, user_creds)
+
     with DBSession() as session:
         try:
-            file_list: List[FileDB] = session.execute(stmt).scalars().all()
-            return [
-                File(
-                    file_id=obj.id,
-                    presigned_get=create_presigned_url(
-                        File(file_id=obj.id, **obj.to_dict()), user_creds, "GET"
-                    ),
-                    presigned_put=create_presigned_url(
-                        File(file_id=obj.id, **obj.to_dict()), user_creds, "PUT"
-                    ),
-                    **obj.to_dict(),
-                )
-                for obj in file_list
-            ]
+            page = KeysetPage(session.execute(stmt).scalars(), query_params.limit)
+            file_list = create_presigned_urls(
+                [File(file_id=obj.id, **obj.to_dict()) for obj in page], user_creds
+            )
+            return file_list, page.next_cursor
         except Exception as e:
             session.rollback()
             logger.error(f"Unable to fetch files due to {e}")
             raise e
 
 
+def stream_file(
+    query_params: FileGetQueryParams, user_creds: User
+) -> Generator[File, None, Optional[str]]:
+    """Stream Files from DB without loading the whole list.
+
+    Args:
+        query_params (FileGetQueryParams): Query params from request
+        user_creds (User): User credentials.
+
+    Returns:
+        Generator[File, None, Optional[str]]: Files, returns next page cursor
+    """
+    return stream_rows(
+        _select_file(query_params, user_creds),
+        query_params,
+        lambda obj: create_presigned_urls(
+            [File(file_id=obj.id, **obj.to_dict())], user_creds
+        )[0],
+    )
+
+
 def update_file(file_update_list: List[FileUpdate], user_creds: User) -> List[File]:
     """Update File in the DB from FileUpdate request.
 
@@ -170,28 +449,9 @@ def update_file(file_update_list: List[FileUpdate], user_creds: User) -> List[Fi
                         file_update_dict.pop("file_id")
                         updated_file = file.update(session, **file_update_dict)
                         updated_file_list.append(
-                            File(
-                                file_id=updated_file.id,
-                                presigned_get=create_presigned_url(
-                                    File(
-                                        file_id=updated_file.id,
-                                        **updated_file.to_dict(),
-                                    ),
-                                    user_creds,
-                                    "GET",
-                                ),
-                                presigned_put=create_presigned_url(
-                                    File(
-                                        file_id=updated_file.id,
-                                        **updated_file.to_dict(),
-                                    ),
-                                    user_creds,
-                                    "PUT",
-                                ),
-                                **updated_file.to_dict(),
-                            )
+                            File(file_id=updated_file.id, **updated_file.to_dict())
                         )
-            return updated_file_list
+            return create_presigned_urls(updated_file_list, user_creds)
         except Exception as e:
             session.rollback()
             logger.error(f"Unable to update file: {file.to_dict()} due to {e}")
@@ -222,7 +482,11 @@ def delete_file(file_delete: List[FileDelete], user_creds: User) -> List[File]:
             deleted_file_list = []
             for file in file_db_delete_list:
                 file.delete(session)
-                deleted_file_list.append(File(file_id=file.id, **file.to_dict()))
+                deleted_file = File(file_id=file.id, **file.to_dict())
+                presigned_url_cache.invalidate(
+                    _get_bucket_name(user_creds), _get_object_name(deleted_file)
+                )
+                deleted_file_list.append(deleted_file)
             return deleted_file_list
         except Exception as e:
             session.rollback()
@@ -413,9 +677,7 @@ def create_file_presigned_urls(inputs: List[Prop]) -> List[Prop]:
             error_in_function=get_outer_function(),
         ) from e
     try:
-        for file in created_file_list:
-            file.presigned_put = create_presigned_url(file, user, "PUT")
-            file.presigned_get = create_presigned_url(file, user, "GET")
+        create_presigned_urls(created_file_list, user)
     except Exception as e:
         raise FlowExecError(
             human_description="Creating presigned urls failed",
@@ -469,8 +731,11 @@ def delete_file_s3_entry(inputs: List[Prop]) -> List[Prop]:
     try:
         file_delete_list = []
         for file in file_list:
-            file_delete_list.append(DeleteObject(f"{str(file.file_id)}.{file.ext}"))
-        minio_client.remove_objects(f"protagonist-{user.user_id}", file_delete_list)
+            file_delete_list.append(DeleteObject(_get_object_name(file)))
+            presigned_url_cache.invalidate(
+                _get_bucket_name(user), _get_object_name(file)
+            )
+        minio_client.remove_objects(_get_bucket_name(user), file_delete_list)
     except Exception as e:
         raise FlowExecError(
             human_description="Something bad happened",
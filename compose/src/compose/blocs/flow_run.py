@@ -0,0 +1,84 @@
+"""Flow run BLoCs."""
+
+import json
+from typing import List, Optional
+from uuid import uuid4
+
+from blackcap.schemas.user import User
+from blackcap.workers import celery_app
+from celery.result import AsyncResult
+from logzero import logger
+from pydantic import UUID4
+
+from compose.schemas.api.mine.post import MineCreate
+from compose.schemas.flow_run import FlowRun, FlowRunStatus
+from compose.tasks.create_mine import run_create_mine_flow
+
+
+def queue_create_mine_flow(
+    mine_create_request_list: List[MineCreate], user: User
+) -> FlowRun:
+    """Queue the create mine flow for execution in a worker.
+
+    Args:
+        mine_create_request_list (List[MineCreate]): List of mine objects to create.
+        user (User): User credentials.
+
+    Raises:
+        Exception: Broker or result backend error
+
+    Returns:
+        FlowRun: Queued flow run
+    """
+    flow_run = FlowRun(
+        flow_run_id=uuid4(),
+        flow_name="create_mine",
+        protagonist_id=user.user_id,
+    )
+    flow_run_meta = json.loads(flow_run.json())
+    try:
+        # Record the run before sending it so that polling can tell a queued
+        # run apart from an unknown id (both are PENDING in celery)
+        celery_app.backend.store_result(
+            str(flow_run.flow_run_id), flow_run_meta, FlowRunStatus.QUEUED.name
+        )
+        run_create_mine_flow.apply_async(
+            args=[
+                flow_run_meta,
+                [json.loads(mine.json()) for mine in mine_create_request_list],
+                json.loads(user.json()),
+            ],
+            task_id=str(flow_run.flow_run_id),
+        )
+    except Exception as e:
+        logger.error(f"Unable to queue create mine flow due to {e}")
+        raise e
+    return flow_run
+
+
+def get_flow_run(flow_run_id: UUID4, user: User) -> Optional[FlowRun]:
+    """Get progress of a queued flow run.
+
+    Args:
+        flow_run_id (UUID4): Id of the flow run
+        user (User): User credentials.
+
+    Raises:
+        Exception: Result backend error
+
+    Returns:
+        Optional[FlowRun]: Flow run if it exists and belongs to the user
+    """
+    try:
+        result = AsyncResult(str(flow_run_id), app=celery_app)
+        state, info = result.state, result.info
+    except Exception as e:
+        logger.error(f"Unable to fetch flow run {flow_run_id} due to {e}")
+        raise e
+    if state == "PENDING" or not isinstance(info, dict):
+        # Unknown id
+        return None
+    flow_run = FlowRun.parse_obj(info)
+    if flow_run.protagonist_id != user.user_id:
+        return None
+    return flow_run
@@ -1,6 +1,6 @@
 """Mine BLoCs."""
 
-from typing import List
+from typing import Generator, List, Optional, Tuple
 
 from blackcap.db import DBSession
 from blackcap.flow import Flow, FlowExecError, FuncProp, get_outer_function, Prop, Step
@@ -9,8 +9,9 @@ from blackcap.schemas.user import User
 from logzero import logger
 from pydantic import UUID4, ValidationError
 from pydantic.error_wrappers import ErrorWrapper
-from sqlalchemy import select
+from sqlalchemy import false, select
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql import Select
 
 
 from compose.blocs.data import get_data
@@ -40,6 +41,7 @@ from compose.schemas.data import Data
 from compose.schemas.file import File
 from compose.schemas.mine import Mine
 from compose.schemas.template import RenderedTemplate, Template
+from compose.utils.pagination import KeysetPage, paginate, stream_rows
 
 
 ######################
@@ -79,22 +81,20 @@ def create_mine(mine_list: List[MineCreate], user_creds: User) -> List[Mine]:
             raise e
 
 
-def get_mine(query_params: MineGetQueryParams, user_creds: User) -> List[Mine]:
-    """Query DB for Mines.
+def _select_mine(query_params: MineGetQueryParams, user_creds: User) -> Select:
+    """Build paginated select statement for Mines.
 
     Args:
         query_params (MineGetQueryParams): Query params from request
         user_creds (User): User credentials.
 
-
     Raises:
-        Exception: error
-        e: error
+        e: Missing parameter
 
     Returns:
-        List[Mine]: List of Mines returned from DB
+        Select: select statement
     """
-    stmt = ""
+    stmt = select(MineDB).where(false())
 
     if query_params.query_type == MineQueryType.GET_ALL_MINES:
         stmt = select(MineDB).where(MineDB.protagonist_id == user_creds.user_id)
@@ -123,16 +123,69 @@ def get_mine(query_params: MineGetQueryParams, user_creds: User) -> List[Mine]:
             raise e
         stmt = select(MineDB).where(MineDB.id == user_creds.user_id)
 
+    return paginate(stmt, MineDB, query_params)
+
+
+def get_mine(query_params: MineGetQueryParams, user_creds: User) -> List[Mine]:
+    """Query DB for Mines.
+
+    Args:
+        query_params (MineGetQueryParams): Query params from request
+        user_creds (User): User credentials.
+
+    Returns:
+        List[Mine]: List of Mines returned from DB
+    """
+    return get_mine_page(query_params, user_creds)[0]
+
+
+def get_mine_page(
+    query_params: MineGetQueryParams, user_creds: User
+) -> Tuple[List[Mine], Optional[str]]:
+    """Query DB for one page of Mines.
+
+    Args:
+        query_params (MineGetQueryParams): Query params from request
+        user_creds (User): User credentials.
+
+    Raises:
+        Exception: error
+
+    Returns:
+        Tuple[List[Mine], Optional[str]]: Mines and cursor of the next page
+    """
+    stmt = _select_mine(query_params, user_creds)
+
     with DBSession() as session:
         try:
-            mine_list: List[MineDB] = session.execute(stmt).scalars().all()
-            return [Mine(mine_id=obj.id, **obj.to_dict()) for obj in mine_list]
+            page = KeysetPage(session.execute(stmt).scalars(), query_params.limit)
+            mine_list = [Mine(mine_id=obj.id, **obj.to_dict()) for obj in page]
+            return mine_list, page.next_cursor
         except Exception as e:
             session.rollback()
             logger.error(f"Unable to fetch mine due to {e}")
             raise e
 
 
+def stream_mine(
+    query_params: MineGetQueryParams, user_creds: User
+) -> Generator[Mine, None, Optional[str]]:
+    """Stream Mines from DB without loading the whole list.
+
+    Args:
+        query_params (MineGetQueryParams): Query params from request
+        user_creds (User): User credentials.
+
+    Returns:
+        Generator[Mine, None, Optional[str]]: Mines, returns next page cursor
+    """
+    return stream_rows(
+        _select_mine(query_params, user_creds),
+        query_params,
+        lambda obj: Mine(mine_id=obj.id, **obj.to_dict()),
+    )
+
+
 def update_mine(mine_update_list: List[MineUpdate], user_creds: User) -> List[Mine]:
     """Update Mine in the DB from MineUpdate request.
 
@@ -1,20 +1,20 @@
 """RenderedTemplate BLoCs."""
 
-from typing import List
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
 from pathlib import Path
-import shutil
-from tempfile import TemporaryDirectory
+from typing import Dict, List, Tuple
 
 from blackcap.db import DBSession
 from blackcap.flow import FlowExecError, get_outer_function, Prop
 from blackcap.schemas.user import User
 from logzero import logger
-from pydantic import ValidationError
+from pydantic import UUID4, ValidationError
 from pydantic.error_wrappers import ErrorWrapper
-import requests
 from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
 
+from compose.blocs.file import get_file_etag, upload_file_stream
+from compose.configs import config_registry
 from compose.models.rendered_templates import RenderedTemplateDB
 from compose.schemas.api.rendered_template.delete import RenderedTemplateDelete
 from compose.schemas.api.rendered_template.get import (
@@ -26,7 +26,22 @@ from compose.schemas.api.rendered_template.put import RenderedTemplateUpdate
 from compose.schemas.file import File
 from compose.schemas.mine import Mine
 from compose.schemas.template import RenderedTemplate, Template
-from compose.utils.io import make_archive
+from compose.templater.cookie_templater import CookieTemplater
+from compose.utils.archive_cache import ArchiveCache
+from compose.utils.io import download, pipe_stream
+
+config = config_registry.get_config()
+
+# Compiled templates are shared by all renders of this process
+templater = CookieTemplater(
+    cache_size=config.TEMPLATE_CACHE_SIZE,
+    max_member_size=config.TEMPLATE_MAX_RENDER_SIZE,
+)
+
+# Downloaded template archives are shared by all flows on this node
+archive_cache = ArchiveCache(
+    Path(config.ARCHIVE_CACHE_DIR), max_size=config.ARCHIVE_CACHE_SIZE
+)
 
 ###
 # CRUD BLoCs
@@ -573,51 +588,62 @@ def render_and_upload_rendered_template(inputs: List[Prop]) -> List[Prop]:
             error_in_function=get_outer_function(),
         ) from e
 
-    try:
-        for rendered_template in created_rendered_template_list:
-            # Create archive of the rendered template in a temp dir
-            with TemporaryDirectory() as tempd:
-                tempd = Path(tempd)
-                for file in checked_template_file_list:
-                    # find the right file
-                    if (
-                        file.parent_id == rendered_template.parent_template_id
-                        and file.uploaded is True
-                    ):
-
-                        # Download template
-                        download_and_unpack_archive(
-                            file.presigned_get, tempd, f"template_{file.parent_id}"
-                        )
-
-                        # Render the fetched template with provided template vars
-                        # TODO: Do it properly later, for now just cp the downloaded template
-                        shutil.copytree(
-                            Path(tempd)
-                            .absolute()
-                            .joinpath(f"template_{file.parent_id}"),
-                            Path(tempd)
-                            .absolute()
-                            .joinpath(f"rendered_{file.parent_id}"),
-                            dirs_exist_ok=True,
-                        )
-
-                        # get upload url
-                        for check_file in rendered_template_file_list:
-                            if (
-                                check_file.parent_id
-                                == rendered_template.rendered_template_id
-                            ):
-                                upload_url = check_file.presigned_put
-
-                        # Craete archive and upload
-                        make_archive_and_upload(
-                            upload_url, f"rendered_{file.parent_id}", tempd
-                        )
+    # Index files by parent once instead of rescanning them per template
+    template_file_index: Dict[UUID4, File] = {
+        file.parent_id: file
+        for file in checked_template_file_list
+        if file.uploaded is True
+    }
+    rendered_file_index: Dict[UUID4, File] = {
+        file.parent_id: file for file in rendered_template_file_list
+    }
+    render_jobs = [
+        (
+            rendered_template,
+            template_file_index[rendered_template.parent_template_id],
+            rendered_file_index[rendered_template.rendered_template_id],
+        )
+        for rendered_template in created_rendered_template_list
+        if rendered_template.parent_template_id in template_file_index
+        and rendered_template.rendered_template_id in rendered_file_index
+    ]
 
-    except Exception as e:
+    # Renders are I/O bound, so run them concurrently in a bounded pool
+    failed_renders: List[Tuple[RenderedTemplate, Exception]] = []
+    if render_jobs:
+        with ThreadPoolExecutor(
+            max_workers=min(config.RENDER_WORKERS, len(render_jobs))
+        ) as executor:
+            future_to_template = {
+                executor.submit(
+                    stream_render_and_upload,
+                    file,
+                    rendered_template,
+                    rendered_file,
+                    user,
+                ): rendered_template
+                for rendered_template, file, rendered_file in render_jobs
+            }
+            done, not_done = wait(future_to_template, return_when=FIRST_EXCEPTION)
+            # Skip queued renders once one failed, the flow will be reverted
+            for future in not_done:
+                future.cancel()
+        for future, rendered_template in future_to_template.items():
+            if not future.cancelled() and future.exception() is not None:
+                failed_renders.append((rendered_template, future.exception()))
+
+    if failed_renders:
+        for rendered_template, e in failed_renders:
+            logger.error(
+                f"Unable to render template {rendered_template.rendered_template_id} due to {e}"
+            )
+        e = failed_renders[0][1]
         raise FlowExecError(
-            human_description=f"Something bad happened, file: {file}, {file.presigned_get}",
+            human_description="Rendering templates failed: "
+            + ", ".join(
+                str(rendered_template.rendered_template_id)
+                for rendered_template, _ in failed_renders
+            ),
             error=e,
             error_type=type(e),
             is_user_facing=False,
@@ -633,36 +659,41 @@ def render_and_upload_rendered_template(inputs: List[Prop]) -> List[Prop]:
     ]
 
 
-def download_and_unpack_archive(
-    download_url: str, download_path: Path, file_name: str, unpack: bool = True
+def stream_render_and_upload(
+    template_file: File,
+    rendered_template: RenderedTemplate,
+    rendered_file: File,
+    user_creds: User,
 ) -> None:
-    """Download and unpack archives from object storage."""
-    resp = requests.get(download_url, stream=True)
-    with open(f"{download_path.joinpath(file_name)}.tar", "wb") as download_file:
-        for data in resp.iter_content(chunk_size=1024):
-            download_file.write(data)
-
-    if unpack is True:
-        # Unpack archive
-        shutil.unpack_archive(
-            download_path.joinpath(f"{file_name}.tar"),
-            download_path.joinpath(file_name),
-        )
-
+    """Render a template archive and stream the result to object storage.
 
-def make_archive_and_upload(
-    upload_url: str, archive_name: str, file_path: Path
-) -> None:
-    """Create archive and upload to S3."""
-    archive_path = make_archive(
-        archive_name,
-        file_path.joinpath(archive_name),
-        file_path,
-    )
+    The template archive is looked up by etag, first as a compiled template
+    in memory, then in the on disk archive cache and only then downloaded
+    from the presigned GET url. The rendered archive is uploaded as it is
+    produced.
 
-    # upload rendered template
-    with open(archive_path, "rb") as f:
-        requests.put(
-            url=upload_url,
-            data=f,
-        )
+    Args:
+        template_file (File): File object of the template archive
+        rendered_template (RenderedTemplate): Rendered template with context
+        rendered_file (File): File object of the rendered template archive
+        user_creds (User): User credentials.
+    """
+    etag = get_file_etag(template_file, user_creds)
+    context = rendered_template.template_context
+    compiled = templater.get_compiled(template_file.file_id)
+    if compiled is not None and compiled.etag == etag:
+        with pipe_stream(
+            lambda dst: templater.render_compiled(compiled, context, dst)
+        ) as rendered:
+            upload_file_stream(rendered_file, user_creds, rendered, "application/x-tar")
+        return
+
+    with archive_cache.open(
+        etag, lambda dst: download(template_file.presigned_get, dst)
+    ) as src:
+        with pipe_stream(
+            lambda dst: templater.compile_and_render(
+                template_file.file_id, etag, src, context, dst
+            )
+        ) as rendered:
+            upload_file_stream(rendered_file, user_creds, rendered, "application/x-tar")
@@ -1,6 +1,6 @@
 """Template BLoCs."""
 
-from typing import List
+from typing import Generator, List, Optional, Tuple
 
 from blackcap.db import DBSession
 from blackcap.flow import Flow, FlowExecError, FuncProp, get_outer_function, Prop, Step
@@ -9,8 +9,9 @@ from blackcap.schemas.user import User
 from logzero import logger
 from pydantic import ValidationError
 from pydantic.error_wrappers import ErrorWrapper
-from sqlalchemy import select
+from sqlalchemy import false, select
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql import Select
 
 from compose.blocs.file import (
     create_file_db_entry,
@@ -24,6 +25,7 @@ from compose.schemas.api.template.post import TemplateCreate
 from compose.schemas.api.template.put import TemplateUpdate
 from compose.schemas.file import File
 from compose.schemas.template import Template
+from compose.utils.pagination import KeysetPage, paginate, stream_rows
 
 ###
 # CRUD BLoCs
@@ -65,22 +67,20 @@ def create_template(
             raise e
 
 
-def get_template(
-    query_params: TemplateGetQueryParams, user_creds: User
-) -> List[Template]:
-    """Query DB for Templates.
+def _select_template(query_params: TemplateGetQueryParams, user_creds: User) -> Select:
+    """Build paginated select statement for Templates.
 
     Args:
         query_params (TemplateGetQueryParams): Query params from request
         user_creds (User): User credentials.
 
     Raises:
-        Exception: error
+        e: Missing parameter
 
     Returns:
-        List[Template]: List of Templates returned from DB
+        Select: select statement
     """
-    stmt = ""
+    stmt = select(TemplateDB).where(false())
 
     if query_params.query_type == TemplateQueryType.GET_ALL_TEMPLATES:
         stmt = select(TemplateDB).where(TemplateDB.protagonist_id == user_creds.user_id)
@@ -109,19 +109,71 @@ def get_template(
             raise e
         stmt = select(TemplateDB).where(TemplateDB.id == user_creds.user_id)
 
+    return paginate(stmt, TemplateDB, query_params)
+
+
+def get_template(
+    query_params: TemplateGetQueryParams, user_creds: User
+) -> List[Template]:
+    """Query DB for Templates.
+
+    Args:
+        query_params (TemplateGetQueryParams): Query params from request
+        user_creds (User): User credentials.
+
+    Returns:
+        List[Template]: List of Templates returned from DB
+    """
+    return get_template_page(query_params, user_creds)[0]
+
+
+def get_template_page(
+    query_params: TemplateGetQueryParams, user_creds: User
+) -> Tuple[List[Template], Optional[str]]:
+    """Query DB for one page of Templates.
+
+    Args:
+        query_params (TemplateGetQueryParams): Query params from request
+        user_creds (User): User credentials.
+
+    Raises:
+        Exception: error
+
+    Returns:
+        Tuple[List[Template], Optional[str]]: Templates and cursor of the next page
+    """
+    stmt = _select_template(query_params, user_creds)
+
     with DBSession() as session:
         try:
-            template_db_list: List[TemplateDB] = session.execute(stmt).scalars().all()
-            template_list: List[Template] = [
-                Template(template_id=obj.id, **obj.to_dict())
-                for obj in template_db_list
+            page = KeysetPage(session.execute(stmt).scalars(), query_params.limit)
+            template_list = [
+                Template(template_id=obj.id, **obj.to_dict()) for obj in page
             ]
+            return template_list, page.next_cursor
         except Exception as e:
             session.rollback()
             logger.error(f"Unable to fetch templates due to {e}")
             raise e
 
-    return template_list
+
+def stream_template(
+    query_params: TemplateGetQueryParams, user_creds: User
+) -> Generator[Template, None, Optional[str]]:
+    """Stream Templates from DB without loading the whole list.
+
+    Args:
+        query_params (TemplateGetQueryParams): Query params from request
+        user_creds (User): User credentials.
+
+    Returns:
+        Generator[Template, None, Optional[str]]: Templates, returns next page cursor
+    """
+    return stream_rows(
+        _select_template(query_params, user_creds),
+        query_params,
+        lambda obj: Template(template_id=obj.id, **obj.to_dict()),
+    )
 
 
 def update_template(
@@ -1,148 +1,136 @@
 """Data commands."""
 
-import os
 from pathlib import Path
 from pprint import pformat
-import shutil
 import sys
-from tempfile import TemporaryDirectory
+from typing import Optional
 
 import click
-import requests
-from tqdm import tqdm
-from tqdm.utils import CallbackIOWrapper
 
 from compose.blocs.data import create_data, get_data, update_data
-from compose.blocs.file import create_file, get_file, update_file
+from compose.blocs.file import create_file, get_file
+from compose.cli.download import download_with_progress
+from compose.cli.upload import upload_dir_with_progress
 from compose.configs import config_registry
 from compose.schemas.api.data.get import DataGetQueryParams, DataQueryType
 from compose.schemas.api.data.put import DataUpdate
 from compose.schemas.api.file.get import FileGetQueryParams, FileQueryType
-from compose.schemas.api.file.put import FileUpdate
 from compose.schemas.data import Data
 from compose.schemas.file import File
 from compose.utils.auth import check_auth
+from compose.utils.codec import Codec
 
 
 config = config_registry.get_config()
 
+CODEC_HELP = "Codec of the archive, defaults to the one of an archive ext"
 
-def make_archive(name: str, in_path: Path, out_path: Path) -> str:
-    """Create archive in a temp dir.
+
+def archive_codec(ext: str, codec: Optional[str]) -> Codec:
+    """Pick the codec of the archive of a data object.
 
     Args:
-        name (str): name of the archive excluding ext
-        in_path (Path): dir to archive
-        out_path (Path): output dir
+        ext (str): Extension of the data, e.g. tar.gz
+        codec (Optional[str]): Codec asked for, None for the default
+
+    Raises:
+        click.BadParameter: The extension is of an archive of another codec
 
     Returns:
-        str: Path of created archive
+        Codec: Codec named by an archive extension or asked for,
+            ARCHIVE_CODEC otherwise
     """
-    return shutil.make_archive(out_path.joinpath(name), "tar", in_path)
+    ext_codec = Codec.from_archive_ext(ext)
+    if codec is None:
+        return ext_codec or Codec(config.ARCHIVE_CODEC)
+    if ext_codec is not None and ext_codec != Codec(codec):
+        raise click.BadParameter(
+            f"{ext} archives are compressed with {ext_codec.value}, not {codec}",
+            param_hint="'--codec'",
+        )
+    return Codec(codec)
 
 
 @click.command()
 @click.option("--name", required=True)
 @click.option("--ext", required=True)
 @click.option("--file_type", required=True)
+@click.option(
+    "--codec",
+    type=click.Choice([codec.value for codec in Codec]),
+    help=CODEC_HELP,
+    show_default=config.ARCHIVE_CODEC,
+)
 @click.argument("path")
-def create(name, ext, file_type, path) -> None:  # noqa: C901, ANN001
+def create(name, ext, file_type, codec, path) -> None:  # noqa: C901, ANN001
     """Create data object."""
+    codec = archive_codec(ext, codec)
     # Check Authorization
     user = check_auth(config)
 
-    # Create archive of the data in a temp dir
     # noqa: DAR101
-    with TemporaryDirectory() as tempd:
-        click.echo(
-            click.style("\nCreated temporary dir at: ", fg="green")
-            + f"{Path(tempd).absolute()}"
-        )
-        archive_path = make_archive(name, path, Path(tempd))
-        click.secho(
-            click.style("Archive created at: ", fg="green")
-            + f"{Path(archive_path).absolute()}\n"
-        )
-        # Create a data in the db
-        data = Data(name=name, ext=ext, file_type=file_type)
-        try:
-            created_data = create_data([data], user)[0]
-        except Exception as e:
-            click.secho(f"Error occured: {e}\n\n Exiting....")
-            sys.exit(1)
-        click.echo(
-            click.style("Data object created:", fg="green")
-            + f"\n\n{pformat(created_data.dict())}\n"
-        )
-
-        # Create file in db
-        file = File(
-            name=name, ext=ext, file_type=file_type, parent_id=created_data.data_id
-        )
-        try:
-            created_file = create_file([file], user)[0]
-        except Exception as e:
-            click.secho(f"Error occured: {e}\n\n Exiting....")
-            sys.exit(1)
-        click.echo(
-            click.style("File object created:", fg="green")
-            + f"\n\n{pformat(created_file.dict())}\n"
-        )
-
-        # Update data in db to link with file
-        data_update = DataUpdate(
-            data_id=created_data.data_id, file_id=created_file.file_id
-        )
-        try:
-            updated_data = update_data(data_update)
-        except Exception as e:
-            click.secho(f"Error occured: {e}\n\n Exiting....")
-            sys.exit(1)
-        click.echo(
-            click.style("Data and file linked:", fg="green")
-            + f"\n\n{pformat(updated_data.dict())}\n"
-        )
+    # Create a data in the db
+    data = Data(name=name, ext=ext, file_type=file_type)
+    try:
+        created_data = create_data([data], user)[0]
+    except Exception as e:
+        click.secho(f"Error occured: {e}\n\n Exiting....")
+        sys.exit(1)
+    click.echo(
+        click.style("Data object created:", fg="green")
+        + f"\n\n{pformat(created_data.dict())}\n"
+    )
 
-        # Upload file
-        click.secho("Starting file upload...", fg="green")
-        archive_file_size = os.stat(archive_path).st_size
-        try:
-            with open(archive_path, "rb") as f:
-                with tqdm(
-                    total=archive_file_size,
-                    unit="B",
-                    unit_scale=True,
-                    unit_divisor=1024,
-                ) as t:
-                    wrapped_file = CallbackIOWrapper(t.update, f, "read")
-                    requests.put(
-                        url=created_file.presigned_url,
-                        data=wrapped_file,
-                    )
-        except Exception as e:
-            click.secho(f"Error occured: {e}\n\n Exiting....")
-            sys.exit(1)
+    # Create file in db
+    file = File(
+        name=name,
+        ext=codec.ext,
+        file_type=file_type,
+        parent_id=created_data.data_id,
+    )
+    try:
+        created_file = create_file([file], user)[0]
+    except Exception as e:
+        click.secho(f"Error occured: {e}\n\n Exiting....")
+        sys.exit(1)
+    click.echo(
+        click.style("File object created:", fg="green")
+        + f"\n\n{pformat(created_file.dict())}\n"
+    )
 
-        click.secho("\nUpload done!", fg="green")
+    # Update data in db to link with file
+    data_update = DataUpdate(data_id=created_data.data_id, file_id=created_file.file_id)
+    try:
+        updated_data = update_data(data_update)
+    except Exception as e:
+        click.secho(f"Error occured: {e}\n\n Exiting....")
+        sys.exit(1)
+    click.echo(
+        click.style("Data and file linked:", fg="green")
+        + f"\n\n{pformat(updated_data.dict())}\n"
+    )
 
-        # Update file status to uploaded in db
-        file_update = FileUpdate(file_id=created_file.file_id, uploaded=True)
-        try:
-            updated_file = update_file(file_update)
-        except Exception as e:
-            click.secho(f"Error occured: {e}\n\n Exiting....")
-            sys.exit(1)
-        click.echo(
-            click.style("\nFile object updated: ", fg="green")
-            + f"\n\n{pformat(updated_file.dict())}\n"
-        )
-        click.secho("All done!", fg="green")
+    # Stream the archive of the data and mark the file uploaded
+    click.secho("Starting file upload...", fg="green")
+    updated_file = upload_dir_with_progress(Path(path), created_file, user)
+    click.secho("\nUpload done!", fg="green")
+    click.echo(
+        click.style("\nFile object updated: ", fg="green")
+        + f"\n\n{pformat(updated_file.dict())}\n"
+    )
+    click.secho("All done!", fg="green")
 
 
 @click.command()
 @click.option("--data_id", "-i", required=True)
+@click.option(
+    "--codec",
+    type=click.Choice([codec.value for codec in Codec]),
+    help=CODEC_HELP,
+    show_default=config.ARCHIVE_CODEC,
+)
 @click.argument("path")
-def update(data_id, path) -> None:  # noqa: C901, ANN001
+def update(data_id, codec, path) -> None:  # noqa: C901, ANN001
     """Update data object."""
     # Check Authorization
     user = check_auth(config)
@@ -156,81 +144,46 @@ def update(data_id, path) -> None:  # noqa: C901, ANN001
         click.secho("Data not found!\n\n")
         sys.exit(0)
     data = fetched_data[0]
-    # Create archive of the data in a temp dir
-    with TemporaryDirectory() as tempd:
-        click.echo(
-            click.style("\nCreated temporary dir at: ", fg="green")
-            + f"{Path(tempd).absolute()}"
-        )
-        archive_path = make_archive(data.name, path, Path(tempd))
-        click.secho(
-            click.style("Archive created at: ", fg="green")
-            + f"{Path(archive_path).absolute()}\n"
-        )
-
-        # Create file in db
-        file = File(
-            name=data.name,
-            ext=data.ext,
-            file_type=data.file_type,
-            parent_id=data.data_id,
-        )
-        try:
-            created_file = create_file([file], user)[0]
-        except Exception as e:
-            click.secho(f"Error occured: {e}\n\n Exiting....")
-            sys.exit(1)
-
-        click.echo(
-            click.style("File object created:", fg="green")
-            + f"\n\n{pformat(created_file.dict())}\n"
-        )
+    codec = archive_codec(data.ext, codec)
+    # Create file in db
+    file = File(
+        name=data.name,
+        ext=codec.ext,
+        file_type=data.file_type,
+        parent_id=data.data_id,
+    )
+    try:
+        created_file = create_file([file], user)[0]
+    except Exception as e:
+        click.secho(f"Error occured: {e}\n\n Exiting....")
+        sys.exit(1)
 
-        # Update data in db to link with file
-        data_update = DataUpdate(data_id=data.data_id, file_id=created_file.file_id)
-        try:
-            updated_data = update_data(data_update)
-        except Exception as e:
-            click.secho(f"Error occured: {e}\n\n Exiting....")
-            sys.exit(1)
+    click.echo(
+        click.style("File object created:", fg="green")
+        + f"\n\n{pformat(created_file.dict())}\n"
+    )
 
-        click.echo(
-            click.style("Data and file linked:", fg="green")
-            + f"\n\n{pformat(updated_data.dict())}\n"
-        )
+    # Update data in db to link with file
+    data_update = DataUpdate(data_id=data.data_id, file_id=created_file.file_id)
+    try:
+        updated_data = update_data(data_update)
+    except Exception as e:
+        click.secho(f"Error occured: {e}\n\n Exiting....")
+        sys.exit(1)
 
-        # Upload file
-        click.secho("Starting file upload...", fg="green")
-        archive_file_size = os.stat(archive_path).st_size
-        try:
-            with open(archive_path, "rb") as f:
-                with tqdm(
-                    total=archive_file_size,
-                    unit="B",
-                    unit_scale=True,
-                    unit_divisor=1024,
-                ) as t:
-                    wrapped_file = CallbackIOWrapper(t.update, f, "read")
-                    requests.put(
-                        url=created_file.presigned_url,
-                        data=wrapped_file,
-                    )
-        except Exception as e:
-            click.secho(f"Error occured: {e}\n\n Exiting....")
-            sys.exit(1)
+    click.echo(
+        click.style("Data and file linked:", fg="green")
+        + f"\n\n{pformat(updated_data.dict())}\n"
+    )
 
-        # Update file status to uploaded in db
-        file_update = FileUpdate(file_id=created_file.file_id, uploaded=True)
-        try:
-            updated_file = update_file(file_update)
-        except Exception as e:
-            click.secho(f"Error occured: {e}\n\n Exiting....")
-            sys.exit(1)
-        click.echo(
-            click.style("\nFile object updated: ", fg="green")
-            + f"\n\n{pformat(updated_file.dict())}\n"
-        )
-        click.secho("All done!", fg="green")
+    # Stream the archive of the data and mark the file uploaded
+    click.secho("Starting file upload...", fg="green")
+    updated_file = upload_dir_with_progress(Path(path), created_file, user)
+    click.echo(
+        click.style("\nFile object updated: ", fg="green")
+        + f"\n\n{pformat(updated_file.dict())}\n"
+    )
+    click.secho("All done!", fg="green")
 
 
 @click.command()
@@ -266,26 +219,9 @@ def get(data_id, extract, path) -> None:  # noqa: C901, ANN001
     click.echo(
         click.style("File object:", fg="green") + f"\n\n{pformat(file.dict())}\n"
     )
-    # Download file
+    # Download file, extracting the archive on the fly if asked
     click.secho("Starting file download...", fg="green")
-    resp = requests.get(file.presigned_url, stream=True)
-    total = int(resp.headers.get("content-length", 0))
-    with open(
-        Path(path).joinpath(f"{file.file_id}.{file.ext}"), "wb"
-    ) as download_file, tqdm(
-        desc=str(file.file_id),
-        total=total,
-        unit="iB",
-        unit_scale=True,
-        unit_divisor=1024,
-    ) as bar:
-        for data in resp.iter_content(chunk_size=1024):
-            size = download_file.write(data)
-            bar.update(size)
-    # Unpack archive
-    if extract:
-        click.secho("Unpacking archive...", fg="green")
-        shutil.unpack_archive(Path(path).joinpath(f"{file.file_id}.{file.ext}"))
+    download_with_progress(file, Path(path), extract)
     click.secho("All done!", fg="green")
 
 
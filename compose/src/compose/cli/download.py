@@ -0,0 +1,406 @@
+"""Parallel, resumable ranged downloads for CLI commands."""
+
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+import hashlib
+from http import HTTPStatus
+import io
+import os
+from pathlib import Path
+import sys
+import tarfile
+from tempfile import NamedTemporaryFile
+from threading import Condition, Lock
+import time
+from typing import Callable, Iterable, List, Optional
+
+import click
+from pydantic import BaseModel
+import requests
+from tqdm import tqdm
+
+from compose.configs import config_registry
+from compose.schemas.file import File
+from compose.utils.codec import decompress
+from compose.utils.io import ARCHIVE_CHUNK_SIZE, download, extract_archive
+
+
+config = config_registry.get_config()
+
+RANGE_RETRIES = 3
+
+
+class ObjectInfo(BaseModel):
+    """Size and etag of a remote object."""
+
+    # None if the server does not support range requests
+    size: Optional[int]
+    etag: str
+
+
+class DownloadState(BaseModel):
+    """Persisted state of a ranged download."""
+
+    etag: str
+    size: int
+    part_size: int
+    # Indexes of parts written to the partial file
+    parts: List[int] = []
+
+
+class DownloadMismatchError(Exception):
+    """Downloaded data does not match the object etag."""
+
+    pass
+
+
+def _partial_path(dst: Path) -> Path:
+    return dst.with_name(f"{dst.name}.part")
+
+
+def _state_path(dst: Path) -> Path:
+    return dst.with_name(f"{dst.name}.part.json")
+
+
+def load_download_state(dst: Path) -> Optional[DownloadState]:
+    """Load persisted state of an interrupted download.
+
+    Args:
+        dst (Path): Download destination
+
+    Returns:
+        Optional[DownloadState]: Download state if any
+    """
+    if not _state_path(dst).exists() or not _partial_path(dst).exists():
+        return None
+    return DownloadState.parse_file(_state_path(dst))
+
+
+def save_download_state(dst: Path, state: DownloadState) -> None:
+    """Persist download state atomically next to the partial file.
+
+    Args:
+        dst (Path): Download destination
+        state (DownloadState): Download state
+    """
+    with NamedTemporaryFile("w", dir=dst.parent, delete=False) as tmp:
+        tmp.write(state.json())
+    os.replace(tmp.name, _state_path(dst))
+
+
+def probe_object(url: str) -> ObjectInfo:
+    """Get size and etag of an object with a one byte range request.
+
+    Presigned urls are signed for a single method, so HEAD can not be used.
+
+    Args:
+        url (str): Presigned GET url
+
+    Returns:
+        ObjectInfo: Object info
+    """
+    with requests.get(url, headers={"Range": "bytes=0-0"}, stream=True) as resp:
+        etag = resp.headers.get("ETag", "").strip('"')
+        if resp.status_code == HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE:
+            return ObjectInfo(size=0, etag=etag)
+        resp.raise_for_status()
+        if resp.status_code != HTTPStatus.PARTIAL_CONTENT:
+            return ObjectInfo(size=None, etag=etag)
+        return ObjectInfo(
+            size=int(resp.headers["Content-Range"].rsplit("/", 1)[1]), etag=etag
+        )
+
+
+def compute_etag(path: Path, part_size: Optional[int] = None) -> str:
+    """Compute the S3 etag of a file.
+
+    Args:
+        path (Path): File to hash
+        part_size (Optional[int]): Part size if the object was uploaded in parts
+
+    Returns:
+        str: Etag without quotes
+    """
+    with open(path, "rb") as f:
+        if part_size is None:
+            digest = hashlib.md5()  # noqa: S303
+            for chunk in iter(lambda: f.read(ARCHIVE_CHUNK_SIZE), b""):
+                digest.update(chunk)
+            return digest.hexdigest()
+        digests = []
+        while True:
+            digest = hashlib.md5()  # noqa: S303
+            size = 0
+            while size < part_size:
+                chunk = f.read(min(ARCHIVE_CHUNK_SIZE, part_size - size))
+                if not chunk:
+                    break
+                digest.update(chunk)
+                size += len(chunk)
+            if size == 0:
+                break
+            digests.append(digest.digest())
+    combined = hashlib.md5(b"".join(digests))  # noqa: S303
+    return f"{combined.hexdigest()}-{len(digests)}"
+
+
+def verify_etag(path: Path, etag: str, part_sizes: Iterable[int]) -> None:
+    """Check a downloaded file against the object etag.
+
+    Etags of multipart uploads depend on the part size, so they are checked
+    only if one of the given part sizes produces as many parts.
+
+    Args:
+        path (Path): Downloaded file
+        etag (str): Object etag
+        part_sizes (Iterable[int]): Part sizes the object may be uploaded with
+
+    Raises:
+        DownloadMismatchError: Checksum of the file does not match
+    """
+    if "-" not in etag:
+        if compute_etag(path) != etag:
+            raise DownloadMismatchError(f"Checksum of {path} does not match {etag}")
+        return
+    part_count = int(etag.rsplit("-", 1)[1])
+    size = path.stat().st_size
+    candidates = [
+        part_size for part_size in part_sizes if -(-size // part_size) == part_count
+    ]
+    if candidates and all(
+        compute_etag(path, part_size) != etag for part_size in candidates
+    ):
+        raise DownloadMismatchError(f"Checksum of {path} does not match {etag}")
+
+
+class _Parts:
+    """Tracks written parts and the contiguous prefix of the file."""
+
+    def __init__(
+        self: "_Parts", done: Iterable[int], part_size: int, size: int
+    ) -> None:
+        self._done = set(done)
+        self._part_size = part_size
+        self._size = size
+        self._next = 0
+        self._error: Optional[Exception] = None
+        self._cond = Condition()
+        self._advance()
+
+    def _advance(self: "_Parts") -> None:
+        while self._next in self._done:
+            self._next += 1
+
+    def mark(self: "_Parts", index: int) -> None:
+        with self._cond:
+            self._done.add(index)
+            self._advance()
+            self._cond.notify_all()
+
+    def fail(self: "_Parts", error: Exception) -> None:
+        with self._cond:
+            self._error = error
+            self._cond.notify_all()
+
+    def wait_for(self: "_Parts", pos: int) -> int:
+        # Blocks until the byte at pos is written, returns the prefix size
+        with self._cond:
+            while True:
+                if self._error is not None:
+                    raise self._error
+                available = min(self._next * self._part_size, self._size)
+                if available > pos:
+                    return available
+                self._cond.wait()
+
+
+class _PrefixReader(io.RawIOBase):
+    """Reads a partial file sequentially as its parts are written."""
+
+    def __init__(self: "_PrefixReader", fd: int, size: int, parts: _Parts) -> None:
+        self._fd = fd
+        self._size = size
+        self._parts = parts
+        self._pos = 0
+
+    def readable(self: "_PrefixReader") -> bool:
+        return True
+
+    def readinto(self: "_PrefixReader", buffer: memoryview) -> int:
+        if self._pos >= self._size:
+            return 0
+        available = self._parts.wait_for(self._pos)
+        data = os.pread(self._fd, min(len(buffer), available - self._pos), self._pos)
+        buffer[: len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+
+def _get_range(url: str, etag: str, fd: int, start: int, end: int) -> None:
+    for attempt in range(RANGE_RETRIES):
+        try:
+            offset = start
+            with requests.get(
+                url,
+                headers={"Range": f"bytes={start}-{end}", "If-Match": f'"{etag}"'},
+                stream=True,
+            ) as resp:
+                if resp.status_code == HTTPStatus.PRECONDITION_FAILED:
+                    raise DownloadMismatchError("Object changed during the download")
+                resp.raise_for_status()
+                if resp.status_code != HTTPStatus.PARTIAL_CONTENT:
+                    raise DownloadMismatchError("Server ignored the range request")
+                for chunk in resp.iter_content(chunk_size=ARCHIVE_CHUNK_SIZE):
+                    os.pwrite(fd, chunk, offset)
+                    offset += len(chunk)
+            if offset != end + 1:
+                raise requests.ConnectionError(f"Range {start}-{end} truncated")
+            return
+        except requests.RequestException:
+            if attempt == RANGE_RETRIES - 1:
+                raise
+            time.sleep(2**attempt)
+
+
+def download_file(
+    url: str,
+    dst: Path,
+    info: ObjectInfo,
+    workers: int = config.DOWNLOAD_WORKERS,
+    part_size: int = config.DOWNLOAD_PART_SIZE,
+    progress: Callable[[int], object] = lambda size: None,
+    extract_to: Optional[Path] = None,
+) -> Path:
+    """Download an object with concurrent range requests.
+
+    Parts are written in place into a preallocated `<dst>.part` file and
+    recorded in `<dst>.part.json`, so running it again resumes an
+    interrupted download as long as the object etag did not change. The
+    archive is extracted while it downloads if `extract_to` is set.
+
+    Args:
+        url (str): Presigned GET url
+        dst (Path): Download destination
+        info (ObjectInfo): Object info from `probe_object`
+        workers (int): Number of concurrent range requests
+        part_size (int): Size of each range request
+        progress (Callable[[int], object]): Called with the size of done parts
+        extract_to (Optional[Path]): Dir to extract the archive into
+
+    Raises:
+        Exception: Error of the first failed part
+
+    Returns:
+        Path: Download destination
+    """
+    dst = Path(dst)
+    partial_path = _partial_path(dst)
+    if info.size is None:
+        # No range support, fall back to a single streamed request
+        with open(partial_path, "wb") as f:
+            download(url, f)
+        progress(partial_path.stat().st_size)
+        os.replace(partial_path, dst)
+        if extract_to is not None:
+            with open(dst, "rb") as src, tarfile.open(
+                fileobj=decompress(src), mode="r|"
+            ) as tar:
+                extract_archive(tar, extract_to)
+        return dst
+
+    state = load_download_state(dst)
+    if state is None or state.etag != info.etag or state.size != info.size:
+        state = DownloadState(etag=info.etag, size=info.size, part_size=part_size)
+        with open(partial_path, "wb") as f:
+            f.truncate(info.size)
+        save_download_state(dst, state)
+
+    part_count = -(-state.size // state.part_size)
+    parts = _Parts(state.parts, state.part_size, state.size)
+    lock = Lock()
+
+    def part_range(index: int) -> range:
+        return range(
+            index * state.part_size, min((index + 1) * state.part_size, state.size)
+        )
+
+    def fetch_part(index: int) -> None:
+        part = part_range(index)
+        try:
+            _get_range(url, state.etag, fd, part.start, part.stop - 1)
+        except Exception as e:
+            parts.fail(e)
+            raise e
+        with lock:
+            state.parts.append(index)
+            save_download_state(dst, state)
+        parts.mark(index)
+        progress(len(part))
+
+    done = set(state.parts)
+    progress(sum(len(part_range(index)) for index in done))
+    fd = os.open(partial_path, os.O_RDWR)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(fetch_part, index)
+                for index in range(part_count)
+                if index not in done
+            ]
+            try:
+                if extract_to is not None:
+                    reader = io.BufferedReader(
+                        _PrefixReader(fd, state.size, parts), ARCHIVE_CHUNK_SIZE
+                    )
+                    with tarfile.open(fileobj=decompress(reader), mode="r|") as tar:
+                        extract_archive(tar, extract_to)
+                done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+                for future in done:
+                    if future.exception() is not None:
+                        raise future.exception()
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+    finally:
+        os.close(fd)
+
+    verify_etag(
+        partial_path, state.etag, [config.UPLOAD_PART_SIZE, config.MULTIPART_PART_SIZE]
+    )
+    os.replace(partial_path, dst)
+    _state_path(dst).unlink()
+    return dst
+
+
+def download_with_progress(file: File, path: Path, extract: bool) -> Path:
+    """Download a file into a dir with a progress bar, exiting on errors.
+
+    Args:
+        file (File): File object with a presigned GET url
+        path (Path): Dir to download into
+        extract (bool): Extract the archive into the dir while downloading
+
+    Returns:
+        Path: Downloaded file
+    """
+    dst = Path(path).joinpath(f"{file.file_id}.{file.ext}")
+    try:
+        info = probe_object(file.presigned_get)
+        with tqdm(
+            desc=str(file.file_id),
+            total=info.size,
+            unit="iB",
+            unit_scale=True,
+            unit_divisor=1024,
+        ) as t:
+            return download_file(
+                file.presigned_get,
+                dst,
+                info,
+                progress=t.update,
+                extract_to=Path(path) if extract else None,
+            )
+    except Exception as e:
+        click.secho(f"Error occured: {e}\n", fg="red")
+        click.secho("Run the same command again to resume.\n\n Exiting....")
+        sys.exit(1)
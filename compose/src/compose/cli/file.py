@@ -0,0 +1,51 @@
+"""File commands."""
+
+from pathlib import Path
+from pprint import pformat
+import sys
+
+import click
+
+from compose.blocs.file import get_file
+from compose.cli.upload import upload_dir_with_progress
+from compose.configs import config_registry
+from compose.schemas.api.file.get import FileGetQueryParams, FileQueryType
+from compose.utils.auth import check_auth
+
+
+config = config_registry.get_config()
+
+
+@click.command()
+@click.option("--file_id", "-i", required=True)
+@click.argument("path")
+def upload(file_id, path) -> None:  # noqa: ANN001
+    """Upload a dir to a file object, resuming an interrupted upload."""
+    # Check Authorization
+    user = check_auth(config)
+    # noqa: DAR101
+    query_params = FileGetQueryParams(
+        query_type=FileQueryType.GET_FILE_BY_ID, file_id=file_id
+    )
+    fetched_file = get_file(query_params, user)
+    if len(fetched_file) == 0:
+        click.secho("File not found!\n\n")
+        sys.exit(0)
+    file = fetched_file[0]
+
+    click.secho("Starting file upload...", fg="green")
+    updated_file = upload_dir_with_progress(Path(path), file, user)
+    click.echo(
+        click.style("\nFile object updated: ", fg="green")
+        + f"\n\n{pformat(updated_file.dict())}\n"
+    )
+    click.secho("All done!", fg="green")
+
+
+@click.group()
+def file() -> None:
+    """File commands."""
+    pass
+
+
+file.add_command(upload)
@@ -12,6 +12,7 @@ from blackcap.schemas.api.auth.post import AuthPOSTRequest
 import click
 
 from compose.cli.data import data
+from compose.cli.file import file
 from compose.cli.mine import mine
 from compose.cli.template import template
 from .. import __version__
@@ -51,5 +52,6 @@ main.add_command(sched)
 main.add_command(login)
 main.add_command(sub)
 main.add_command(data)
+main.add_command(file)
 main.add_command(template)
 main.add_command(mine)
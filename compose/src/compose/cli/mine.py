@@ -1,7 +1,6 @@
 """Mine commands."""
 
 import json
-import os
 from pathlib import Path
 from pprint import pformat
 import shutil
@@ -11,20 +10,20 @@ from tempfile import TemporaryDirectory
 import click
 import requests
 from tqdm import tqdm
-from tqdm.utils import CallbackIOWrapper
 
 from compose.blocs.data import get_data
-from compose.blocs.file import create_file, get_file, update_file
+from compose.blocs.file import create_file, get_file
 from compose.blocs.mine import create_mine, get_mine, update_mine
 from compose.blocs.rendered_template import (
     create_rendered_template,
     update_rendered_template,
 )
 from compose.blocs.template import get_template
+from compose.cli.download import download_with_progress
+from compose.cli.upload import upload_dir_with_progress
 from compose.configs import config_registry
 from compose.schemas.api.data.get import DataGetQueryParams, DataQueryType
 from compose.schemas.api.file.get import FileGetQueryParams, FileQueryType
-from compose.schemas.api.file.put import FileUpdate
 from compose.schemas.api.mine.get import MineGetQueryParams, MineQueryType
 from compose.schemas.api.mine.put import MineUpdate
 from compose.schemas.api.rendered_template.put import RenderedTemplateUpdate
@@ -33,25 +32,12 @@ from compose.schemas.file import File
 from compose.schemas.mine import Mine
 from compose.schemas.template import RenderedTemplate
 from compose.utils.auth import check_auth
+from compose.utils.codec import Codec
 
 
 config = config_registry.get_config()
 
 
-def make_archive(name: str, in_path: Path, out_path: Path) -> str:
-    """Create archive in a temp dir.
-
-    Args:
-        name (str): name of the archive excluding ext
-        in_path (Path): dir to archive
-        out_path (Path): output dir
-
-    Returns:
-        str: Path of created archive
-    """
-    return shutil.make_archive(out_path.joinpath(name), "tar", in_path)
-
-
 @click.command()
 @click.option("--name", required=True)
 @click.option("--desc")
@@ -173,18 +159,10 @@ def create(name, desc, pref, template_id, data_ids) -> None:  # noqa: C901, ANN0
             Path(tempd).joinpath("template"), Path(tempd).joinpath("rendered")
         )
 
-        archive_path = make_archive(
-            "rendered", Path(tempd).joinpath("rendered"), Path(tempd)
-        )
-        click.secho(
-            click.style("Rendered archive created at: ", fg="green")
-            + f"{Path(archive_path).absolute()}\n"
-        )
-
         # Create file in db
         file = File(
             name=name,
-            ext="tar",
+            ext=Codec(config.ARCHIVE_CODEC).ext,
             file_type="rendered_template",
             parent_id=created_rendered_template.rendered_template_id,
         )
@@ -234,35 +212,11 @@ def create(name, desc, pref, template_id, data_ids) -> None:  # noqa: C901, ANN0
             + f"\n\n{pformat(updated_rendered_template.dict())}\n"
         )
 
-        # Upload file
+        # Stream the archive and mark the file uploaded
         click.secho("Starting file upload...", fg="green")
-        archive_file_size = os.stat(archive_path).st_size
-        try:
-            with open(archive_path, "rb") as f:
-                with tqdm(
-                    total=archive_file_size,
-                    unit="B",
-                    unit_scale=True,
-                    unit_divisor=1024,
-                ) as t:
-                    wrapped_file = CallbackIOWrapper(t.update, f, "read")
-                    requests.put(
-                        url=created_file.presigned_url,
-                        data=wrapped_file,
-                    )
-        except Exception as e:
-            click.secho(f"Error occured: {e}\n\n Exiting....")
-            sys.exit(1)
-
-        click.secho("\nUpload done!", fg="green")
-
-        # Update file status to uploaded in db
-        file_update = FileUpdate(file_id=created_file.file_id, uploaded=True)
-        try:
-            updated_file = update_file(file_update)
-        except Exception as e:
-            click.secho(f"Error occured: {e}\n\n Exiting....")
-            sys.exit(1)
+        updated_file = upload_dir_with_progress(
+            Path(tempd).joinpath("rendered"), created_file, user
+        )
         click.echo(
             click.style("\nFile object updated: ", fg="green")
             + f"\n\n{pformat(updated_file.dict())}\n"
@@ -345,26 +299,9 @@ def get(mine_id, extract, path) -> None:  # noqa: c901, ANN001
     click.echo(
         click.style("File object:", fg="green") + f"\n\n{pformat(file.dict())}\n"
     )
-    # Download file
+    # Download file, extracting the archive on the fly if asked
     click.secho("Starting file download...", fg="green")
-    resp = requests.get(file.presigned_url, stream=True)
-    total = int(resp.headers.get("content-length", 0))
-    with open(
-        Path(path).joinpath(f"{file.file_id}.{file.ext}"), "wb"
-    ) as download_file, tqdm(
-        desc=str(file.file_id),
-        total=total,
-        unit="iB",
-        unit_scale=True,
-        unit_divisor=1024,
-    ) as bar:
-        for data in resp.iter_content(chunk_size=1024):
-            size = download_file.write(data)
-            bar.update(size)
-    # Unpack archive
-    if extract:
-        click.secho("Unpacking archive...", fg="green")
-        shutil.unpack_archive(Path(path).joinpath(f"{file.file_id}.{file.ext}"))
+    download_with_progress(file, Path(path), extract)
 
     # TODO: Download related source data files and database dumps
     click.secho("All done!", fg="green")
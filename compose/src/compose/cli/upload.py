@@ -0,0 +1,298 @@
+"""Multipart, resumable directory uploads for CLI commands."""
+
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import os
+from pathlib import Path
+import sys
+import tarfile
+from tempfile import NamedTemporaryFile
+from threading import BoundedSemaphore, Lock
+import time
+from typing import BinaryIO, Callable, Dict, Iterator, Optional, Tuple
+
+from blackcap.schemas.user import User
+import click
+from pydantic import BaseModel
+import requests
+from tqdm import tqdm
+
+from compose.blocs.file import (
+    abort_multipart_upload,
+    complete_multipart_upload,
+    create_multipart_upload,
+    create_part_presigned_urls,
+    list_uploaded_parts,
+    update_file,
+)
+from compose.configs import config_registry
+from compose.schemas.api.file.put import FileUpdate
+from compose.schemas.file import File
+from compose.utils.codec import Codec, compress
+from compose.utils.io import pipe_stream
+from compose.utils.multipart import NoSuchUploadError
+
+
+config = config_registry.get_config()
+
+PART_RETRIES = 3
+
+
+class UploadState(BaseModel):
+    """Persisted state of a multipart upload."""
+
+    file_id: str
+    upload_id: str
+    path: str
+    part_size: int
+    # Part number to etag of uploaded parts
+    parts: Dict[int, str] = {}
+    # Part number to md5 hex digest of the uploaded data
+    digests: Dict[int, str] = {}
+
+
+class UploadMismatchError(Exception):
+    """Source changed since the interrupted upload started."""
+
+    pass
+
+
+def _state_path(file: File) -> Path:
+    return Path(config.UPLOAD_STATE_DIR).joinpath(f"{file.file_id}.json")
+
+
+def _discard_upload(file: File, user: User, upload_id: str) -> None:
+    """Abort an upload that can't be resumed and forget its state."""
+    try:
+        abort_multipart_upload(file, user, upload_id)
+    except Exception:
+        # Logged by the bloc, a leftover upload only holds storage
+        pass
+    _state_path(file).unlink(missing_ok=True)
+
+
+def load_upload_state(file: File) -> Optional[UploadState]:
+    """Load persisted state of an interrupted upload.
+
+    Args:
+        file (File): File object
+
+    Returns:
+        Optional[UploadState]: Upload state if any
+    """
+    state_path = _state_path(file)
+    if not state_path.exists():
+        return None
+    return UploadState.parse_file(state_path)
+
+
+def save_upload_state(state: UploadState) -> None:
+    """Persist upload state atomically.
+
+    Args:
+        state (UploadState): Upload state
+    """
+    state_dir = Path(config.UPLOAD_STATE_DIR)
+    state_dir.mkdir(parents=True, exist_ok=True)
+    with NamedTemporaryFile("w", dir=state_dir, delete=False) as tmp:
+        tmp.write(state.json())
+    os.replace(tmp.name, state_dir.joinpath(f"{state.file_id}.json"))
+
+
+def write_dir_archive(path: Path, dst: BinaryIO, codec: Codec = Codec.NONE) -> None:
+    """Stream a compressed tar archive of a dir.
+
+    Entries are added in sorted order, so an unchanged dir always produces
+    the same bytes and an interrupted upload can be resumed.
+
+    Args:
+        path (Path): Dir to archive
+        dst (BinaryIO): Writable destination
+        codec (Codec): Compression codec
+    """
+    with compress(dst, codec) as writer, tarfile.open(fileobj=writer, mode="w|") as tar:
+        tar.add(path, arcname=".")
+
+
+def iter_parts(stream: BinaryIO, part_size: int) -> Iterator[Tuple[int, bytes]]:
+    """Split a stream into numbered parts.
+
+    Args:
+        stream (BinaryIO): Readable stream
+        part_size (int): Size of every part but the last
+
+    Yields:
+        Tuple[int, bytes]: Part number starting from 1 and part data
+    """
+    part_number = 1
+    while True:
+        data = stream.read(part_size)
+        if not data:
+            return
+        yield part_number, data
+        part_number += 1
+
+
+def _put_part(url: str, data: bytes) -> str:
+    for attempt in range(PART_RETRIES):
+        try:
+            resp = requests.put(url, data=data)
+            resp.raise_for_status()
+            return resp.headers["ETag"].strip('"')
+        except requests.RequestException:
+            if attempt == PART_RETRIES - 1:
+                raise
+            time.sleep(2**attempt)
+
+
+def upload_dir(
+    path: Path,
+    file: File,
+    user: User,
+    workers: int = config.UPLOAD_WORKERS,
+    part_size: int = config.UPLOAD_PART_SIZE,
+    progress: Callable[[int], object] = lambda size: None,
+) -> File:
+    """Upload a dir as a tar archive to the object of the file.
+
+    The archive is compressed with the codec recorded in the file extension
+    and streamed, its parts are pushed in parallel through per part
+    presigned urls. Uploaded parts are persisted, so running it
+    again for the same file, dir and part size resumes an interrupted
+    upload. Otherwise the interrupted upload is aborted and started over.
+
+    Args:
+        path (Path): Dir to upload
+        file (File): File object
+        user (User): User credentials.
+        workers (int): Number of parts uploaded concurrently
+        part_size (int): Part size in bytes, at least 5 MiB
+        progress (Callable[[int], object]): Called with the size of done parts
+
+    Raises:
+        UploadMismatchError: Dir changed since the interrupted upload, which
+            is aborted so that the next run starts over
+
+    Returns:
+        File: Updated file object
+    """
+    path = Path(path).absolute()
+    state = load_upload_state(file)
+    if state is not None and (state.path, state.part_size) != (str(path), part_size):
+        # Parts of another dir or split at other offsets can't be reused
+        _discard_upload(file, user, state.upload_id)
+        state = None
+    if state is not None:
+        try:
+            # Only trust parts that made it to the object storage
+            stored_parts = list_uploaded_parts(file, user, state.upload_id)
+        except NoSuchUploadError:
+            # Completed, aborted or expired on the object storage
+            state = None
+        else:
+            state.parts = {
+                part_number: etag
+                for part_number, etag in state.parts.items()
+                if stored_parts.get(part_number) == etag
+            }
+    if state is None:
+        state = UploadState(
+            file_id=str(file.file_id),
+            upload_id=create_multipart_upload(file, user),
+            path=str(path),
+            part_size=part_size,
+        )
+    save_upload_state(state)
+
+    lock = Lock()
+    errors = []
+
+    def upload_part(part_number: int, data: bytes, md5: str) -> None:
+        try:
+            url = create_part_presigned_urls(
+                file, user, state.upload_id, [part_number]
+            )[part_number]
+            etag = _put_part(url, data)
+        except Exception as e:
+            errors.append(e)
+            raise e
+        with lock:
+            state.parts[part_number] = etag
+            state.digests[part_number] = md5
+            save_upload_state(state)
+        progress(len(data))
+
+    # Bound the parts held in memory while workers are busy
+    slots = BoundedSemaphore(workers * 2)
+    last_part_number = 0
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor, pipe_stream(
+            lambda dst: write_dir_archive(path, dst, Codec.from_ext(file.ext))
+        ) as stream:
+            futures = []
+            for part_number, data in iter_parts(stream, state.part_size):
+                last_part_number = part_number
+                md5 = hashlib.md5(data).hexdigest()  # noqa: S303
+                if part_number in state.parts:
+                    if state.digests.get(part_number) != md5:
+                        raise UploadMismatchError(
+                            f"{path} changed since the upload of {file.file_id} "
+                            "started, run again to start over"
+                        )
+                    progress(len(data))
+                    continue
+                slots.acquire()
+                if errors:
+                    # Stop reading as soon as a part failed, uploaded parts are kept
+                    raise errors[0]
+                future = executor.submit(upload_part, part_number, data, md5)
+                future.add_done_callback(lambda _: slots.release())
+                futures.append(future)
+            for future in futures:
+                future.result()
+    except UploadMismatchError:
+        # Workers are done once the executor exits, no part is saved after this
+        _discard_upload(file, user, state.upload_id)
+        raise
+
+    complete_multipart_upload(
+        file,
+        user,
+        state.upload_id,
+        {
+            part_number: etag
+            for part_number, etag in state.parts.items()
+            if part_number <= last_part_number
+        },
+    )
+    _state_path(file).unlink()
+    return update_file([FileUpdate(file_id=file.file_id, uploaded=True)], user)[0]
+
+
+def upload_dir_with_progress(path: Path, file: File, user: User) -> File:
+    """Upload a dir with a progress bar, exiting with a resume hint on errors.
+
+    Args:
+        path (Path): Dir to upload
+        file (File): File object
+        user (User): User credentials.
+
+    Returns:
+        File: Updated file object
+    """
+    total = None
+    if Codec.from_ext(file.ext) == Codec.NONE:
+        # Size of a compressed archive is only known once it is written
+        total = sum(
+            entry.stat().st_size for entry in Path(path).rglob("*") if entry.is_file()
+        )
+    try:
+        with tqdm(total=total, unit="B", unit_scale=True, unit_divisor=1024) as t:
+            return upload_dir(path, file, user, progress=t.update)
+    except Exception as e:
+        click.secho(f"Error occured: {e}\n", fg="red")
+        click.secho(
+            f"Resume with: compose file upload --file_id {file.file_id} {path}"
+            "\n\n Exiting...."
+        )
+        sys.exit(1)
@@ -3,7 +3,7 @@
 from typing import List
 
 from blackcap.configs.default import DefaultConfig
-from xdg import xdg_data_home
+from xdg import xdg_cache_home, xdg_data_home, xdg_state_home
 
 
 class ComposeDefaultConfig(DefaultConfig):
@@ -15,8 +15,23 @@ class ComposeDefaultConfig(DefaultConfig):
     MINIO_ACCESS_KEY: str = "minioaccess"
     MINIO_SECRET_KEY: str = "minioaccess"
     MINIO_SECURE: bool = False
+    PRESIGNED_URL_CACHE_SIZE: int = 10000
+    PRESIGNED_URL_REFRESH_MARGIN: int = 86400
+    MULTIPART_PART_SIZE: int = 16 * 1024 * 1024
+    RENDER_WORKERS: int = 8
+    TEMPLATE_CACHE_SIZE: int = 256 * 1024 * 1024
+    TEMPLATE_MAX_RENDER_SIZE: int = 1024 * 1024
+    ARCHIVE_CACHE_DIR: str = str(xdg_cache_home() / "imcloud" / "archives")
+    ARCHIVE_CACHE_SIZE: int = 10 * 1024 * 1024 * 1024
+    UPLOAD_PART_SIZE: int = 64 * 1024 * 1024
+    UPLOAD_WORKERS: int = 4
+    UPLOAD_STATE_DIR: str = str(xdg_state_home() / "imcloud" / "uploads")
+    DOWNLOAD_PART_SIZE: int = 16 * 1024 * 1024
+    DOWNLOAD_WORKERS: int = 8
+    ARCHIVE_CODEC: str = "zstd"
     MESSENGER: str = "NATS"
     CLUSTER: str = "ARGO"
+    COMPOSE_TASK_QUEUE: str = "compose"
     DB_NAME: str = "compose"
     DB_URI: str = f"sqlite:////{xdg_data_home() / ('imcloud') / ('compose.db')}"
     CORS_SUPPORTS_CREDENTIALS: bool = True
@@ -3,14 +3,15 @@
 from http import HTTPStatus
 
 from blackcap.schemas.user import User
-from flask import make_response, request, Response
+from flask import make_response, request, Response, stream_with_context
 from pydantic import ValidationError
 from sqlalchemy.exc import SQLAlchemyError
 
-from compose.blocs.data import get_data
+from compose.blocs.data import get_data_page, stream_data
 from compose.routes.data import data_bp
 from compose.schemas.api.data.get import DataGetQueryParams, DataGetResponse
 from compose.utils.auth import check_authentication
+from compose.utils.pagination import prime_stream, stream_list_response
 
 
 @data_bp.get("/")
@@ -40,7 +41,10 @@ def get(user: User) -> Response:
 
     # Get data from the DB
     try:
-        data_list = get_data(query_params, user)
+        if query_params.stream:
+            data_stream = prime_stream(stream_data(query_params, user))
+        else:
+            data_list, next_cursor = get_data_page(query_params, user)
     except SQLAlchemyError:
         response_body = DataGetResponse(
             msg="internal databse error", errors={"main": ["unknown internal error"]}
@@ -57,8 +61,22 @@ def get(user: User) -> Response:
         )
         return make_response(response_body.json(), HTTPStatus.INTERNAL_SERVER_ERROR)
 
+    # stream fetched data in response
+    if query_params.stream:
+        return Response(
+            stream_with_context(
+                stream_list_response(
+                    "data successfully retrieved", "data_list", data_stream
+                )
+            ),
+            status=HTTPStatus.OK,
+            mimetype="application/json",
+        )
+
     # return fetched data in response
     response_body = DataGetResponse(
-        msg="data successfully retrieved", items={"data_list": data_list}
+        msg="data successfully retrieved",
+        items={"data_list": data_list},
+        next_cursor=next_cursor,
     )
     return make_response(response_body.json(), HTTPStatus.OK)
@@ -3,14 +3,15 @@
 from http import HTTPStatus
 
 from blackcap.schemas.user import User
-from flask import make_response, request, Response
+from flask import make_response, request, Response, stream_with_context
 from pydantic import ValidationError
 from sqlalchemy.exc import SQLAlchemyError
 
-from compose.blocs.file import get_file
+from compose.blocs.file import get_file_page, stream_file
 from compose.routes.file import file_bp
 from compose.schemas.api.file.get import FileGetQueryParams, FileGetResponse
 from compose.utils.auth import check_authentication
+from compose.utils.pagination import prime_stream, stream_list_response
 
 
 @file_bp.get("/")
@@ -40,7 +41,10 @@ def get(user: User) -> Response:
 
     # Get file from the DB
     try:
-        file_list = get_file(query_params, user)
+        if query_params.stream:
+            file_stream = prime_stream(stream_file(query_params, user))
+        else:
+            file_list, next_cursor = get_file_page(query_params, user)
     except SQLAlchemyError:
         response_body = FileGetResponse(
             msg="Something bad happened. Please try again after some time",
@@ -54,8 +58,22 @@ def get(user: User) -> Response:
         )
         return make_response(response_body.json(), HTTPStatus.INTERNAL_SERVER_ERROR)
 
+    # stream fetched file in response
+    if query_params.stream:
+        return Response(
+            stream_with_context(
+                stream_list_response(
+                    "Files retrieved successfully", "file_list", file_stream
+                )
+            ),
+            status=HTTPStatus.OK,
+            mimetype="application/json",
+        )
+
     # return fetched file in response
     response_body = FileGetResponse(
-        msg="Files retrieved successfully", items={"file_list": file_list}
+        msg="Files retrieved successfully",
+        items={"file_list": file_list},
+        next_cursor=next_cursor,
     )
     return make_response(response_body.json(), HTTPStatus.OK)
@@ -0,0 +1,61 @@
+"""Mine flow API routes."""
+
+from http import HTTPStatus
+
+from blackcap.schemas.user import User
+from flask import Blueprint, make_response, request, Response
+from pydantic import ValidationError
+
+from compose.blocs.flow_run import get_flow_run
+from compose.schemas.api.mine.flow.get import FlowRunGetQueryParams, FlowRunGetResponse
+from compose.utils.auth import check_authentication
+
+
+mine_flow_bp = Blueprint("mine_flow", __name__, url_prefix="/flow")
+
+
+@mine_flow_bp.get("/")
+@check_authentication
+def get(user: User) -> Response:
+    """Get progress of a queued mine flow.
+
+    Args:
+        user (User): user extracted from token.
+
+    Returns:
+        Response: Flask response
+    """
+    # Parse query params from request
+    try:
+        query_params = FlowRunGetQueryParams.parse_obj(request.args)
+    except ValidationError as e:
+        response_body = FlowRunGetResponse(
+            msg="query validation error", errors={"main": e.errors()}
+        )
+        return make_response(response_body.json(), HTTPStatus.BAD_REQUEST)
+    except Exception:
+        response_body = FlowRunGetResponse(
+            msg="unknown error", errors={"main": ["unknown internal error"]}
+        )
+        return make_response(response_body.json(), HTTPStatus.INTERNAL_SERVER_ERROR)
+
+    # Get flow run from the result backend
+    try:
+        flow_run = get_flow_run(query_params.flow_run_id, user)
+    except Exception:
+        response_body = FlowRunGetResponse(
+            msg="unknown error", errors={"main": ["unknown internal error"]}
+        )
+        return make_response(response_body.json(), HTTPStatus.INTERNAL_SERVER_ERROR)
+
+    if flow_run is None:
+        response_body = FlowRunGetResponse(
+            msg="flow run not found", errors={"main": ["flow run not found"]}
+        )
+        return make_response(response_body.json(), HTTPStatus.NOT_FOUND)
+
+    # return flow run in response
+    response_body = FlowRunGetResponse(
+        msg="data successfully retrieved", items={"flow_run_list": [flow_run]}
+    )
+    return make_response(response_body.json(), HTTPStatus.OK)
@@ -3,14 +3,15 @@
 from http import HTTPStatus
 
 from blackcap.schemas.user import User
-from flask import make_response, request, Response
+from flask import make_response, request, Response, stream_with_context
 from pydantic import ValidationError
 from sqlalchemy.exc import SQLAlchemyError
 
-from compose.blocs.mine import get_mine
+from compose.blocs.mine import get_mine_page, stream_mine
 from compose.routes.mine import mine_bp
 from compose.schemas.api.mine.get import MineGetQueryParams, MineGetResponse
 from compose.utils.auth import check_authentication
+from compose.utils.pagination import prime_stream, stream_list_response
 
 
 @mine_bp.get("/")
@@ -40,7 +41,10 @@ def get(user: User) -> Response:
 
     # Get mines from the DB
     try:
-        mine_list = get_mine(query_params, user)
+        if query_params.stream:
+            mine_stream = prime_stream(stream_mine(query_params, user))
+        else:
+            mine_list, next_cursor = get_mine_page(query_params, user)
     except SQLAlchemyError:
         response_body = MineGetResponse(
             msg="internal databse error", errors={"main": ["unknown internal error"]}
@@ -55,8 +59,22 @@ def get(user: User) -> Response:
         )
         return make_response(response_body.json(), HTTPStatus.INTERNAL_SERVER_ERROR)
 
+    # stream fetched mines in response
+    if query_params.stream:
+        return Response(
+            stream_with_context(
+                stream_list_response(
+                    "data successfully retrieved", "mine_list", mine_stream
+                )
+            ),
+            status=HTTPStatus.OK,
+            mimetype="application/json",
+        )
+
     # return fetched mines in response
     response_body = MineGetResponse(
-        msg="data successfully retrieved", items={"mine_list": mine_list}
+        msg="data successfully retrieved",
+        items={"mine_list": mine_list},
+        next_cursor=next_cursor,
     )
     return make_response(response_body.json(), HTTPStatus.OK)
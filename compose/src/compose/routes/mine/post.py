@@ -9,6 +9,7 @@ from flask import make_response, request, Response
 from pydantic import parse_obj_as, ValidationError
 
 
+from compose.blocs.flow_run import queue_create_mine_flow
 from compose.blocs.mine import generate_create_mine_flow
 from compose.routes.mine import mine_bp
 from compose.schemas.api.mine.post import MinePOSTRequest, MinePOSTResponse
@@ -28,9 +29,8 @@ def post(user: User) -> Response:  # noqa: C901
     """
     # Parse json from request
     try:
-        mine_create_request_list = parse_obj_as(
-            MinePOSTRequest, json.loads(request.data)
-        ).mine_list
+        mine_post_request = parse_obj_as(MinePOSTRequest, json.loads(request.data))
+        mine_create_request_list = mine_post_request.mine_list
     except ValidationError as e:
         response_body = MinePOSTResponse(
             msg="json validation failed", errors={"main": e.errors()}
@@ -42,6 +42,20 @@ def post(user: User) -> Response:  # noqa: C901
         )
         return make_response(response_body.json(), HTTPStatus.INTERNAL_SERVER_ERROR)
 
+    # Queue the flow and return the flow run to poll
+    if mine_post_request.run_async:
+        try:
+            flow_run = queue_create_mine_flow(mine_create_request_list, user)
+        except Exception:
+            response_body = MinePOSTResponse(
+                msg="unknown error", errors={"main": ["unknown internal error"]}
+            )
+            return make_response(response_body.json(), HTTPStatus.INTERNAL_SERVER_ERROR)
+        response_body = MinePOSTResponse(
+            msg="mine creation queued", items={"flow_run_list": [flow_run]}
+        )
+        return make_response(response_body.json(), HTTPStatus.ACCEPTED)
+
     # Generate create mine flow
     try:
         create_mine_flow = generate_create_mine_flow(mine_create_request_list, user)
@@ -3,14 +3,15 @@
 from http import HTTPStatus
 
 from blackcap.schemas.user import User
-from flask import make_response, request, Response
+from flask import make_response, request, Response, stream_with_context
 from pydantic import ValidationError
 from sqlalchemy.exc import SQLAlchemyError
 
-from compose.blocs.template import get_template
+from compose.blocs.template import get_template_page, stream_template
 from compose.routes.template import template_bp
 from compose.schemas.api.template.get import TemplateGetQueryParams, TemplateGetResponse
 from compose.utils.auth import check_authentication
+from compose.utils.pagination import prime_stream, stream_list_response
 
 
 @template_bp.get("/")
@@ -40,7 +41,10 @@ def get(user: User) -> Response:
 
     # Get template from the DB
     try:
-        template_list = get_template(query_params, user)
+        if query_params.stream:
+            template_stream = prime_stream(stream_template(query_params, user))
+        else:
+            template_list, next_cursor = get_template_page(query_params, user)
     except SQLAlchemyError:
         response_body = TemplateGetResponse(
             msg="internal databse error", errors={"main": ["unknown internal error"]}
@@ -52,8 +56,22 @@ def get(user: User) -> Response:
         )
         return make_response(response_body.json(), HTTPStatus.INTERNAL_SERVER_ERROR)
 
+    # stream fetched template in response
+    if query_params.stream:
+        return Response(
+            stream_with_context(
+                stream_list_response(
+                    " successfully retrieved", "template_list", template_stream
+                )
+            ),
+            status=HTTPStatus.OK,
+            mimetype="application/json",
+        )
+
     # return fetched templates in response
     response_body = TemplateGetResponse(
-        msg=" successfully retrieved", items={"template_list": template_list}
+        msg=" successfully retrieved",
+        items={"template_list": template_list},
+        next_cursor=next_cursor,
     )
     return make_response(response_body.json(), HTTPStatus.OK)
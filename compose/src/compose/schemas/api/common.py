@@ -1 +1,71 @@
 """Compose common schemas."""
+
+import base64
+from datetime import datetime
+import json
+from typing import Optional, Tuple
+from uuid import UUID
+
+from pydantic import BaseModel, conint, validator
+
+
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(created_at: datetime, obj_id: UUID) -> str:
+    """Encode keyset cursor of a row.
+
+    Args:
+        created_at (datetime): Creation time of the row
+        obj_id (UUID): Id of the row
+
+    Returns:
+        str: Opaque cursor
+    """
+    raw = json.dumps({"created_at": created_at.isoformat(), "id": str(obj_id)})
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Decode keyset cursor.
+
+    Args:
+        cursor (str): Opaque cursor
+
+    Returns:
+        Tuple[datetime, UUID]: Creation time and id of the last seen row
+    """
+    raw = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return datetime.fromisoformat(raw["created_at"]), UUID(raw["id"])
+
+
+class PaginationQueryParams(BaseModel):
+    """Keyset pagination query params schema.
+
+    Rows are ordered by (created_at, id). `cursor` is the `next_cursor`
+    returned with the previous page.
+    """
+
+    limit: Optional[conint(gt=0, le=MAX_PAGE_SIZE)]  # type: ignore
+    cursor: Optional[str]
+    stream: bool = False
+
+    @validator("cursor")
+    def check_cursor(cls: "PaginationQueryParams", v: Optional[str]) -> Optional[str]:
+        """Validate cursor.
+
+        Args:
+            v (Optional[str]): cursor
+
+        Raises:
+            ValueError: Cursor is malformed
+
+        Returns:
+            Optional[str]: cursor
+        """
+        if v is not None:
+            try:
+                decode_cursor(v)
+            except Exception as e:
+                raise ValueError("invalid cursor") from e
+        return v
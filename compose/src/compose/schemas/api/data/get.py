@@ -4,9 +4,9 @@ from enum import Enum, unique
 from typing import Any, Dict, List, Optional, Union
 
 from blackcap.schemas.api.common import ResponseSchema
-from pydantic import BaseModel
 from pydantic.types import UUID4
 
+from compose.schemas.api.common import PaginationQueryParams
 from compose.schemas.data import Data
 
 
@@ -19,7 +19,7 @@ class DataQueryType(Enum):
     GET_DATA_BY_PROTAGONIST_ID = "get_data_by_protagonist_id"
 
 
-class DataGetQueryParams(BaseModel):
+class DataGetQueryParams(PaginationQueryParams):
     """Data GET request query params schema."""
 
     query_type: DataQueryType
@@ -31,3 +31,4 @@ class DataGetResponse(ResponseSchema):
     """Data GET response schema."""
 
     items: Dict[str, List[Union[Data, Any]]] = {}
+    next_cursor: Optional[str]
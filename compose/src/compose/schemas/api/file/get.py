@@ -4,9 +4,9 @@ from enum import Enum, unique
 from typing import Any, Dict, List, Optional, Union
 
 from blackcap.schemas.api.common import ResponseSchema
-from pydantic import BaseModel
 from pydantic.types import UUID4
 
+from compose.schemas.api.common import PaginationQueryParams
 from compose.schemas.file import File
 
 
@@ -19,7 +19,7 @@ class FileQueryType(Enum):
     GET_FILES_BY_PROTAGONIST_ID = "get_files_by_protagonist_id"
 
 
-class FileGetQueryParams(BaseModel):
+class FileGetQueryParams(PaginationQueryParams):
     """File GET request query params schema."""
 
     query_type: FileQueryType
@@ -31,3 +31,4 @@ class FileGetResponse(ResponseSchema):
     """File GET response schema."""
 
     items: Dict[str, List[Union[File, Any]]] = {}
+    next_cursor: Optional[str]
@@ -0,0 +1 @@
+"""Mine Flow API schemas."""
@@ -0,0 +1,21 @@
+"""Mine Flow API GET schema."""
+
+from typing import Any, Dict, List, Union
+
+from blackcap.schemas.api.common import ResponseSchema
+from pydantic import BaseModel
+from pydantic.types import UUID4
+
+from compose.schemas.flow_run import FlowRun
+
+
+class FlowRunGetQueryParams(BaseModel):
+    """Flow run GET request query params schema."""
+
+    flow_run_id: UUID4
+
+
+class FlowRunGetResponse(ResponseSchema):
+    """Flow run GET response schema."""
+
+    items: Dict[str, List[Union[FlowRun, Any]]] = {}
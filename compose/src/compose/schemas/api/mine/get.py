@@ -4,9 +4,9 @@ from enum import Enum, unique
 from typing import Any, Dict, List, Optional, Union
 
 from blackcap.schemas.api.common import ResponseSchema
-from pydantic import BaseModel
 from pydantic.types import UUID4
 
+from compose.schemas.api.common import PaginationQueryParams
 from compose.schemas.mine import Mine
 
 
@@ -19,7 +19,7 @@ class MineQueryType(Enum):
     GET_MINES_BY_PROTAGONIST_ID = "get_mines_by_protagonist_id"
 
 
-class MineGetQueryParams(BaseModel):
+class MineGetQueryParams(PaginationQueryParams):
     """Mine GET request query params schema."""
 
     query_type: MineQueryType
@@ -31,3 +31,4 @@ class MineGetResponse(ResponseSchema):
     """Mine GET response schema."""
 
     items: Dict[str, List[Union[Mine, Any]]] = {}
+    next_cursor: Optional[str]
@@ -6,6 +6,7 @@ from typing import Any, Dict, List, Union, Optional
 from blackcap.schemas.api.common import ResponseSchema
 from pydantic import BaseModel, UUID4
 
+from compose.schemas.flow_run import FlowRun
 from compose.schemas.mine import Mine
 
 
@@ -27,9 +28,11 @@ class MinePOSTRequest(BaseModel):
     """Mine POST request schema."""
 
     mine_list: List[MineCreate]
+    # Queue the flow and poll /v1/mine/flow/ instead of waiting for it
+    run_async: bool = False
 
 
 class MinePOSTResponse(ResponseSchema):
     """Mine POST response schema."""
 
-    items: Dict[str, List[Union[Mine, Any]]] = {}
+    items: Dict[str, List[Union[Mine, FlowRun, Any]]] = {}
@@ -4,9 +4,9 @@ from enum import Enum, unique
 from typing import Any, Dict, List, Optional, Union
 
 from blackcap.schemas.api.common import ResponseSchema
-from pydantic import BaseModel
 from pydantic.types import UUID4
 
+from compose.schemas.api.common import PaginationQueryParams
 from compose.schemas.template import Template
 
 
@@ -19,7 +19,7 @@ class TemplateQueryType(Enum):
     GET_TEMPLATES_BY_PROTAGONIST_ID = "get_templates_by_protagonist_id"
 
 
-class TemplateGetQueryParams(BaseModel):
+class TemplateGetQueryParams(PaginationQueryParams):
     """Template GET request query params schema."""
 
     query_type: TemplateQueryType
@@ -32,3 +32,4 @@ class TemplateGetResponse(ResponseSchema):
     """Template GET response schema."""
 
     items: Dict[str, List[Union[Template, Any]]] = {}
+    next_cursor: Optional[str]
@@ -0,0 +1,51 @@
+"""Flow run schema."""
+
+from enum import Enum, unique
+from typing import Any, List, Optional
+
+from pydantic import BaseModel
+from pydantic.types import UUID4
+
+
+@unique
+class FlowRunStatus(Enum):
+    """Status of a queued flow."""
+
+    QUEUED = "queued"
+    EXECUTING = "executing"
+    PASSED = "passed"
+    FAILED = "failed"
+
+
+@unique
+class FlowStepStatus(Enum):
+    """Status of a step of a queued flow."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    ROLLING_BACK = "rolling_back"
+    ROLLED_BACK = "rolled_back"
+    ROLLBACK_FAILED = "rollback_failed"
+
+
+class FlowStepState(BaseModel):
+    """Flow step state schema."""
+
+    index: int
+    name: str
+    status: FlowStepStatus = FlowStepStatus.PENDING
+
+
+class FlowRun(BaseModel):
+    """Flow run schema."""
+
+    flow_run_id: UUID4
+    flow_name: str
+    protagonist_id: UUID4
+    status: FlowRunStatus = FlowRunStatus.QUEUED
+    current_step: Optional[int]
+    steps: List[FlowStepState] = []
+    result: List[Any] = []
+    errors: List[str] = []
@@ -2,14 +2,21 @@
 
 from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Extra
 from pydantic.types import UUID4
 
 
 class TemplateContext(BaseModel):
-    """Template context schema."""
+    """Template context schema.
 
-    pass
+    Holds the values of the template vars, exposed to the template as
+    `cookiecutter.<var>`.
+    """
+
+    class Config:
+        """Keep the values of all template vars."""
+
+        extra = Extra.allow
 
 
 class TemplateVar(BaseModel):
@@ -1 +1,9 @@
-"""Compose celery tasks."""
+"""Compose celery tasks.
+
+Run a worker consuming them with ``celery -A compose.tasks worker -Q compose``,
+where ``compose`` is the ``COMPOSE_TASK_QUEUE`` config.
+"""
+
+from blackcap.workers import celery_app as app  # noqa: F401
+
+from compose.tasks.create_mine import run_create_mine_flow  # noqa: F401
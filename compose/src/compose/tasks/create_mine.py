@@ -0,0 +1,81 @@
+"""Task to execute the create mine flow in a worker."""
+
+import json
+from typing import Any, Dict, List
+
+from blackcap.configs import config_registry
+from blackcap.flow import Executor, FlowExecError, FlowStatus
+from blackcap.schemas.user import User
+from blackcap.workers import celery_app
+from celery import Task
+from logzero import logger
+from pydantic import parse_obj_as
+
+from compose.blocs.mine import generate_create_mine_flow
+from compose.schemas.api.mine.post import MineCreate
+from compose.schemas.flow_run import FlowRun, FlowRunStatus
+from compose.utils.flow import track_flow_progress
+
+config = config_registry.get_config()
+
+celery_app.conf.task_routes = {
+    **celery_app.conf.task_routes,
+    "compose.tasks.*": {"queue": config.COMPOSE_TASK_QUEUE},
+}
+
+
+@celery_app.task(bind=True, name="compose.tasks.run_create_mine_flow")
+def run_create_mine_flow(
+    self: Task,
+    flow_run: Dict[str, Any],
+    mine_create_request_list: List[Dict[str, Any]],
+    user: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Execute the create mine flow and report progress of every step.
+
+    Progress is stored in the result backend under the flow run id so that
+    it can be polled with `compose.blocs.flow_run.get_flow_run`.
+
+    Args:
+        self (Task): Bound celery task
+        flow_run (Dict[str, Any]): Serialized flow run
+        mine_create_request_list (List[Dict[str, Any]]): Serialized mine create requests
+        user (Dict[str, Any]): Serialized user credentials
+
+    Returns:
+        Dict[str, Any]: Serialized flow run
+    """
+    flow_run = FlowRun.parse_obj(flow_run)
+
+    def report(run: FlowRun) -> None:
+        self.update_state(state=run.status.name, meta=json.loads(run.json()))
+
+    try:
+        create_mine_flow = generate_create_mine_flow(
+            parse_obj_as(List[MineCreate], mine_create_request_list),
+            User.parse_obj(user),
+        )
+        track_flow_progress(create_mine_flow, flow_run, report)
+        flow_run.status = FlowRunStatus.EXECUTING
+        report(flow_run)
+
+        executed_flow = Executor(create_mine_flow, {}).run()
+    except Exception as e:
+        logger.error(f"Unable to execute create mine flow due to {e}")
+        flow_run.status = FlowRunStatus.FAILED
+        flow_run.errors = ["unknown internal error"]
+        return json.loads(flow_run.json())
+
+    if executed_flow.status == FlowStatus.PASSED:
+        flow_run.status = FlowRunStatus.PASSED
+        flow_run.result = executed_flow.forward_outputs[-1][0].data
+    else:
+        flow_run.status = FlowRunStatus.FAILED
+        # Executor wraps errors raised by steps, report the step's description
+        flow_run.errors = [
+            error.error.human_description
+            if isinstance(error.error, FlowExecError)
+            else error.human_description
+            for error in executed_flow.errors
+        ]
+    return json.loads(flow_run.json())
@@ -1,30 +1,421 @@
 """Cookie templater."""
 
+from collections import OrderedDict
+from copy import copy
+from dataclasses import dataclass, field
+import io
+import json
 from pathlib import Path
-from typing import Optional
+import posixpath
+import shutil
+import tarfile
+import tempfile
+from threading import Lock
+from typing import Any, BinaryIO, Dict, List, Optional, Union
 
-from cookiecutter.main import cookiecutter
+from cookiecutter.environment import ExtensionLoaderMixin
+from cookiecutter.exceptions import UndefinedVariableInTemplate
+from cookiecutter.generate import apply_overwrites_to_context
+from cookiecutter.prompt import prompt_choice_for_config, render_variable
+from jinja2 import StrictUndefined, Template as JinjaTemplate, UndefinedError
+from jinja2.sandbox import SandboxedEnvironment
 
-from compose.schemas.template import Template, TemplateContext
+from compose.schemas.template import TemplateContext
+from compose.utils.codec import decompress
+from compose.utils.io import ARCHIVE_CHUNK_SIZE
+
+# Template vars and their defaults, at the root of a template
+CONTEXT_FILE = "cookiecutter.json"
+
+
+class UnsafePathError(ValueError):
+    """Rendered member path escapes the output."""
+
+
+class SandboxedStrictEnvironment(ExtensionLoaderMixin, SandboxedEnvironment):
+    """Cookiecutter's StrictEnvironment in the jinja sandbox.
+
+    Templates are uploaded by users, so they can't reach Python internals.
+    Only cookiecutter's default extensions are loaded, never the ones a
+    template lists in its cookiecutter.json.
+    """
+
+    def __init__(self: "SandboxedStrictEnvironment", **kwargs: Any) -> None:
+        super().__init__(undefined=StrictUndefined, **kwargs)
+
+
+def check_member_path(name: str) -> str:
+    """Check that a rendered member path stays inside the output.
+
+    Args:
+        name (str): Rendered member path
+
+    Raises:
+        UnsafePathError: Path is absolute or has a `..` part
+
+    Returns:
+        str: The path
+    """
+    if posixpath.isabs(name) or ".." in name.split("/"):
+        raise UnsafePathError(f"Template renders to a path outside its output: {name}")
+    return name
+
+
+def is_context_file(name: str) -> bool:
+    """Check if an archive member is the cookiecutter.json of the template.
+
+    Args:
+        name (str): Member name
+
+    Returns:
+        bool: True for the root cookiecutter.json
+    """
+    return posixpath.normpath(name) == CONTEXT_FILE
+
+
+class _Unclosed(io.RawIOBase):
+    """Read a stream without closing it along with the readers wrapping it."""
+
+    def __init__(self: "_Unclosed", src: BinaryIO) -> None:
+        self._src = src
+
+    def readable(self: "_Unclosed") -> bool:
+        return True
+
+    def readinto(self: "_Unclosed", buffer: memoryview) -> int:
+        return self._src.readinto(buffer)
+
+
+def read_context_file(src: BinaryIO) -> Optional[Dict[str, Any]]:
+    """Read the cookiecutter.json of a template archive.
+
+    Args:
+        src (BinaryIO): Readable template archive, may be compressed
+
+    Returns:
+        Optional[Dict[str, Any]]: Template vars and defaults, None if missing
+    """
+    with tarfile.open(fileobj=decompress(_Unclosed(src)), mode="r|") as tar:
+        for info in tar:
+            if info.isreg() and is_context_file(info.name):
+                return json.loads(
+                    tar.extractfile(info).read().decode("utf-8"),
+                    object_pairs_hook=OrderedDict,
+                )
+    return None
+
+
+def _render_defaults(
+    env: SandboxedStrictEnvironment, template_context: Dict[str, Any]
+) -> Dict[str, Any]:
+    # cookiecutter's prompt_for_config without input, rendering in `env`
+    variables: Dict[str, Any] = OrderedDict()
+    try:
+        # Dicts may refer to any other var, they are rendered last
+        for key, raw in template_context.items():
+            if key.startswith("_"):
+                variables[key] = raw
+            elif isinstance(raw, list):
+                variables[key] = prompt_choice_for_config(
+                    variables, env, key, raw, True
+                )
+            elif not isinstance(raw, dict):
+                variables[key] = render_variable(env, raw, variables)
+        for key, raw in template_context.items():
+            if isinstance(raw, dict):
+                variables[key] = render_variable(env, raw, variables)
+    except UndefinedError as err:
+        raise UndefinedVariableInTemplate(
+            f"Unable to render variable '{key}'",
+            err,
+            {"cookiecutter": template_context},
+        )
+    return variables
+
+
+def build_variables(
+    template_config: Optional[Dict[str, Any]], context: TemplateContext
+) -> Dict[str, Any]:
+    """Build the jinja variables as `cookiecutter --no-input` does.
+
+    Values of the context override the defaults of cookiecutter.json, then
+    defaults referring to other vars are rendered and choices resolved. Vars
+    of the context missing from cookiecutter.json are kept as well.
+
+    Args:
+        template_config (Optional[Dict[str, Any]]): Parsed cookiecutter.json
+        context (TemplateContext): Render context
+
+    Returns:
+        Dict[str, Any]: Jinja variables
+    """
+    overwrites = context.dict()
+    template_context = OrderedDict(template_config or {})
+    apply_overwrites_to_context(template_context, overwrites)
+    variables = _render_defaults(SandboxedStrictEnvironment(), template_context)
+    for key, value in overwrites.items():
+        variables.setdefault(key, value)
+    return {"cookiecutter": variables}
+
+
+@dataclass
+class CompiledMember:
+    """Archive member with compiled name and content templates."""
+
+    info: tarfile.TarInfo
+    name: JinjaTemplate
+    # Compiled text, raw bytes of binary files or None for non regular files
+    content: Union[JinjaTemplate, bytes, None]
+
+
+@dataclass
+class CompiledTemplate:
+    """Compiled template archive."""
+
+    etag: Optional[str]
+    members: List[CompiledMember] = field(default_factory=list)
+    size: int = 0
+    # Parsed cookiecutter.json, if the template has one
+    template_config: Optional[Dict[str, Any]] = None
 
 
 class CookieTemplater:
-    """Cookie templater."""
+    """Cookie templater.
+
+    Templates follow the cookiecutter layout, file names and text file
+    contents are rendered with `{{ cookiecutter.<var> }}` from the defaults of
+    the template's cookiecutter.json overridden by the context.
+    Compiled template archives are kept in an LRU bounded by their size in
+    bytes and keyed by the template file id. Each entry records the etag of
+    the archive it was compiled from.
+    """
+
+    def __init__(
+        self: "CookieTemplater",
+        cache_size: int = 256 * 1024 * 1024,
+        max_member_size: int = 1024 * 1024,
+    ) -> None:
+        """Initialize templater.
+
+        Args:
+            cache_size (int): Max total size in bytes of cached templates
+            max_member_size (int): Larger files are copied without rendering
+        """
+        self.env = SandboxedStrictEnvironment(keep_trailing_newline=True)
+        self.cache_size = cache_size
+        self.max_member_size = max_member_size
+        self._cache: "OrderedDict[Any, CompiledTemplate]" = OrderedDict()
+        self._cache_used = 0
+        self._lock = Lock()
+
+    def get_compiled(self: "CookieTemplater", key: Any) -> Optional[CompiledTemplate]:
+        """Get a cached compiled template.
+
+        Args:
+            key (Any): Template file id
+
+        Returns:
+            Optional[CompiledTemplate]: Compiled template if cached
+        """
+        with self._lock:
+            compiled = self._cache.get(key)
+            if compiled is not None:
+                self._cache.move_to_end(key)
+            return compiled
+
+    def _put_compiled(
+        self: "CookieTemplater", key: Any, compiled: CompiledTemplate
+    ) -> None:
+        with self._lock:
+            old = self._cache.pop(key, None)
+            if old is not None:
+                self._cache_used -= old.size
+            if compiled.size > self.cache_size:
+                return
+            self._cache[key] = compiled
+            self._cache_used += compiled.size
+            while self._cache_used > self.cache_size:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_used -= evicted.size
+
+    def clear(self: "CookieTemplater") -> None:
+        """Drop all cached templates."""
+        with self._lock:
+            self._cache.clear()
+            self._cache_used = 0
+
+    def compile_member(
+        self: "CookieTemplater", info: tarfile.TarInfo, data: Optional[bytes]
+    ) -> CompiledMember:
+        """Compile name and content of an archive member.
+
+        Args:
+            info (tarfile.TarInfo): Member info
+            data (Optional[bytes]): Member content
+
+        Returns:
+            CompiledMember: Compiled member
+        """
+        content: Union[JinjaTemplate, bytes, None] = data
+        # cookiecutter.json holds jinja defaults, it is copied as is
+        if data is not None and not is_context_file(info.name):
+            try:
+                content = self.env.from_string(data.decode("utf-8"))
+            except UnicodeDecodeError:
+                # Binary files are copied as is
+                pass
+        return CompiledMember(
+            info=info, name=self.env.from_string(info.name), content=content
+        )
+
+    def _add_rendered(
+        self: "CookieTemplater",
+        tar: tarfile.TarFile,
+        member: CompiledMember,
+        variables: Dict[str, Any],
+    ) -> None:
+        info = copy(member.info)
+        info.name = check_member_path(member.name.render(**variables))
+        content = member.content
+        if isinstance(content, JinjaTemplate):
+            content = content.render(**variables).encode("utf-8")
+        if content is None:
+            tar.addfile(info)
+            return
+        info.size = len(content)
+        tar.addfile(info, io.BytesIO(content))
+
+    def render_compiled(
+        self: "CookieTemplater",
+        compiled: CompiledTemplate,
+        context: TemplateContext,
+        dst: BinaryIO,
+    ) -> int:
+        """Write a rendered archive from a compiled template.
+
+        Args:
+            compiled (CompiledTemplate): Compiled template
+            context (TemplateContext): Render context
+            dst (BinaryIO): Writable destination for the rendered archive
+
+        Returns:
+            int: Number of members written
+        """
+        variables = build_variables(compiled.template_config, context)
+        with tarfile.open(fileobj=dst, mode="w|", bufsize=ARCHIVE_CHUNK_SIZE) as tar:
+            for member in compiled.members:
+                self._add_rendered(tar, member, variables)
+        return len(compiled.members)
+
+    def compile_and_render(
+        self: "CookieTemplater",
+        key: Any,
+        etag: Optional[str],
+        src: BinaryIO,
+        context: TemplateContext,
+        dst: BinaryIO,
+    ) -> int:
+        """Render a template archive while compiling it into the cache.
+
+        The template is cached only if it has an etag, fits in the cache and
+        every file was small enough to be rendered. cookiecutter.json is read
+        first, a source that can't seek is spooled to a temp file for that.
+
+        Args:
+            key (Any): Template file id
+            etag (Optional[str]): Etag of the template archive
+            src (BinaryIO): Readable template archive, may be compressed
+            context (TemplateContext): Render context
+            dst (BinaryIO): Writable destination for the rendered archive
+
+        Returns:
+            int: Number of members written
+        """
+        if not src.seekable():
+            with tempfile.TemporaryFile() as spooled:
+                shutil.copyfileobj(src, spooled, ARCHIVE_CHUNK_SIZE)
+                spooled.seek(0)
+                return self.compile_and_render(key, etag, spooled, context, dst)
+
+        template_config = read_context_file(src)
+        src.seek(0)
+        variables = build_variables(template_config, context)
+        compiled: Optional[CompiledTemplate] = CompiledTemplate(
+            etag=etag, template_config=template_config
+        )
+        count = 0
+        with tarfile.open(fileobj=decompress(src), mode="r|") as src_tar, tarfile.open(
+            fileobj=dst, mode="w|", bufsize=ARCHIVE_CHUNK_SIZE
+        ) as dst_tar:
+            for info in src_tar:
+                count += 1
+                if info.isreg() and info.size > self.max_member_size:
+                    # Stream large files through, the template is not cached
+                    data = src_tar.extractfile(info)
+                    info.name = check_member_path(
+                        self.env.from_string(info.name).render(**variables)
+                    )
+                    dst_tar.addfile(info, data)
+                    compiled = None
+                    continue
+                data = src_tar.extractfile(info).read() if info.isreg() else None
+                member = self.compile_member(info, data)
+                self._add_rendered(dst_tar, member, variables)
+                if compiled is not None:
+                    compiled.members.append(member)
+                    compiled.size += tarfile.BLOCKSIZE + len(data or b"")
+        if compiled is not None and etag is not None:
+            self._put_compiled(key, compiled)
+        return count
 
     def render(
         self: "CookieTemplater",
-        template: Template,
+        template_dir: Path,
         context: TemplateContext,
-        output_dir: Optional[Path],
+        output_dir: Path,
     ) -> Path:
-        """Generate files using the uploaded template and input.
+        """Render a template tree into the output dir.
 
         Args:
-            template (Template): Template object
+            template_dir (Path): Path to the template dir
             context (TemplateContext): Render context
-            output_dir (Optional[Path]): Path to output dir
+            output_dir (Path): Path to output dir
+
+        Raises:
+            UnsafePathError: A path renders outside the output dir
 
-        Returns: # noqa: DAR202
-            Path: [description]
+        Returns:
+            Path: Path to output dir
         """
-        cookiecutter()
+        context_path = template_dir.joinpath(CONTEXT_FILE)
+        template_config = (
+            json.loads(context_path.read_text(), object_pairs_hook=OrderedDict)
+            if context_path.is_file()
+            else None
+        )
+        variables = build_variables(template_config, context)
+        root = output_dir.resolve()
+        for path in sorted(template_dir.rglob("*")):
+            relative_path = path.relative_to(template_dir).as_posix()
+            out_path = output_dir.joinpath(
+                check_member_path(
+                    self.env.from_string(relative_path).render(**variables)
+                )
+            )
+            # Symlinks already in the output dir can point anywhere
+            if root not in [out_path.resolve(), *out_path.resolve().parents]:
+                raise UnsafePathError(
+                    f"Template renders to a path outside its output: {out_path}"
+                )
+            if path.is_dir():
+                out_path.mkdir(parents=True, exist_ok=True)
+                continue
+            out_path.parent.mkdir(parents=True, exist_ok=True)
+            member = self.compile_member(
+                tarfile.TarInfo(relative_path), path.read_bytes()
+            )
+            content = member.content
+            if isinstance(content, JinjaTemplate):
+                content = content.render(**variables).encode("utf-8")
+            out_path.write_bytes(content)
+        return output_dir
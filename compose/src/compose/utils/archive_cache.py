@@ -0,0 +1,139 @@
+"""Content addressed on disk cache of downloaded archives."""
+
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+import hashlib
+import os
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from threading import Lock
+from typing import BinaryIO, Callable, Dict, Iterator
+
+from logzero import logger
+
+
+class ArchiveCache:
+    """Size bounded LRU cache of archives keyed by their content hash.
+
+    Keys are object etags or sha256 digests, so an entry never has to be
+    invalidated, a changed object simply gets a new key. Entries are
+    written to a temp file in the cache dir and renamed into place, so a
+    crashed download never leaves a partial entry behind. Concurrent
+    requests for a missing key wait for a single download.
+    """
+
+    def __init__(self: "ArchiveCache", root: Path, max_size: int) -> None:
+        """Initialize archive cache.
+
+        Args:
+            root (Path): Cache dir, created on first use
+            max_size (int): Max total size of cached archives in bytes
+        """
+        self.root = root
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._size = 0
+        self._downloads: Dict[str, Future] = {}
+        self._lock = Lock()
+        self._loaded = False
+
+    def _path(self: "ArchiveCache", key: str) -> Path:
+        return self.root.joinpath(hashlib.sha256(key.encode()).hexdigest())
+
+    def _load(self: "ArchiveCache") -> None:
+        # Pick up entries left by previous runs, least recently used first
+        self.root.mkdir(parents=True, exist_ok=True)
+        paths = [
+            path
+            for path in self.root.iterdir()
+            if path.is_file() and not path.name.startswith(".")
+        ]
+        for path in sorted(paths, key=lambda path: path.stat().st_mtime):
+            size = path.stat().st_size
+            self._entries[path.name] = size
+            self._size += size
+        self._loaded = True
+
+    def _evict(self: "ArchiveCache") -> None:
+        while self._size > self.max_size and len(self._entries) > 1:
+            name, size = self._entries.popitem(last=False)
+            self._size -= size
+            try:
+                # Readers keep their open file, so unlinking is safe
+                os.unlink(self.root.joinpath(name))
+            except FileNotFoundError:
+                pass
+
+    def _populate(
+        self: "ArchiveCache", path: Path, fetch: Callable[[BinaryIO], None]
+    ) -> None:
+        with NamedTemporaryFile(dir=self.root, prefix=".", delete=False) as tmp:
+            try:
+                fetch(tmp)
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            except Exception:
+                os.unlink(tmp.name)
+                raise
+        os.replace(tmp.name, path)
+
+    @contextmanager
+    def open(
+        self: "ArchiveCache", key: str, fetch: Callable[[BinaryIO], None]
+    ) -> Iterator[BinaryIO]:
+        """Open a cached archive, fetching it on a miss.
+
+        Args:
+            key (str): Content hash of the archive
+            fetch (Callable[[BinaryIO], None]): Writes the archive into a file
+
+        Yields:
+            BinaryIO: Cached archive opened for reading
+        """
+        path = self._path(key)
+        while True:
+            with self._lock:
+                if not self._loaded:
+                    self._load()
+                download = self._downloads.get(key)
+                if download is None and path.name in self._entries:
+                    try:
+                        archive = open(path, "rb")
+                    except FileNotFoundError:
+                        # Removed behind our back, fetch it again
+                        self._size -= self._entries.pop(path.name)
+                    else:
+                        self._entries.move_to_end(path.name)
+                        os.utime(path)
+                        break
+                owner = download is None
+                if owner:
+                    download = self._downloads[key] = Future()
+
+            if not owner:
+                # Coalesce onto the running download and retry the lookup
+                download.result()
+                continue
+
+            try:
+                self._populate(path, fetch)
+            except Exception as e:
+                logger.error(f"Unable to cache archive {key} due to {e}")
+                with self._lock:
+                    self._downloads.pop(key)
+                download.set_exception(e)
+                raise e
+            with self._lock:
+                self._downloads.pop(key)
+                size = path.stat().st_size
+                self._entries[path.name] = size
+                self._size += size
+                # Open before evicting so the new entry is always readable
+                archive = open(path, "rb")
+                self._evict()
+            download.set_result(None)
+            break
+
+        with archive:
+            yield archive
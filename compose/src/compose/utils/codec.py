@@ -0,0 +1,116 @@
+"""Compression codecs of archives."""
+
+from contextlib import contextmanager
+from enum import Enum
+import gzip
+import io
+from types import ModuleType
+from typing import BinaryIO, Iterator, Optional
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+class Codec(str, Enum):
+    """Compression codec of an archive."""
+
+    ZSTD = "zstd"
+    GZIP = "gzip"
+    NONE = "none"
+
+    @property
+    def ext(self: "Codec") -> str:
+        """Return file extension of archives compressed with the codec."""
+        return {Codec.ZSTD: "tar.zst", Codec.GZIP: "tar.gz", Codec.NONE: "tar"}[self]
+
+    @classmethod
+    def from_ext(cls: "type[Codec]", ext: str) -> "Codec":
+        """Return codec recorded in a file extension.
+
+        Args:
+            ext (str): File extension
+
+        Returns:
+            Codec: Codec, NONE for unknown extensions
+        """
+        ext = (ext or "").lower()
+        if ext.endswith("zst"):
+            return cls.ZSTD
+        if ext.endswith(("gz", "tgz")):
+            return cls.GZIP
+        return cls.NONE
+
+    @classmethod
+    def from_archive_ext(cls: "type[Codec]", ext: str) -> Optional["Codec"]:
+        """Return codec of a tar archive extension.
+
+        Args:
+            ext (str): File extension, e.g. tar.gz
+
+        Returns:
+            Optional[Codec]: Codec, None if the extension is not of a tar archive
+        """
+        ext = (ext or "").lower().lstrip(".")
+        if ext in ("tar.zst", "tzst"):
+            return cls.ZSTD
+        if ext in ("tar.gz", "tgz"):
+            return cls.GZIP
+        if ext == "tar":
+            return cls.NONE
+        return None
+
+
+def _zstandard() -> ModuleType:
+    try:
+        import zstandard
+    except ImportError as e:
+        raise RuntimeError("zstd archives need the zstandard package") from e
+    return zstandard
+
+
+@contextmanager
+def compress(
+    dst: BinaryIO, codec: Codec, level: int = 3, threads: int = -1
+) -> Iterator[BinaryIO]:
+    """Wrap a writable stream with a compressor.
+
+    Output only depends on the input, gzip headers carry no timestamp, so
+    archives of an unchanged dir are byte for byte identical.
+
+    Args:
+        dst (BinaryIO): Writable destination
+        codec (Codec): Compression codec
+        level (int): Compression level of zstd
+        threads (int): zstd worker threads, -1 uses every core
+
+    Yields:
+        BinaryIO: Writable stream, flushed and finished on exit
+    """
+    if codec == Codec.NONE:
+        yield dst
+    elif codec == Codec.GZIP:
+        with gzip.GzipFile(fileobj=dst, mode="wb", mtime=0) as writer:
+            yield writer
+    else:
+        zstandard = _zstandard()
+        compressor = zstandard.ZstdCompressor(level=level, threads=threads)
+        with compressor.stream_writer(dst, closefd=False) as writer:
+            yield writer
+
+
+def decompress(src: BinaryIO) -> BinaryIO:
+    """Detect the codec of a stream from its magic number and decompress it.
+
+    Args:
+        src (BinaryIO): Readable stream, compressed or not
+
+    Returns:
+        BinaryIO: Readable decompressed stream
+    """
+    reader = io.BufferedReader(src)
+    magic = reader.peek(len(ZSTD_MAGIC))
+    if magic.startswith(ZSTD_MAGIC):
+        return _zstandard().ZstdDecompressor().stream_reader(reader)
+    if magic.startswith(GZIP_MAGIC):
+        return gzip.GzipFile(fileobj=reader, mode="rb")
+    return reader
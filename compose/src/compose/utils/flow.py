@@ -0,0 +1,79 @@
+"""Flow utilities."""
+
+from functools import wraps
+from typing import Callable, List
+
+from blackcap.flow import Flow, Prop, Step
+
+from compose.schemas.flow_run import FlowRun, FlowStepState, FlowStepStatus
+
+
+def _track_call(
+    call: Callable[[List[Prop]], List[Prop]],
+    flow_run: FlowRun,
+    index: int,
+    statuses: List[FlowStepStatus],
+    report: Callable[[FlowRun], None],
+) -> Callable[[List[Prop]], List[Prop]]:
+    running, done, failed = statuses
+
+    @wraps(call)
+    def wrapper(inputs: List[Prop]) -> List[Prop]:
+        flow_run.current_step = index
+        flow_run.steps[index].status = running
+        report(flow_run)
+        try:
+            outputs = call(inputs)
+        except Exception:
+            flow_run.steps[index].status = failed
+            report(flow_run)
+            raise
+        flow_run.steps[index].status = done
+        report(flow_run)
+        return outputs
+
+    return wrapper
+
+
+def track_flow_progress(
+    flow: Flow, flow_run: FlowRun, report: Callable[[FlowRun], None]
+) -> Flow:
+    """Wrap flow steps to record step by step progress in the flow run.
+
+    `report` is called with the updated flow run every time a forward or
+    backward call of a step starts and ends.
+
+    Args:
+        flow (Flow): Flow to track
+        flow_run (FlowRun): Flow run to update
+        report (Callable[[FlowRun], None]): Progress callback
+
+    Returns:
+        Flow: Same flow with tracked steps
+    """
+    flow_run.steps = [
+        FlowStepState(index=index, name=step.forward_call.__name__)
+        for index, step in enumerate(flow.steps)
+    ]
+    for index, step in enumerate(flow.steps):
+        flow.steps[index] = Step(
+            _track_call(
+                step.forward_call,
+                flow_run,
+                index,
+                [FlowStepStatus.RUNNING, FlowStepStatus.DONE, FlowStepStatus.FAILED],
+                report,
+            ),
+            _track_call(
+                step.backward_call,
+                flow_run,
+                index,
+                [
+                    FlowStepStatus.ROLLING_BACK,
+                    FlowStepStatus.ROLLED_BACK,
+                    FlowStepStatus.ROLLBACK_FAILED,
+                ],
+                report,
+            ),
+        )
+    return flow
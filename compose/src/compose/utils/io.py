@@ -1,7 +1,21 @@
 """IO utilities."""
 
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import io
+import os
 from pathlib import Path
 import shutil
+import tarfile
+import threading
+from typing import BinaryIO, Callable, Iterator, Optional
+
+import requests
+
+from compose.utils.codec import decompress
+
+# Buffer size used to copy member data between streamed archives
+ARCHIVE_CHUNK_SIZE = 1024 * 1024
 
 
 def make_archive(name: str, in_path: Path, out_path: Path) -> str:
@@ -16,3 +30,166 @@ def make_archive(name: str, in_path: Path, out_path: Path) -> str:
         str: Path of created archive
     """
     return shutil.make_archive(out_path.joinpath(name), "tar", in_path)
+
+
+def download(url: str, dst: BinaryIO) -> None:
+    """Download a url into a file in ARCHIVE_CHUNK_SIZE chunks.
+
+    Args:
+        url (str): Url to download, usually a presigned GET url
+        dst (BinaryIO): Writable destination
+    """
+    with requests.get(url, stream=True) as resp:
+        resp.raise_for_status()
+        for chunk in resp.iter_content(chunk_size=ARCHIVE_CHUNK_SIZE):
+            dst.write(chunk)
+
+
+def _check_member(member: tarfile.TarInfo, root: Path) -> None:
+    # What the "data" extraction filter rejects, for Pythons without it
+    dst = root.joinpath(member.name).resolve()
+    if root not in [dst, *dst.parents]:
+        raise tarfile.ExtractError(f"{member.name} would be extracted outside {root}")
+    if member.issym():
+        target = dst.parent.joinpath(member.linkname).resolve()
+    elif member.islnk():
+        target = root.joinpath(member.linkname).resolve()
+    elif member.isreg() or member.isdir():
+        return
+    else:
+        raise tarfile.ExtractError(f"{member.name} is a special file")
+    if os.path.isabs(member.linkname) or root not in [target, *target.parents]:
+        raise tarfile.ExtractError(f"{member.name} links outside {root}")
+
+
+def extract_archive(tar: tarfile.TarFile, path: Path) -> None:
+    """Extract an archive, refusing members that would land outside `path`.
+
+    Names and links escaping `path` and device files are rejected, with the
+    "data" extraction filter where Python has it.
+
+    Args:
+        tar (tarfile.TarFile): Archive opened for reading, may be a stream
+        path (Path): Destination dir
+
+    Raises:
+        TarError: A member would be extracted outside `path`
+
+    # noqa: DAR402 TarError
+    """
+    if hasattr(tarfile, "data_filter"):
+        tar.extractall(path, filter="data")
+        return
+    root = Path(path).resolve()
+    for member in tar:
+        _check_member(member, root)
+        tar.extract(member, path)
+
+
+def transform_archive(
+    src: BinaryIO,
+    dst: BinaryIO,
+    render: Optional[Callable[[tarfile.TarInfo, bytes], bytes]] = None,
+    render_filter: Optional[Callable[[tarfile.TarInfo], bool]] = None,
+) -> int:
+    """Copy a tar archive member by member, rendering selected members.
+
+    Both archives are opened in stream mode, so neither `src` nor `dst` has
+    to be seekable. Only members passed to `render` are held in memory,
+    everything else is copied in ARCHIVE_CHUNK_SIZE chunks.
+
+    Args:
+        src (BinaryIO): Readable source archive, may be compressed
+        dst (BinaryIO): Writable destination for the uncompressed archive
+        render (Optional[Callable[[tarfile.TarInfo, bytes], bytes]]):
+            Returns rendered content of a member
+        render_filter (Optional[Callable[[tarfile.TarInfo], bool]]):
+            Selects members to render, defaults to all regular files
+
+    Returns:
+        int: Number of members written
+    """
+    count = 0
+    with tarfile.open(fileobj=decompress(src), mode="r|") as src_tar, tarfile.open(
+        fileobj=dst, mode="w|", bufsize=ARCHIVE_CHUNK_SIZE
+    ) as dst_tar:
+        for member in src_tar:
+            data = src_tar.extractfile(member) if member.isreg() else None
+            if (
+                data is not None
+                and render is not None
+                and (render_filter is None or render_filter(member))
+            ):
+                content = render(member, data.read())
+                member.size = len(content)
+                data = io.BytesIO(content)
+            dst_tar.addfile(member, data)
+            count += 1
+    return count
+
+
+class _PipeReader(io.RawIOBase):
+    """Read end of a pipe that surfaces producer errors at EOF."""
+
+    def __init__(self: "_PipeReader", fd: int, error: Callable[[], None]) -> None:
+        self._file = os.fdopen(fd, "rb")
+        self._error = error
+
+    def readable(self: "_PipeReader") -> bool:
+        return True
+
+    def readinto(self: "_PipeReader", buffer: memoryview) -> int:
+        size = self._file.readinto(buffer)
+        if not size:
+            # Raise instead of reporting a clean EOF for a truncated stream
+            self._error()
+        return size
+
+    def close(self: "_PipeReader") -> None:
+        self._file.close()
+        super().close()
+
+
+@contextmanager
+def pipe_stream(write: Callable[[BinaryIO], object]) -> Iterator[BinaryIO]:
+    """Expose the output of a writer function as a readable stream.
+
+    `write` runs in a background thread and writes into an OS pipe, so the
+    data is never fully buffered. Reading past the end raises the error of
+    the writer, if any.
+
+    Args:
+        write (Callable[[BinaryIO], object]): Writes data into the given file
+
+    Yields:
+        BinaryIO: Readable stream
+    """
+    read_fd, write_fd = os.pipe()
+    errors = []
+    done = threading.Event()
+
+    def produce() -> None:
+        try:
+            with os.fdopen(write_fd, "wb") as writer:
+                write(writer)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    def check() -> None:
+        # The pipe is closed before the error is recorded, wait for the writer
+        done.wait()
+        if errors:
+            raise errors[0]
+
+    reader = io.BufferedReader(_PipeReader(read_fd, check), ARCHIVE_CHUNK_SIZE)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(produce)
+        try:
+            yield reader
+        finally:
+            # Unblocks the writer with a broken pipe if reading stopped early
+            reader.close()
+            future.result()
+    check()
@@ -0,0 +1,133 @@
+"""Multipart uploads on object storage.
+
+minio only exposes the steps of a multipart upload through private methods
+of its client. They are wrapped here, the only place relying on them, and
+the minio version is pinned in pyproject.toml for the same reason.
+"""
+
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+from minio import Minio
+from minio.datatypes import Part
+from minio.error import S3Error
+
+
+class NoSuchUploadError(Exception):
+    """Upload was completed, aborted or expired on the object storage."""
+
+    pass
+
+
+@contextmanager
+def _upload_errors(upload_id: str) -> Iterator[None]:
+    """Raise NoSuchUploadError for uploads unknown to the object storage.
+
+    Args:
+        upload_id (str): Upload id
+
+    Yields:
+        None: Nothing
+
+    Raises:
+        NoSuchUploadError: Upload does not exist
+    """
+    try:
+        yield
+    except S3Error as e:
+        if e.code == "NoSuchUpload":
+            raise NoSuchUploadError(upload_id) from e
+        raise
+
+
+class MultipartUploads:
+    """Multipart uploads of a minio client."""
+
+    def __init__(self: "MultipartUploads", client: Minio) -> None:
+        """Initialize adapter.
+
+        Args:
+            client (Minio): Minio client
+        """
+        self.client = client
+
+    def create(
+        self: "MultipartUploads", bucket_name: str, object_name: str, content_type: str
+    ) -> str:
+        """Start a multipart upload.
+
+        Args:
+            bucket_name (str): Bucket name
+            object_name (str): Object name
+            content_type (str): Content type of the object
+
+        Returns:
+            str: Upload id
+        """
+        return self.client._create_multipart_upload(
+            bucket_name, object_name, {"Content-Type": content_type}
+        )
+
+    def list_parts(
+        self: "MultipartUploads", bucket_name: str, object_name: str, upload_id: str
+    ) -> Dict[int, str]:
+        """List parts stored for a multipart upload.
+
+        Args:
+            bucket_name (str): Bucket name
+            object_name (str): Object name
+            upload_id (str): Upload id
+
+        Returns:
+            Dict[int, str]: Etag of each uploaded part
+        """
+        parts: Dict[int, str] = {}
+        marker = None
+        with _upload_errors(upload_id):
+            while True:
+                result = self.client._list_parts(
+                    bucket_name, object_name, upload_id, part_number_marker=marker
+                )
+                parts.update({part.part_number: part.etag for part in result.parts})
+                if not result.is_truncated:
+                    return parts
+                marker = result.next_part_number_marker
+
+    def complete(
+        self: "MultipartUploads",
+        bucket_name: str,
+        object_name: str,
+        upload_id: str,
+        parts: Dict[int, str],
+    ) -> None:
+        """Assemble uploaded parts into the object.
+
+        Args:
+            bucket_name (str): Bucket name
+            object_name (str): Object name
+            upload_id (str): Upload id
+            parts (Dict[int, str]): Etag of each uploaded part
+        """
+        with _upload_errors(upload_id):
+            self.client._complete_multipart_upload(
+                bucket_name,
+                object_name,
+                upload_id,
+                [Part(number, etag) for number, etag in sorted(parts.items())],
+            )
+
+    def abort(
+        self: "MultipartUploads", bucket_name: str, object_name: str, upload_id: str
+    ) -> None:
+        """Abort a multipart upload and drop its parts, if it still exists.
+
+        Args:
+            bucket_name (str): Bucket name
+            object_name (str): Object name
+            upload_id (str): Upload id
+        """
+        try:
+            with _upload_errors(upload_id):
+                self.client._abort_multipart_upload(bucket_name, object_name, upload_id)
+        except NoSuchUploadError:
+            pass
@@ -0,0 +1,183 @@
+"""Keyset pagination and streaming utilities."""
+
+import json
+from typing import Any, Callable, Generator, Iterable, Iterator, Optional
+
+from blackcap.db import DBSession
+from logzero import logger
+from pydantic import BaseModel
+from sqlalchemy import and_, or_
+from sqlalchemy.sql import Select
+
+from compose.schemas.api.common import (
+    decode_cursor,
+    encode_cursor,
+    PaginationQueryParams,
+)
+
+
+STREAM_BATCH_SIZE = 500
+
+
+def paginate(stmt: Select, model: Any, query_params: PaginationQueryParams) -> Select:
+    """Apply keyset ordering, cursor and limit to a select statement.
+
+    Args:
+        stmt (Select): select statement
+        model (Any): DB model with created_at and id columns
+        query_params (PaginationQueryParams): Query params from request
+
+    Returns:
+        Select: Paginated select statement
+    """
+    stmt = stmt.order_by(model.created_at, model.id)
+    if query_params.cursor is not None:
+        created_at, obj_id = decode_cursor(query_params.cursor)
+        stmt = stmt.where(
+            or_(
+                model.created_at > created_at,
+                and_(model.created_at == created_at, model.id > obj_id),
+            )
+        )
+    if query_params.limit is not None:
+        # Fetch one extra row to know if there is a next page
+        stmt = stmt.limit(query_params.limit + 1)
+    return stmt
+
+
+class KeysetPage:
+    """Iterate over at most `limit` rows and record the next page cursor."""
+
+    def __init__(self: "KeysetPage", rows: Iterable[Any], limit: Optional[int]) -> None:
+        """Initialize page.
+
+        Args:
+            rows (Iterable[Any]): DB rows fetched with `paginate`
+            limit (Optional[int]): Page size
+        """
+        self.rows = rows
+        self.limit = limit
+        self.next_cursor: Optional[str] = None
+
+    def __iter__(self: "KeysetPage") -> Iterator[Any]:
+        """Iterate over rows of the page.
+
+        Yields:
+            Any: DB row
+        """
+        last = None
+        for count, row in enumerate(self.rows):
+            if self.limit is not None and count == self.limit:
+                self.next_cursor = encode_cursor(last.created_at, last.id)
+                break
+            last = row
+            yield row
+
+
+def stream_rows(
+    stmt: Select,
+    query_params: PaginationQueryParams,
+    to_schema: Callable[[Any], BaseModel],
+) -> Generator[BaseModel, None, Optional[str]]:
+    """Stream rows of a paginated statement in batches of STREAM_BATCH_SIZE.
+
+    Args:
+        stmt (Select): Statement returned by `paginate`
+        query_params (PaginationQueryParams): Query params from request
+        to_schema (Callable[[Any], BaseModel]): Converts a DB row to a schema
+
+    Raises:
+        Exception: error
+
+    Yields:
+        BaseModel: Converted rows
+
+    Returns:
+        Optional[str]: Cursor of the next page
+    """
+    stmt = stmt.execution_options(yield_per=STREAM_BATCH_SIZE)
+    with DBSession() as session:
+        try:
+            page = KeysetPage(session.execute(stmt).scalars(), query_params.limit)
+            for row in page:
+                yield to_schema(row)
+            return page.next_cursor
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Unable to stream rows due to {e}")
+            raise e
+
+
+def _chain_stream(
+    first: BaseModel, rest: Generator[BaseModel, None, Optional[str]]
+) -> Generator[BaseModel, None, Optional[str]]:
+    yield first
+    return (yield from rest)
+
+
+def _empty_stream(
+    next_cursor: Optional[str],
+) -> Generator[BaseModel, None, Optional[str]]:
+    return next_cursor
+    yield  # pragma: no cover
+
+
+def prime_stream(
+    item_stream: Generator[BaseModel, None, Optional[str]]
+) -> Generator[BaseModel, None, Optional[str]]:
+    """Fetch the first item of a stream before the response is sent.
+
+    Errors of the query itself are then raised while an error status can
+    still be returned.
+
+    Args:
+        item_stream (Generator[BaseModel, None, Optional[str]]): Streamed items
+
+    Returns:
+        Generator[BaseModel, None, Optional[str]]: Stream of the same items
+    """
+    try:
+        first = next(item_stream)
+    except StopIteration as stop:
+        return _empty_stream(stop.value)
+    return _chain_stream(first, item_stream)
+
+
+def stream_list_response(
+    msg: str, list_name: str, item_stream: Generator[BaseModel, None, Optional[str]]
+) -> Iterator[str]:
+    """Serialize a streamed list as a GET response body chunk by chunk.
+
+    The body has the same shape as the non streaming `*GetResponse`. The
+    status is sent before the first chunk, so an error while streaming closes
+    the document with the error in `errors` and no next cursor.
+
+    Args:
+        msg (str): Response message
+        list_name (str): Key of the list in items
+        item_stream (Generator[BaseModel, None, Optional[str]]): Streamed items
+
+    Yields:
+        str: JSON chunks
+    """
+    yield f'{{"msg": {json.dumps(msg)}, "items": {{{json.dumps(list_name)}: ['
+    separator = ""
+    errors: dict = {}
+    next_cursor = None
+    while True:
+        try:
+            item = next(item_stream)
+            chunk = separator + item.json()
+        except StopIteration as stop:
+            next_cursor = stop.value
+            break
+        except Exception as e:
+            logger.error(f"Unable to stream {list_name} due to {e}")
+            errors = {"main": ["unknown internal error"]}
+            break
+        yield chunk
+        separator = ", "
+    yield (
+        f']}}, "errors": {json.dumps(errors)}, '
+        f'"next_cursor": {json.dumps(next_cursor)}}}'
+    )
@@ -0,0 +1,106 @@
+"""Presigned url utilities."""
+
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Callable, Optional, Tuple
+
+
+PresignKey = Tuple[str, str, str]
+
+
+class PresignedURLCache:
+    """Bounded LRU cache of presigned urls with TTL eviction.
+
+    Urls are keyed by (bucket, object, method) and are handed out again only
+    while they stay valid for at least `refresh_margin`, so callers never get
+    an url that is about to expire.
+    """
+
+    def __init__(
+        self: "PresignedURLCache",
+        expires: timedelta = timedelta(days=7),
+        refresh_margin: timedelta = timedelta(days=1),
+        max_size: int = 10000,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ) -> None:
+        """Initialize cache.
+
+        Args:
+            expires (timedelta): Expiry of the signed urls
+            refresh_margin (timedelta): Minimum validity left to reuse an url
+            max_size (int): Maximum number of cached urls
+            clock (Callable[[], datetime]): Source of current utc time
+        """
+        self.expires = expires
+        self.ttl = expires - refresh_margin
+        self.max_size = max_size
+        self.clock = clock
+        self._urls: "OrderedDict[PresignKey, Tuple[str, datetime]]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self: "PresignedURLCache", key: PresignKey) -> Optional[str]:
+        """Return cached url if it is still fresh.
+
+        Args:
+            key (PresignKey): (bucket, object, method)
+
+        Returns:
+            Optional[str]: Presigned url or None
+        """
+        with self._lock:
+            entry = self._urls.get(key)
+            if entry is None:
+                return None
+            url, signed_at = entry
+            if self.clock() - signed_at >= self.ttl:
+                del self._urls[key]
+                return None
+            self._urls.move_to_end(key)
+            return url
+
+    def put(
+        self: "PresignedURLCache", key: PresignKey, url: str, signed_at: datetime
+    ) -> None:
+        """Add a signed url to the cache.
+
+        Args:
+            key (PresignKey): (bucket, object, method)
+            url (str): Presigned url
+            signed_at (datetime): Request date used to sign the url
+        """
+        with self._lock:
+            self._urls[key] = (url, signed_at)
+            self._urls.move_to_end(key)
+            while len(self._urls) > self.max_size:
+                self._urls.popitem(last=False)
+
+    def invalidate(
+        self: "PresignedURLCache",
+        bucket: str,
+        object_name: str,
+        methods: Tuple[str, ...] = ("GET", "PUT"),
+    ) -> None:
+        """Drop cached urls of an object.
+
+        Args:
+            bucket (str): Bucket name
+            object_name (str): Object name
+            methods (Tuple[str, ...]): HTTP methods to drop
+        """
+        with self._lock:
+            for method in methods:
+                self._urls.pop((bucket, object_name, method), None)
+
+    def clear(self: "PresignedURLCache") -> None:
+        """Drop all cached urls."""
+        with self._lock:
+            self._urls.clear()
+
+    def __len__(self: "PresignedURLCache") -> int:
+        """Return number of cached urls.
+
+        Returns:
+            int: Number of cached urls
+        """
+        return len(self._urls)
@@ -0,0 +1,49 @@
+"""Cold versus warm render time of the cookie templater.
+
+Cold renders parse and compile every file of the testTemplate.tar fixture,
+warm renders reuse the compiled template from the cache. Run with
+`python tests/benchmarks/bench_cookie_templater.py`.
+"""
+
+import argparse
+import io
+from pathlib import Path
+import time
+from typing import Callable
+
+from compose.schemas.template import TemplateContext
+from compose.templater.cookie_templater import CookieTemplater
+
+TEMPLATE_ARCHIVE = Path(__file__).parent.parent / "testTemplate.tar"
+
+
+def bench(name: str, render: Callable[[], object], rounds: int) -> None:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        render()
+    elapsed = time.perf_counter() - start
+    print(f"{name:>5}: {elapsed / rounds * 1e6:10.1f} us/render")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    archive = TEMPLATE_ARCHIVE.read_bytes()
+    context = TemplateContext(mine_name="biotestmine")
+    templater = CookieTemplater()
+
+    def cold() -> None:
+        templater.clear()
+        templater.compile_and_render(
+            "template", "etag", io.BytesIO(archive), context, io.BytesIO()
+        )
+
+    def warm() -> None:
+        templater.render_compiled(
+            templater.get_compiled("template"), context, io.BytesIO()
+        )
+
+    bench("cold", cold, args.rounds)
+    bench("warm", warm, args.rounds)
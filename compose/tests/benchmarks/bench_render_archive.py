@@ -0,0 +1,55 @@
+"""Throughput benchmark for rendering template archives.
+
+Compares the streaming transform with the previous unpack, copy and
+re-archive round trip through a temp dir, using the testTemplate.tar
+fixture. Run with `python tests/benchmarks/bench_render_archive.py`.
+"""
+
+import argparse
+import io
+from pathlib import Path
+import shutil
+from tempfile import TemporaryDirectory
+import time
+from typing import Callable
+
+from compose.utils.io import make_archive, pipe_stream, transform_archive
+
+TEMPLATE_ARCHIVE = Path(__file__).parent.parent / "testTemplate.tar"
+
+
+def render_with_temp_dir(archive: bytes) -> bytes:
+    with TemporaryDirectory() as tempd:
+        tempd = Path(tempd)
+        tempd.joinpath("template.tar").write_bytes(archive)
+        shutil.unpack_archive(tempd / "template.tar", tempd / "template")
+        shutil.copytree(tempd / "template", tempd / "rendered")
+        return Path(make_archive("rendered", tempd / "rendered", tempd)).read_bytes()
+
+
+def render_streaming(archive: bytes) -> bytes:
+    with pipe_stream(
+        lambda dst: transform_archive(io.BytesIO(archive), dst)
+    ) as rendered:
+        return rendered.read()
+
+
+def bench(name: str, render: Callable[[bytes], bytes], archive: bytes, rounds: int):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        render(archive)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name:>10}: {rounds / elapsed:10.1f} archives/s "
+        f"{len(archive) * rounds / elapsed / 2**20:8.2f} MiB/s"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=500)
+    args = parser.parse_args()
+
+    archive = TEMPLATE_ARCHIVE.read_bytes()
+    bench("temp dir", render_with_temp_dir, archive, args.rounds)
+    bench("streaming", render_streaming, archive, args.rounds)
@@ -0,0 +1,64 @@
+"""Archive cache tests."""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import threading
+
+import pytest
+
+from compose.utils.archive_cache import ArchiveCache
+
+
+def test_archive_cache_coalesces_downloads(tmp_path: Path) -> None:
+    cache = ArchiveCache(tmp_path, max_size=1024)
+    started = threading.Event()
+    release = threading.Event()
+    fetches = []
+
+    def fetch(dst) -> None:
+        fetches.append(1)
+        started.set()
+        release.wait(timeout=5)
+        dst.write(b"archive")
+
+    def read() -> bytes:
+        with cache.open("etag", fetch) as archive:
+            return archive.read()
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(read) for _ in range(4)]
+        started.wait(timeout=5)
+        release.set()
+        assert [future.result() for future in futures] == [b"archive"] * 4
+    assert len(fetches) == 1
+
+
+def test_archive_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    cache = ArchiveCache(tmp_path, max_size=10)
+    for key in ["a", "b", "a", "c"]:
+        with cache.open(key, lambda dst: dst.write(b"12345")):
+            pass
+
+    fetches = []
+    with cache.open("a", lambda dst: fetches.append(dst.write(b"12345"))):
+        pass
+    with cache.open("b", lambda dst: fetches.append(dst.write(b"12345"))):
+        pass
+    assert len(fetches) == 1
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_archive_cache_drops_failed_downloads(tmp_path: Path) -> None:
+    cache = ArchiveCache(tmp_path, max_size=1024)
+
+    def fetch(dst) -> None:
+        dst.write(b"partial")
+        raise IOError("connection reset")
+
+    with pytest.raises(IOError):
+        with cache.open("etag", fetch):
+            pass
+    assert list(tmp_path.iterdir()) == []
+
+    with cache.open("etag", lambda dst: dst.write(b"archive")) as archive:
+        assert archive.read() == b"archive"
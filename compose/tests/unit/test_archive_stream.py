@@ -0,0 +1,64 @@
+"""Streaming archive transform tests."""
+
+import io
+from pathlib import Path
+import tarfile
+import time
+
+import pytest
+
+from compose.utils.io import pipe_stream, transform_archive
+
+TEMPLATE_ARCHIVE = Path(__file__).parent.parent / "testTemplate.tar"
+
+
+def read_members(archive: bytes) -> dict:
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        return {
+            member.name: tar.extractfile(member).read() if member.isreg() else None
+            for member in tar
+        }
+
+
+def test_transform_archive_through_pipe() -> None:
+    with open(TEMPLATE_ARCHIVE, "rb") as src:
+        with pipe_stream(
+            lambda dst: transform_archive(
+                src, dst, render=lambda member, content: content.upper()
+            )
+        ) as rendered:
+            archive = rendered.read()
+
+    source_members = read_members(TEMPLATE_ARCHIVE.read_bytes())
+    rendered_members = read_members(archive)
+    assert rendered_members.keys() == source_members.keys()
+    assert rendered_members["./test.txt"] == source_members["./test.txt"].upper()
+
+
+def test_pipe_stream_raises_writer_errors() -> None:
+    def write(dst: io.BufferedWriter) -> None:
+        dst.write(b"partial")
+        raise ValueError("render failed")
+
+    with pytest.raises(ValueError):
+        with pipe_stream(write) as stream:
+            stream.read()
+
+
+def test_pipe_stream_raises_writer_errors_after_eof() -> None:
+    def write(dst: io.BufferedWriter) -> None:
+        dst.write(b"partial")
+        # The reader sees EOF before the writer fails
+        dst.close()
+        time.sleep(0.2)
+        raise ValueError("render failed")
+
+    read_errors = []
+    with pytest.raises(ValueError):
+        with pipe_stream(write) as stream:
+            # A consumer must not mistake the EOF for a complete stream
+            try:
+                stream.read()
+            except ValueError as e:
+                read_errors.append(e)
+    assert read_errors
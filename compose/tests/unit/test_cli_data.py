@@ -0,0 +1,41 @@
+"""Data CLI tests."""
+
+from pathlib import Path
+
+from click.testing import CliRunner
+import pytest
+
+from compose.cli import data
+from compose.utils.codec import Codec
+
+
+@pytest.mark.parametrize(
+    "ext, codec, expected",
+    [
+        ("tar.gz", None, Codec.GZIP),
+        ("tar.gz", "gzip", Codec.GZIP),
+        ("fasta", "none", Codec.NONE),
+        ("fasta", None, Codec(data.config.ARCHIVE_CODEC)),
+    ],
+)
+def test_archive_codec(ext: str, codec: str, expected: Codec) -> None:
+    assert data.archive_codec(ext, codec) == expected
+
+
+def test_create_rejects_codec_conflicting_with_ext(tmp_path: Path) -> None:
+    result = CliRunner().invoke(
+        data.create,
+        [
+            "--name",
+            "genes",
+            "--ext",
+            "tar.gz",
+            "--file_type",
+            "gff",
+            "--codec",
+            "zstd",
+            str(tmp_path),
+        ],
+    )
+    assert result.exit_code == 2
+    assert "compressed with gzip, not zstd" in result.output
@@ -0,0 +1,180 @@
+"""CLI multipart upload tests."""
+
+import io
+from pathlib import Path
+import tarfile
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from compose.cli import upload
+from compose.schemas.file import File
+from compose.utils.multipart import NoSuchUploadError
+
+
+PART_SIZE = 1024
+
+
+class FakeStorage:
+    """Records parts pushed through presigned urls."""
+
+    def __init__(self: "FakeStorage", fail_part: int = 0) -> None:
+        self.parts = {}
+        self.completed = None
+        self.pushed = []
+        self.fail_part = fail_part
+        self.upload_id = None
+        self.created = 0
+        self.aborted = []
+
+    def create(self: "FakeStorage", *args: object) -> str:
+        self.created += 1
+        self.upload_id = f"upload-{self.created}"
+        self.parts = {}
+        return self.upload_id
+
+    def list_parts(self: "FakeStorage", file: File, user: None, upload_id: str) -> dict:
+        if upload_id != self.upload_id:
+            raise NoSuchUploadError(upload_id)
+        return {n: f"etag-{n}" for n in self.parts}
+
+    def abort(self: "FakeStorage", file: File, user: None, upload_id: str) -> None:
+        self.aborted.append(upload_id)
+        if upload_id == self.upload_id:
+            self.upload_id = None
+
+    def put(self: "FakeStorage", url: str, data: bytes) -> SimpleNamespace:
+        part_number = int(url)
+        self.pushed.append(part_number)
+        if part_number == self.fail_part:
+            raise upload.requests.ConnectionError("connection reset")
+        self.parts[part_number] = data
+        return SimpleNamespace(
+            raise_for_status=lambda: None, headers={"ETag": f'"etag-{part_number}"'}
+        )
+
+
+def make_file() -> File:
+    return File(
+        file_id=uuid4(), name="source", ext="tar", file_type="data", parent_id=uuid4()
+    )
+
+
+@pytest.fixture()
+def storage(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> FakeStorage:
+    storage = FakeStorage()
+    monkeypatch.setattr(upload.config, "UPLOAD_STATE_DIR", str(tmp_path / "state"))
+    monkeypatch.setattr(upload, "create_multipart_upload", storage.create)
+    monkeypatch.setattr(upload, "abort_multipart_upload", storage.abort)
+    monkeypatch.setattr(
+        upload,
+        "create_part_presigned_urls",
+        lambda file, user, upload_id, numbers: {n: str(n) for n in numbers},
+    )
+    monkeypatch.setattr(upload, "list_uploaded_parts", storage.list_parts)
+    monkeypatch.setattr(
+        upload,
+        "complete_multipart_upload",
+        lambda file, user, upload_id, parts: setattr(storage, "completed", parts),
+    )
+    monkeypatch.setattr(upload, "update_file", lambda updates, user: updates)
+    monkeypatch.setattr(upload.requests, "put", storage.put)
+    monkeypatch.setattr(upload.time, "sleep", lambda seconds: None)
+    return storage
+
+
+@pytest.fixture()
+def source(tmp_path: Path) -> Path:
+    source = tmp_path / "source"
+    source.mkdir()
+    for i in range(3):
+        source.joinpath(f"file_{i}.txt").write_bytes(bytes([65 + i]) * 3000)
+    return source
+
+
+def test_iter_parts_splits_stream() -> None:
+    parts = list(upload.iter_parts(io.BytesIO(b"x" * 2500), PART_SIZE))
+    assert [number for number, _ in parts] == [1, 2, 3]
+    assert [len(data) for _, data in parts] == [1024, 1024, 452]
+
+
+def test_upload_dir_uploads_archive(storage: FakeStorage, source: Path) -> None:
+    file = make_file()
+    upload.upload_dir(source, file, None, workers=2, part_size=PART_SIZE)
+
+    archive = b"".join(storage.parts[n] for n in sorted(storage.parts))
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        assert tar.extractfile("./file_1.txt").read() == b"B" * 3000
+    assert storage.completed == {n: f"etag-{n}" for n in storage.parts}
+    assert upload.load_upload_state(file) is None
+
+
+def test_upload_dir_resumes(storage: FakeStorage, source: Path) -> None:
+    file = make_file()
+    storage.fail_part = 5
+    with pytest.raises(upload.requests.ConnectionError):
+        upload.upload_dir(source, file, None, workers=1, part_size=PART_SIZE)
+    uploaded = dict(storage.parts)
+    assert set(upload.load_upload_state(file).parts) == set(uploaded)
+
+    storage.fail_part = 0
+    storage.pushed = []
+    upload.upload_dir(source, file, None, workers=1, part_size=PART_SIZE)
+    assert not set(storage.pushed) & set(uploaded)
+    assert storage.completed == {n: f"etag-{n}" for n in storage.parts}
+
+
+def test_upload_dir_detects_changed_source(storage: FakeStorage, source: Path) -> None:
+    file = make_file()
+    storage.fail_part = 5
+    with pytest.raises(upload.requests.ConnectionError):
+        upload.upload_dir(source, file, None, workers=1, part_size=PART_SIZE)
+
+    source.joinpath("file_0.txt").write_bytes(b"changed" * 500)
+    with pytest.raises(upload.UploadMismatchError):
+        upload.upload_dir(source, file, None, workers=1, part_size=PART_SIZE)
+    assert storage.aborted == ["upload-1"]
+    assert upload.load_upload_state(file) is None
+
+    storage.fail_part = 0
+    upload.upload_dir(source, file, None, workers=1, part_size=PART_SIZE)
+    assert storage.upload_id == "upload-2"
+    assert storage.completed == {n: f"etag-{n}" for n in storage.parts}
+
+
+def test_upload_dir_restarts_missing_upload(storage: FakeStorage, source: Path) -> None:
+    file = make_file()
+    storage.fail_part = 5
+    with pytest.raises(upload.requests.ConnectionError):
+        upload.upload_dir(source, file, None, workers=1, part_size=PART_SIZE)
+
+    # Expired on the object storage while interrupted
+    storage.upload_id = None
+    storage.fail_part = 0
+    storage.pushed = []
+    upload.upload_dir(source, file, None, workers=1, part_size=PART_SIZE)
+    assert storage.upload_id == "upload-2"
+    assert storage.pushed[0] == 1
+    assert storage.completed == {n: f"etag-{n}" for n in storage.parts}
+
+
+@pytest.mark.parametrize("other", ["path", "part_size"])
+def test_upload_dir_aborts_upload_of_other_source(
+    storage: FakeStorage, source: Path, tmp_path: Path, other: str
+) -> None:
+    file = make_file()
+    storage.fail_part = 5
+    with pytest.raises(upload.requests.ConnectionError):
+        upload.upload_dir(source, file, None, workers=1, part_size=PART_SIZE)
+
+    part_size = PART_SIZE
+    if other == "path":
+        source = source.rename(tmp_path / "moved")
+    else:
+        part_size = 2 * PART_SIZE
+    storage.fail_part = 0
+    upload.upload_dir(source, file, None, workers=1, part_size=part_size)
+    assert storage.aborted == ["upload-1"]
+    assert storage.upload_id == "upload-2"
+    assert storage.completed == {n: f"etag-{n}" for n in storage.parts}
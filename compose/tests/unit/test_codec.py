@@ -0,0 +1,64 @@
+"""Archive codec tests."""
+
+import io
+import tarfile
+
+import pytest
+
+from compose.utils.codec import Codec, compress, decompress
+from compose.utils.io import transform_archive
+
+
+def make_archive(codec: Codec) -> bytes:
+    buffer = io.BytesIO()
+    with compress(buffer, codec) as writer, tarfile.open(
+        fileobj=writer, mode="w|"
+    ) as tar:
+        data = b"chr1\tsource\tgene\t1\t100\n" * 1000
+        info = tarfile.TarInfo("genes.gff")
+        info.size = len(data)
+        tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("codec", list(Codec))
+def test_decompress_detects_codec(codec: Codec) -> None:
+    if codec == Codec.ZSTD:
+        pytest.importorskip("zstandard")
+    archive = make_archive(codec)
+    if codec != Codec.NONE:
+        assert len(archive) < len(make_archive(Codec.NONE)) / 5
+
+    with tarfile.open(fileobj=decompress(io.BytesIO(archive)), mode="r|") as tar:
+        assert [member.name for member in tar] == ["genes.gff"]
+
+
+def test_compressed_archives_are_reproducible() -> None:
+    assert make_archive(Codec.GZIP) == make_archive(Codec.GZIP)
+
+
+def test_transform_archive_reads_compressed_archive() -> None:
+    dst = io.BytesIO()
+    assert transform_archive(io.BytesIO(make_archive(Codec.GZIP)), dst) == 1
+
+
+def test_codec_from_ext() -> None:
+    assert Codec.from_ext("tar.zst") == Codec.ZSTD
+    assert Codec.from_ext("tgz") == Codec.GZIP
+    assert Codec.from_ext(Codec.GZIP.ext) == Codec.GZIP
+    assert Codec.from_ext("tar") == Codec.NONE
+
+
+@pytest.mark.parametrize(
+    "ext, codec",
+    [
+        ("tar.zst", Codec.ZSTD),
+        ("TGZ", Codec.GZIP),
+        (".tar.gz", Codec.GZIP),
+        ("tar", Codec.NONE),
+        ("fasta", None),
+        ("gz", None),
+    ],
+)
+def test_codec_from_archive_ext(ext: str, codec: Codec) -> None:
+    assert Codec.from_archive_ext(ext) == codec
@@ -0,0 +1,215 @@
+"""Cookie templater tests."""
+
+import io
+import json
+from pathlib import Path
+import tarfile
+from typing import Optional
+
+from jinja2.exceptions import SecurityError
+import pytest
+
+from compose.schemas.template import TemplateContext
+from compose.templater.cookie_templater import CookieTemplater, UnsafePathError
+
+# Reaches the os module from a jinja global, unless sandboxed
+ESCAPE = "{{ cycler.__init__.__globals__.os.getcwd() }}"
+
+
+TEMPLATE_CONFIG = {
+    "mine_name": "biotestmine",
+    "mine_title": "{{ cookiecutter.mine_name|title }}",
+    "database": ["postgres", "sqlite"],
+}
+
+
+class UnseekableStream(io.BytesIO):
+    """Stream of a download, that can't seek."""
+
+    def seekable(self: "UnseekableStream") -> bool:
+        return False
+
+
+def make_template_archive(template_config: Optional[dict] = None) -> bytes:
+    members = [
+        (
+            "./{{cookiecutter.mine_name}}/project.xml",
+            b"<project>{{ cookiecutter.mine_name }}</project>\n",
+        ),
+        ("./{{cookiecutter.mine_name}}/logo.png", b"\x89PNG\xff{{"),
+    ]
+    if template_config is not None:
+        members += [
+            ("./cookiecutter.json", json.dumps(template_config).encode()),
+            (
+                "./{{cookiecutter.mine_name}}/mine.properties",
+                b"title={{ cookiecutter.mine_title }}\n"
+                b"db={{ cookiecutter.database }}\n",
+            ),
+        ]
+    archive = io.BytesIO()
+    with tarfile.open(fileobj=archive, mode="w") as tar:
+        for name, content in members:
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+    return archive.getvalue()
+
+
+def read_members(archive: bytes) -> dict:
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        return {member.name: tar.extractfile(member).read() for member in tar}
+
+
+def test_cookie_templater_renders_and_caches_archives() -> None:
+    templater = CookieTemplater()
+    context = TemplateContext(mine_name="biotestmine")
+
+    cold = io.BytesIO()
+    templater.compile_and_render(
+        "file-1", '"etag"', io.BytesIO(make_template_archive()), context, cold
+    )
+    compiled = templater.get_compiled("file-1")
+    assert compiled.etag == '"etag"'
+
+    warm = io.BytesIO()
+    templater.render_compiled(compiled, TemplateContext(mine_name="flymine"), warm)
+
+    assert read_members(cold.getvalue()) == {
+        "./biotestmine/project.xml": b"<project>biotestmine</project>\n",
+        "./biotestmine/logo.png": b"\x89PNG\xff{{",
+    }
+    assert read_members(warm.getvalue())["./flymine/project.xml"] == (
+        b"<project>flymine</project>\n"
+    )
+
+
+def test_cookie_templater_cache_is_bounded() -> None:
+    templater = CookieTemplater(cache_size=2000, max_member_size=64)
+    archive = make_template_archive()
+    templater.compile_and_render(
+        "file-1", "a", io.BytesIO(archive), TemplateContext(mine_name="a"), io.BytesIO()
+    )
+    templater.compile_and_render(
+        "file-2", "b", io.BytesIO(archive), TemplateContext(mine_name="a"), io.BytesIO()
+    )
+    assert templater.get_compiled("file-1") is None
+    assert templater.get_compiled("file-2") is not None
+
+    templater = CookieTemplater(max_member_size=8)
+    templater.compile_and_render(
+        "file-1", "a", io.BytesIO(archive), TemplateContext(mine_name="a"), io.BytesIO()
+    )
+    assert templater.get_compiled("file-1") is None
+
+
+def test_cookie_templater_renders_dirs(tmp_path: Path) -> None:
+    template_dir = tmp_path / "template" / "{{cookiecutter.mine_name}}"
+    template_dir.mkdir(parents=True)
+    template_dir.joinpath("mine.properties").write_text(
+        "name={{ cookiecutter.mine_name }}"
+    )
+
+    CookieTemplater().render(
+        tmp_path / "template",
+        TemplateContext(mine_name="biotestmine"),
+        tmp_path / "out",
+    )
+
+    assert (tmp_path / "out" / "biotestmine" / "mine.properties").read_text() == (
+        "name=biotestmine"
+    )
+
+
+def test_cookie_templater_uses_template_defaults() -> None:
+    templater = CookieTemplater()
+    archive = make_template_archive(TEMPLATE_CONFIG)
+
+    cold = io.BytesIO()
+    templater.compile_and_render(
+        "file-1", "a", UnseekableStream(archive), TemplateContext(), cold
+    )
+    members = read_members(cold.getvalue())
+    assert members["./biotestmine/project.xml"] == b"<project>biotestmine</project>\n"
+    assert members["./biotestmine/mine.properties"] == (
+        b"title=Biotestmine\ndb=postgres\n"
+    )
+    assert json.loads(members["./cookiecutter.json"]) == TEMPLATE_CONFIG
+
+    warm = io.BytesIO()
+    templater.render_compiled(
+        templater.get_compiled("file-1"),
+        TemplateContext(mine_name="flymine", database="sqlite"),
+        warm,
+    )
+    assert read_members(warm.getvalue())["./flymine/mine.properties"] == (
+        b"title=Flymine\ndb=sqlite\n"
+    )
+
+
+def test_cookie_templater_renders_dirs_with_template_defaults(tmp_path: Path) -> None:
+    template_dir = tmp_path / "template"
+    template_dir.joinpath("{{cookiecutter.mine_name}}").mkdir(parents=True)
+    template_dir.joinpath("cookiecutter.json").write_text(json.dumps(TEMPLATE_CONFIG))
+    template_dir.joinpath("{{cookiecutter.mine_name}}", "title").write_text(
+        "{{ cookiecutter.mine_title }}"
+    )
+
+    CookieTemplater().render(template_dir, TemplateContext(), tmp_path / "out")
+
+    assert (tmp_path / "out" / "biotestmine" / "title").read_text() == "Biotestmine"
+
+
+def test_cookie_templater_sandboxes_templates(tmp_path: Path) -> None:
+    template_dir = tmp_path / "template"
+    template_dir.mkdir()
+    template_dir.joinpath("cwd").write_text(ESCAPE)
+
+    with pytest.raises(SecurityError):
+        CookieTemplater().render(template_dir, TemplateContext(), tmp_path / "out")
+
+    template_dir.joinpath("cwd").unlink()
+    template_dir.joinpath("cookiecutter.json").write_text(json.dumps({"cwd": ESCAPE}))
+    with pytest.raises(SecurityError):
+        CookieTemplater().render(template_dir, TemplateContext(), tmp_path / "out")
+
+
+@pytest.mark.parametrize("name", ["../escaped", "/tmp/escaped", "a/../../escaped"])
+def test_cookie_templater_rejects_paths_outside_output(
+    tmp_path: Path, name: str
+) -> None:
+    template_dir = tmp_path / "template"
+    template_dir.mkdir()
+    template_dir.joinpath("{{cookiecutter.path}}").write_text("escaped")
+
+    with pytest.raises(UnsafePathError):
+        CookieTemplater().render(
+            template_dir, TemplateContext(path=name), tmp_path / "out"
+        )
+    assert not (tmp_path / "escaped").exists()
+
+    archive = io.BytesIO()
+    with tarfile.open(fileobj=archive, mode="w") as tar:
+        info = tarfile.TarInfo("{{cookiecutter.path}}")
+        tar.addfile(info, io.BytesIO(b""))
+    with pytest.raises(UnsafePathError):
+        CookieTemplater().compile_and_render(
+            "template",
+            None,
+            io.BytesIO(archive.getvalue()),
+            TemplateContext(path=name),
+            io.BytesIO(),
+        )
+
+
+def test_cookie_templater_rejects_symlinks_out_of_output(tmp_path: Path) -> None:
+    template_dir = tmp_path / "template"
+    template_dir.joinpath("link").mkdir(parents=True)
+    template_dir.joinpath("link", "file").write_text("escaped")
+    (tmp_path / "out").mkdir()
+    (tmp_path / "elsewhere").mkdir()
+    (tmp_path / "out" / "link").symlink_to(tmp_path / "elsewhere")
+
+    with pytest.raises(UnsafePathError):
+        CookieTemplater().render(template_dir, TemplateContext(), tmp_path / "out")
+    assert not (tmp_path / "elsewhere" / "file").exists()
@@ -2,9 +2,15 @@
 
 from blackcap.schemas.user import User
 
-from compose.blocs.data import create_data
+from compose.blocs.data import create_data, get_data, get_data_page, stream_data
+from compose.schemas.api.data.get import (
+    DataGetQueryParams,
+    DataGetResponse,
+    DataQueryType,
+)
 from compose.schemas.api.data.post import DataCreate
 from compose.schemas.data import Data
+from compose.utils.pagination import stream_list_response
 
 
 def test_data_create(user: User) -> None:
@@ -14,3 +20,38 @@ def test_data_create(user: User) -> None:
     assert created_data.name == "randomDataset"
     assert created_data.ext == "gff"
     assert created_data.file_type == "Sequencing"
+
+
+def test_data_get_page(user: User) -> None:
+    create_data(
+        [
+            DataCreate(name=f"pagedDataset{i}", ext="gff", file_type="Sequencing")
+            for i in range(3)
+        ],
+        user,
+    )
+    query_params = DataGetQueryParams(query_type=DataQueryType.GET_ALL_DATA, limit=2)
+    first_page, cursor = get_data_page(query_params, user)
+    assert len(first_page) == 2
+    assert cursor is not None
+
+    all_data = get_data(DataGetQueryParams(query_type=DataQueryType.GET_ALL_DATA), user)
+    rest, _ = get_data_page(
+        DataGetQueryParams(
+            query_type=DataQueryType.GET_ALL_DATA, limit=len(all_data), cursor=cursor
+        ),
+        user,
+    )
+    assert [data.data_id for data in first_page + rest] == [
+        data.data_id for data in all_data
+    ]
+
+
+def test_data_stream(user: User) -> None:
+    query_params = DataGetQueryParams(query_type=DataQueryType.GET_ALL_DATA)
+    body = "".join(
+        stream_list_response("ok", "data_list", stream_data(query_params, user))
+    )
+    response = DataGetResponse.parse_raw(body)
+    assert len(response.items["data_list"]) == len(get_data(query_params, user))
+    assert response.next_cursor is None
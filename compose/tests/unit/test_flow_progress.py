@@ -0,0 +1,36 @@
+"""Flow progress tracking tests."""
+
+from uuid import uuid4
+
+from blackcap.flow import Executor, Flow, Prop, Step
+from blackcap.flow.step import dummy_backward
+
+from compose.schemas.flow_run import FlowRun, FlowStepStatus
+from compose.utils.flow import track_flow_progress
+
+
+def passing_step(inputs: list) -> list:
+    return [Prop(data=inputs[0].data + 1, description="incremented")]
+
+
+def failing_step(inputs: list) -> list:
+    raise ValueError("failed")
+
+
+def test_track_flow_progress_records_forward_and_backward_calls() -> None:
+    flow = Flow()
+    flow.add_step(Step(passing_step, dummy_backward), [Prop(data=1, description="")])
+    flow.add_step(Step(failing_step, dummy_backward), [])
+    flow_run = FlowRun(flow_run_id=uuid4(), flow_name="test", protagonist_id=uuid4())
+    reports = []
+
+    track_flow_progress(
+        flow, flow_run, lambda run: reports.append([s.status for s in run.steps])
+    )
+    executed_flow = Executor(flow, {}).run()
+
+    assert executed_flow.forward_outputs[0][0].data == 2
+    assert [step.name for step in flow_run.steps] == ["passing_step", "failing_step"]
+    assert flow_run.current_step == 0
+    assert reports[3] == [FlowStepStatus.DONE, FlowStepStatus.FAILED]
+    assert reports[-1] == [FlowStepStatus.ROLLED_BACK, FlowStepStatus.FAILED]
@@ -0,0 +1,72 @@
+"""Multipart upload adapter tests."""
+
+from types import SimpleNamespace
+
+import pytest
+from minio.error import S3Error
+
+from compose.utils.multipart import MultipartUploads, NoSuchUploadError
+
+
+def s3_error(code: str) -> S3Error:
+    return S3Error(code, code, "/bucket/object", "request", "host", None)
+
+
+class FakeClient:
+    """Serves parts two per page and fails with the set error."""
+
+    def __init__(self: "FakeClient", error: S3Error = None) -> None:
+        self.error = error
+        self.aborted = []
+
+    def _list_parts(
+        self: "FakeClient",
+        bucket_name: str,
+        object_name: str,
+        upload_id: str,
+        part_number_marker: int = None,
+    ) -> SimpleNamespace:
+        if self.error:
+            raise self.error
+        start = part_number_marker or 0
+        numbers = [n for n in range(1, 6) if start < n <= start + 2]
+        return SimpleNamespace(
+            parts=[SimpleNamespace(part_number=n, etag=f"etag-{n}") for n in numbers],
+            is_truncated=numbers[-1] < 5,
+            next_part_number_marker=numbers[-1],
+        )
+
+    def _abort_multipart_upload(
+        self: "FakeClient", bucket_name: str, object_name: str, upload_id: str
+    ) -> None:
+        if self.error:
+            raise self.error
+        self.aborted.append(upload_id)
+
+
+def test_list_parts_pages_through_parts() -> None:
+    uploads = MultipartUploads(FakeClient())
+    parts = uploads.list_parts("bucket", "object", "upload")
+    assert parts == {n: f"etag-{n}" for n in range(1, 6)}
+
+
+def test_missing_upload_raises_no_such_upload() -> None:
+    uploads = MultipartUploads(FakeClient(s3_error("NoSuchUpload")))
+    with pytest.raises(NoSuchUploadError):
+        uploads.list_parts("bucket", "object", "upload")
+
+
+def test_other_errors_are_kept() -> None:
+    uploads = MultipartUploads(FakeClient(s3_error("AccessDenied")))
+    with pytest.raises(S3Error):
+        uploads.list_parts("bucket", "object", "upload")
+
+
+def test_abort_ignores_missing_upload() -> None:
+    client = FakeClient()
+    MultipartUploads(client).abort("bucket", "object", "upload")
+    assert client.aborted == ["upload"]
+
+    MultipartUploads(FakeClient(s3_error("NoSuchUpload"))).abort(
+        "bucket", "object", "upload"
+    )
@@ -0,0 +1,54 @@
+"""Streamed list response tests."""
+
+import json
+from typing import Generator, Optional
+
+from pydantic import BaseModel
+import pytest
+
+from compose.utils.pagination import prime_stream, stream_list_response
+
+
+class Item(BaseModel):
+    """Streamed item."""
+
+    name: str
+
+
+def items(count: int, fail_after: Optional[int] = None) -> Generator:
+    for index in range(count):
+        if index == fail_after:
+            raise RuntimeError("connection lost")
+        yield Item(name=str(index))
+    return "next"
+
+
+def test_stream_list_response() -> None:
+    body = json.loads("".join(stream_list_response("ok", "item_list", items(3))))
+    assert body == {
+        "msg": "ok",
+        "items": {"item_list": [{"name": "0"}, {"name": "1"}, {"name": "2"}]},
+        "errors": {},
+        "next_cursor": "next",
+    }
+
+
+def test_stream_list_response_error_while_streaming() -> None:
+    stream = prime_stream(items(3, fail_after=2))
+    body = json.loads("".join(stream_list_response("ok", "item_list", stream)))
+    assert body["items"] == {"item_list": [{"name": "0"}, {"name": "1"}]}
+    assert body["errors"] == {"main": ["unknown internal error"]}
+    assert body["next_cursor"] is None
+
+
+def test_prime_stream_raises_setup_errors() -> None:
+    with pytest.raises(RuntimeError):
+        prime_stream(items(3, fail_after=0))
+
+
+def test_prime_stream_empty() -> None:
+    body = json.loads(
+        "".join(stream_list_response("ok", "item_list", prime_stream(items(0))))
+    )
+    assert body["items"] == {"item_list": []}
+    assert body["next_cursor"] == "next"
@@ -0,0 +1,44 @@
+"""Presigned url cache tests."""
+
+from datetime import datetime, timedelta
+
+from compose.utils.presign import PresignedURLCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = datetime(2022, 1, 1)
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+def test_presigned_url_cache_reuses_fresh_urls() -> None:
+    clock = FakeClock()
+    cache = PresignedURLCache(
+        expires=timedelta(days=7), refresh_margin=timedelta(days=1), clock=clock
+    )
+    key = ("protagonist-1", "file.tar", "GET")
+    cache.put(key, "signed-url", clock())
+
+    clock.now += timedelta(days=5)
+    assert cache.get(key) == "signed-url"
+
+    clock.now += timedelta(days=1)
+    assert cache.get(key) is None
+    assert len(cache) == 0
+
+
+def test_presigned_url_cache_is_bounded_and_invalidated() -> None:
+    clock = FakeClock()
+    cache = PresignedURLCache(max_size=2, clock=clock)
+    cache.put(("bucket", "a.tar", "GET"), "a-get", clock())
+    cache.put(("bucket", "a.tar", "PUT"), "a-put", clock())
+    cache.put(("bucket", "b.tar", "GET"), "b-get", clock())
+
+    assert cache.get(("bucket", "a.tar", "GET")) is None
+    assert cache.get(("bucket", "a.tar", "PUT")) == "a-put"
+
+    cache.invalidate("bucket", "a.tar")
+    assert cache.get(("bucket", "a.tar", "PUT")) is None
+    assert cache.get(("bucket", "b.tar", "GET")) == "b-get"
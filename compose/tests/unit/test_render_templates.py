@@ -0,0 +1,101 @@
+"""Rendered template render step tests."""
+
+import threading
+from uuid import uuid4
+
+from blackcap.flow import FlowExecError, Prop
+from blackcap.schemas.user import User
+import pytest
+
+from compose.blocs import rendered_template as rendered_template_blocs
+from compose.schemas.file import File
+from compose.schemas.template import RenderedTemplate
+
+
+def make_inputs(count: int) -> list:
+    user = User(user_id=uuid4(), name="test", organisation="test", email="t@t.org")
+    rendered_templates, rendered_files, template_files = [], [], []
+    for index in range(count):
+        template_id = uuid4()
+        rendered_template = RenderedTemplate(
+            rendered_template_id=uuid4(),
+            parent_template_id=template_id,
+            name=f"template-{index}",
+        )
+        rendered_templates.append(rendered_template)
+        template_files.append(
+            File(
+                file_id=uuid4(),
+                name=f"template-{index}",
+                file_type="template",
+                ext="tar",
+                parent_id=template_id,
+                uploaded=True,
+                presigned_get=f"get-{index}",
+            )
+        )
+        rendered_files.append(
+            File(
+                file_id=uuid4(),
+                name=f"rendered-{index}",
+                file_type="rendered_template",
+                ext="tar",
+                parent_id=rendered_template.rendered_template_id,
+            )
+        )
+    return [
+        Prop(data=rendered_templates, description=""),
+        Prop(data=user, description=""),
+        Prop(data=rendered_files, description=""),
+        Prop(data=user, description=""),
+        Prop(data=[], description=""),
+        Prop(data=template_files, description=""),
+        Prop(data=user, description=""),
+    ]
+
+
+def test_render_and_upload_runs_renders_concurrently(monkeypatch) -> None:
+    inputs = make_inputs(4)
+    barrier = threading.Barrier(4, timeout=5)
+    uploads = {}
+
+    def fake_render(
+        template_file: File,
+        rendered_template: RenderedTemplate,
+        rendered_file: File,
+        user: User,
+    ) -> None:
+        barrier.wait()
+        uploads[template_file.presigned_get] = rendered_file.parent_id
+
+    monkeypatch.setattr(
+        rendered_template_blocs, "stream_render_and_upload", fake_render
+    )
+    rendered_template_blocs.render_and_upload_rendered_template(inputs)
+
+    assert uploads == {
+        f"get-{index}": rendered_template.rendered_template_id
+        for index, rendered_template in enumerate(inputs[0].data)
+    }
+
+
+def test_render_and_upload_reports_failed_renders(monkeypatch) -> None:
+    inputs = make_inputs(2)
+
+    def fake_render(
+        template_file: File,
+        rendered_template: RenderedTemplate,
+        rendered_file: File,
+        user: User,
+    ) -> None:
+        if template_file.presigned_get == "get-1":
+            raise IOError("upload failed")
+
+    monkeypatch.setattr(
+        rendered_template_blocs, "stream_render_and_upload", fake_render
+    )
+    with pytest.raises(FlowExecError) as exc_info:
+        rendered_template_blocs.render_and_upload_rendered_template(inputs)
+    assert str(inputs[0].data[1].rendered_template_id) in (
+        exc_info.value.human_description
+    )
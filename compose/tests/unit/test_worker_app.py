@@ -0,0 +1,21 @@
+"""Celery worker entrypoint tests."""
+
+from blackcap.configs import config_registry
+from celery.app.utils import find_app
+
+import compose.tasks
+
+config = config_registry.get_config()
+
+
+def test_worker_app_resolves() -> None:
+    app = find_app("compose.tasks")
+    assert app is compose.tasks.app
+    assert "compose.tasks.run_create_mine_flow" in app.tasks
+
+
+def test_worker_app_routes_to_compose_queue() -> None:
+    route = compose.tasks.app.amqp.router.route(
+        {}, "compose.tasks.run_create_mine_flow"
+    )
+    assert route["queue"].name == config.COMPOSE_TASK_QUEUE
@@ -10,7 +10,7 @@ from demon.observer import argo_observer
     "--namespace", default="default", help="Namespace where Argo Workflows are run."
 )
 def forward(namespace: str) -> None:
-    """Forward Argo-related Kubernetes events to NATS."""
+    """Forward progress of Argo Workflows to NATS."""
     argo_observer.main(namespace)
 
 
@@ -0,0 +1,263 @@
+"""Capacity based admission of builds to the cluster."""
+
+from dataclasses import asdict, astuple, dataclass
+import heapq
+from itertools import count
+from threading import Lock
+from typing import Callable, Dict, List, Set, Tuple
+
+from kubernetes.utils import parse_quantity
+from logzero import logger
+
+
+@dataclass(frozen=True)
+class BuildResources:
+    """Resources claimed by a running build."""
+
+    builds: int = 1
+    storage: int = 0
+    memory: int = 0
+
+    def __add__(self: "BuildResources", other: "BuildResources") -> "BuildResources":
+        """Sum of both resources."""
+        return BuildResources(
+            self.builds + other.builds,
+            self.storage + other.storage,
+            self.memory + other.memory,
+        )
+
+    def __sub__(self: "BuildResources", other: "BuildResources") -> "BuildResources":
+        """Difference of both resources."""
+        return BuildResources(
+            self.builds - other.builds,
+            self.storage - other.storage,
+            self.memory - other.memory,
+        )
+
+    def fits(self: "BuildResources", capacity: "BuildResources") -> bool:
+        """Check if every resource is within a capacity.
+
+        Args:
+            capacity (BuildResources): Capacity, zero meaning unlimited
+
+        Returns:
+            bool: True if within capacity
+        """
+        return all(
+            limit <= 0 or used <= limit
+            for used, limit in zip(astuple(self), astuple(capacity))
+        )
+
+
+def _requested_memory(template: Dict) -> int:
+    resources = (template.get("container") or {}).get("resources") or {}
+    memory = (resources.get("requests") or {}).get("memory") or (
+        resources.get("limits") or {}
+    ).get("memory")
+    return int(parse_quantity(memory)) if memory else 0
+
+
+def workflow_resources(workflow: Dict) -> BuildResources:
+    """Estimate the resources a workflow claims while it runs.
+
+    Storage is the sum of the volume claim templates. Memory is the sum of
+    the daemons, which run for the whole build, plus the largest of the
+    steps, which run one at a time.
+
+    Args:
+        workflow (Dict): Workflow spec
+
+    Returns:
+        BuildResources: Claimed resources
+    """
+    spec = workflow.get("spec") or {}
+    storage = sum(
+        int(parse_quantity(claim["spec"]["resources"]["requests"]["storage"]))
+        for claim in spec.get("volumeClaimTemplates") or []
+    )
+    templates = spec.get("templates") or []
+    daemons = sum(_requested_memory(t) for t in templates if t.get("daemon"))
+    steps = max(
+        (_requested_memory(t) for t in templates if not t.get("daemon")), default=0
+    )
+    return BuildResources(1, storage, daemons + steps)
+
+
+@dataclass
+class AdmissionStats:
+    """Counters of an admission controller."""
+
+    running: int = 0
+    storage: int = 0
+    memory: int = 0
+    queued: int = 0
+    admitted: int = 0
+    held: int = 0
+    released: int = 0
+
+
+class AdmissionController:
+    """Admit builds while the cluster has capacity, queue the rest.
+
+    Admitted builds hold a reservation, first under the key of their
+    schedule and, once the workflow is created, under the workflow name.
+    Builds that do not fit wait in a priority queue and are admitted in
+    priority order, then arrival order, as reservations are released. The
+    head of the queue is never overtaken, so large builds do not starve. A
+    build larger than the whole capacity is admitted once the cluster is
+    idle.
+    """
+
+    def __init__(
+        self: "AdmissionController",
+        capacity: BuildResources,
+        dispatch: Callable[[Dict], None],
+    ) -> None:
+        """Initialize controller.
+
+        Args:
+            capacity (BuildResources): Max builds, storage and memory, zero
+                meaning unlimited
+            dispatch (Callable[[Dict], None]): Called with admitted schedules,
+                outside of the controller lock
+        """
+        self.capacity = capacity
+        self.dispatch = dispatch
+        self._reserved: Dict[str, BuildResources] = {}
+        self._used = BuildResources(0, 0, 0)
+        self._queue: List[Tuple[int, int, str, BuildResources, Dict]] = []
+        self._queued: Set[str] = set()
+        # Schedule keys of created workflows, by workflow name
+        self._bound: Dict[str, str] = {}
+        self._seq = count()
+        self._stats = AdmissionStats()
+        self._lock = Lock()
+
+    def stats(self: "AdmissionController") -> Dict[str, int]:
+        """Return a snapshot of the counters.
+
+        Returns:
+            Dict[str, int]: Counters by name
+        """
+        with self._lock:
+            self._stats.running = self._used.builds
+            self._stats.storage = self._used.storage
+            self._stats.memory = self._used.memory
+            self._stats.queued = len(self._queue)
+            return asdict(self._stats)
+
+    def _fits(self: "AdmissionController", resources: BuildResources) -> bool:
+        return not self._reserved or (self._used + resources).fits(self.capacity)
+
+    def _reserve(
+        self: "AdmissionController", key: str, resources: BuildResources
+    ) -> None:
+        self._reserved[key] = resources
+        self._used += resources
+        self._stats.admitted += 1
+
+    def _release(self: "AdmissionController", key: str) -> bool:
+        resources = self._reserved.pop(key, None)
+        if resources is None:
+            return False
+        self._used -= resources
+        self._bound.pop(key, None)
+        return True
+
+    def _admit_queued(self: "AdmissionController") -> List[Dict]:
+        admitted = []
+        while self._queue and self._fits(self._queue[0][3]):
+            _, _, key, resources, schedule = heapq.heappop(self._queue)
+            self._queued.discard(key)
+            self._reserve(key, resources)
+            admitted.append(schedule)
+        return admitted
+
+    def offer(
+        self: "AdmissionController",
+        key: str,
+        schedule: Dict,
+        resources: BuildResources,
+        priority: int = 0,
+    ) -> bool:
+        """Admit a build or queue it until there is capacity.
+
+        A key that is already queued, admitted or running is ignored, e.g.
+        a redelivered schedule, so its capacity is only counted once.
+
+        Args:
+            key (str): Unique key of the schedule
+            schedule (Dict): Schedule to dispatch
+            resources (BuildResources): Resources the build claims
+            priority (int): Higher is admitted first
+
+        Returns:
+            bool: True if dispatched right away
+        """
+        with self._lock:
+            if (
+                key in self._reserved
+                or key in self._queued
+                or key in self._bound.values()
+            ):
+                logger.warning(f"Ignoring build {key}, it was offered already")
+                return False
+            if not self._queue and self._fits(resources):
+                self._reserve(key, resources)
+                admitted = True
+            else:
+                heapq.heappush(
+                    self._queue, (-priority, next(self._seq), key, resources, schedule)
+                )
+                self._queued.add(key)
+                self._stats.held += 1
+                admitted = False
+        if admitted:
+            self.dispatch(schedule)
+        else:
+            logger.info(f"Holding build {key} until the cluster has capacity")
+        return admitted
+
+    def bind(self: "AdmissionController", key: str, workflow_name: str) -> None:
+        """Move the reservation of a schedule to its created workflow.
+
+        Args:
+            key (str): Key the build was offered with
+            workflow_name (str): Name of the created workflow
+        """
+        with self._lock:
+            resources = self._reserved.pop(key, None)
+            if resources is None:
+                return
+            # The informer may have adopted the workflow already
+            self._release(workflow_name)
+            self._reserved[workflow_name] = resources
+            self._bound[workflow_name] = key
+
+    def adopt(
+        self: "AdmissionController", workflow_name: str, resources: BuildResources
+    ) -> None:
+        """Account for a running workflow that was not admitted here.
+
+        Args:
+            workflow_name (str): Name of the workflow
+            resources (BuildResources): Resources the workflow claims
+        """
+        with self._lock:
+            if workflow_name not in self._reserved:
+                self._reserved[workflow_name] = resources
+                self._used += resources
+
+    def release(self: "AdmissionController", key: str) -> None:
+        """Release the reservation of a finished build and admit queued ones.
+
+        Args:
+            key (str): Workflow name, or schedule key if never created
+        """
+        with self._lock:
+            if not self._release(key):
+                return
+            self._stats.released += 1
+            admitted = self._admit_queued()
+        for schedule in admitted:
+            self.dispatch(schedule)
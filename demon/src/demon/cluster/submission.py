@@ -0,0 +1,353 @@
+"""Concurrent, tenant-fair submission of schedules to a cluster."""
+
+from collections import deque, OrderedDict
+from dataclasses import asdict, dataclass, field
+from http import HTTPStatus
+import heapq
+from itertools import count
+import random
+from threading import Condition, Event, Lock, Thread
+import time
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from kubernetes.client.rest import ApiException
+from logzero import logger
+
+# Upper bounds in seconds, the last bucket is unbounded
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+RETRYABLE_STATUSES = frozenset([HTTPStatus.TOO_MANY_REQUESTS])
+# Statuses the API server answers with before acting on a request
+UNPROCESSED_STATUSES = frozenset(
+    [HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.SERVICE_UNAVAILABLE]
+)
+
+
+class LatencyHistogram:
+    """Cumulative histogram of latencies, in the Prometheus layout."""
+
+    def __init__(
+        self: "LatencyHistogram", buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> None:
+        """Initialize histogram.
+
+        Args:
+            buckets (Sequence[float]): Sorted upper bounds in seconds
+        """
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = Lock()
+
+    def observe(self: "LatencyHistogram", seconds: float) -> None:
+        """Record a latency.
+
+        Args:
+            seconds (float): Observed latency
+        """
+        index = next(
+            (i for i, bound in enumerate(self.buckets) if seconds <= bound),
+            len(self.buckets),
+        )
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += seconds
+
+    def snapshot(self: "LatencyHistogram") -> Dict:
+        """Return cumulative bucket counts, count and sum.
+
+        Returns:
+            Dict: Histogram with `buckets` keyed by upper bound
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        buckets = {}
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+        return {"buckets": buckets, "count": cumulative, "sum": total}
+
+
+@dataclass
+class SubmissionStats:
+    """Counters of a submission pool."""
+
+    queue_depth: int = 0
+    in_flight: int = 0
+    enqueued: int = 0
+    submitted: int = 0
+    retried: int = 0
+    failed: int = 0
+    tenants: int = 0
+
+
+@dataclass
+class _Submission:
+    tenant: str
+    schedule: Dict
+    enqueued_at: float = field(default_factory=time.monotonic)
+    attempts: int = 0
+
+
+def is_retryable(error: Exception) -> bool:
+    """Check if a failed submission is worth retrying.
+
+    Args:
+        error (Exception): Error raised by the submission
+
+    Returns:
+        bool: True for throttling and server side errors of the API server
+    """
+    return isinstance(error, ApiException) and (
+        error.status in RETRYABLE_STATUSES
+        or (error.status or 0) >= HTTPStatus.INTERNAL_SERVER_ERROR
+    )
+
+
+def may_have_succeeded(error: Exception) -> bool:
+    """Check if a failed request may have been carried out anyway.
+
+    Server side errors other than 503 can be returned after the object was
+    persisted, e.g. a 504 on a slow etcd write.
+
+    Args:
+        error (Exception): Error raised by the submission
+
+    Returns:
+        bool: True if the request must not be repeated blindly
+    """
+    return (
+        isinstance(error, ApiException)
+        and (error.status or 0) >= HTTPStatus.INTERNAL_SERVER_ERROR
+        and error.status not in UNPROCESSED_STATUSES
+    )
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Get the delay the API server asked for.
+
+    Args:
+        error (Exception): Error raised by the submission
+
+    Returns:
+        Optional[float]: Seconds from the Retry-After header, if any
+    """
+    headers = getattr(error, "headers", None) or {}
+    try:
+        return float(headers["Retry-After"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def schedule_tenant(schedule: Dict) -> str:
+    """Return the tenant a schedule is accounted to.
+
+    Args:
+        schedule (Dict): Schedule message data
+
+    Returns:
+        str: Owning user if known, else the mine name
+    """
+    job = schedule.get("job") or {}
+    metadata = job.get("job_metadata") or {}
+    specification = job.get("specification") or {}
+    return str(metadata.get("user_id") or specification.get("mine_name") or "default")
+
+
+class SubmissionPool:
+    """Submit schedules from worker threads, round robin across tenants.
+
+    Every tenant has its own FIFO queue and workers take the next schedule
+    from the tenant after the one served last, so one tenant triggering
+    many builds cannot starve the others. Submissions failing with a 429 or
+    a 5xx are retried with full jitter exponential backoff, or after the
+    delay of a Retry-After header, without holding a worker meanwhile.
+
+    Latencies are recorded from enqueue to the first attempt (`wait`) and
+    from enqueue to a successful submission (`submit`).
+    """
+
+    def __init__(
+        self: "SubmissionPool",
+        submit: Callable[[Dict], object],
+        workers: int = 4,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        tenant_of: Callable[[Dict], str] = schedule_tenant,
+        report_interval: Optional[float] = None,
+        on_failed: Optional[Callable[[Dict, Exception], None]] = None,
+    ) -> None:
+        """Initialize pool.
+
+        Args:
+            submit (Callable[[Dict], object]): Submits a single schedule
+            workers (int): Max concurrent submissions
+            max_retries (int): Max retries of a schedule
+            backoff_base (float): Backoff ceiling of the first retry in seconds
+            backoff_max (float): Max backoff in seconds
+            tenant_of (Callable[[Dict], str]): Tenant of a schedule
+            report_interval (Optional[float]): Seconds between stats log lines,
+                None to never log them
+            on_failed (Optional[Callable[[Dict, Exception], None]]): Called
+                with schedules that will not be retried and their error
+        """
+        self.submit_fn = submit
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.tenant_of = tenant_of
+        self.report_interval = report_interval
+        self.on_failed = on_failed
+        self.wait_latency = LatencyHistogram()
+        self.submit_latency = LatencyHistogram()
+        # Tenants with queued schedules, next to be served first
+        self._queues: "OrderedDict[str, Deque[_Submission]]" = OrderedDict()
+        # Schedules waiting for a retry, by due time
+        self._delayed: List[Tuple[float, int, _Submission]] = []
+        self._seq = count()
+        self._stats = SubmissionStats()
+        self._cond = Condition()
+        self._closed = False
+        self._stopped = Event()
+        self._threads: List[Thread] = []
+
+    def start(self: "SubmissionPool") -> "SubmissionPool":
+        """Start the worker threads.
+
+        Returns:
+            SubmissionPool: Started pool
+        """
+        for i in range(self.workers):
+            thread = Thread(target=self._run, name=f"submitter-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        if self.report_interval:
+            Thread(target=self._report, name="submitter-stats", daemon=True).start()
+        return self
+
+    def enqueue(self: "SubmissionPool", schedule: Dict) -> None:
+        """Queue a schedule for submission.
+
+        Args:
+            schedule (Dict): Schedule message data
+        """
+        submission = _Submission(self.tenant_of(schedule), schedule)
+        with self._cond:
+            self._queues.setdefault(submission.tenant, deque()).append(submission)
+            self._stats.enqueued += 1
+            self._cond.notify()
+
+    def stats(self: "SubmissionPool") -> Dict:
+        """Return a snapshot of the counters and latency histograms.
+
+        Returns:
+            Dict: Counters by name, with `wait_latency` and `submit_latency`
+        """
+        with self._cond:
+            self._stats.queue_depth = sum(len(q) for q in self._queues.values()) + len(
+                self._delayed
+            )
+            self._stats.tenants = len(self._queues)
+            stats = asdict(self._stats)
+        stats["wait_latency"] = self.wait_latency.snapshot()
+        stats["submit_latency"] = self.submit_latency.snapshot()
+        return stats
+
+    def _promote_due(self: "SubmissionPool", now: float) -> None:
+        while self._delayed and self._delayed[0][0] <= now:
+            _, _, submission = heapq.heappop(self._delayed)
+            # Retries go ahead of the newer schedules of their tenant
+            self._queues.setdefault(submission.tenant, deque()).appendleft(submission)
+
+    def _take(self: "SubmissionPool") -> Optional[_Submission]:
+        # Returns None once closed and drained
+        with self._cond:
+            while True:
+                self._promote_due(time.monotonic())
+                if self._queues:
+                    tenant, queue = next(iter(self._queues.items()))
+                    submission = queue.popleft()
+                    del self._queues[tenant]
+                    if queue:
+                        self._queues[tenant] = queue
+                    self._stats.in_flight += 1
+                    return submission
+                if self._delayed:
+                    self._cond.wait(self._delayed[0][0] - time.monotonic())
+                elif self._closed:
+                    return None
+                else:
+                    self._cond.wait()
+
+    def _backoff(
+        self: "SubmissionPool", submission: _Submission, error: Exception
+    ) -> float:
+        delay = retry_after(error)
+        if delay is None:
+            ceiling = self.backoff_base * 2 ** (submission.attempts - 1)
+            delay = random.uniform(0, min(self.backoff_max, ceiling))  # noqa: S311
+        return delay
+
+    def _process(self: "SubmissionPool", submission: _Submission) -> None:
+        if submission.attempts == 0:
+            self.wait_latency.observe(time.monotonic() - submission.enqueued_at)
+        submission.attempts += 1
+        try:
+            self.submit_fn(submission.schedule)
+        except Exception as e:
+            name = submission.schedule.get("job", {}).get("name")
+            if is_retryable(e) and submission.attempts <= self.max_retries:
+                delay = self._backoff(submission, e)
+                logger.warning(
+                    f"Submission of {name} failed with {e.status}, "
+                    f"retry {submission.attempts} in {delay:.1f}s"
+                )
+                with self._cond:
+                    heapq.heappush(
+                        self._delayed,
+                        (time.monotonic() + delay, next(self._seq), submission),
+                    )
+                    self._stats.retried += 1
+                    self._cond.notify()
+                return
+            logger.error(f"Submission of {name} failed due to {e}")
+            with self._cond:
+                self._stats.failed += 1
+            if self.on_failed is not None:
+                self.on_failed(submission.schedule, e)
+            return
+        self.submit_latency.observe(time.monotonic() - submission.enqueued_at)
+        with self._cond:
+            self._stats.submitted += 1
+
+    def _run(self: "SubmissionPool") -> None:
+        while True:
+            submission = self._take()
+            if submission is None:
+                return
+            try:
+                self._process(submission)
+            finally:
+                with self._cond:
+                    self._stats.in_flight -= 1
+
+    def _report(self: "SubmissionPool") -> None:
+        while not self._stopped.wait(self.report_interval):
+            logger.info(f"Submission stats: {self.stats()}")
+
+    def close(self: "SubmissionPool", timeout: Optional[float] = None) -> None:
+        """Submit queued schedules, including pending retries, and stop.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait for each worker
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._stopped.set()
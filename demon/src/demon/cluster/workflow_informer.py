@@ -0,0 +1,234 @@
+"""In-process list+watch cache of Argo Workflows."""
+
+from collections import defaultdict
+from http import HTTPStatus
+from threading import Event, Lock, Thread
+from typing import Callable, Dict, List, Optional, Set
+
+from kubernetes import client as kube_client, watch
+from kubernetes.client.rest import ApiException
+from logzero import logger
+
+from demon.observer.cursor import WatchCursor
+
+GROUP = "argoproj.io"
+VERSION = "v1alpha1"
+PLURAL = "workflows"
+
+# Label set on workflows with the name of the mine they build
+MINE_LABEL = "intermine.org/mine"
+# Label set on workflows with the key of the schedule they were created for
+SCHEDULE_LABEL = "intermine.org/schedule"
+
+Handler = Callable[[Optional[Dict], Optional[Dict]], None]
+
+
+class WorkflowInformer:
+    """Shared cache of the Workflows of a namespace, indexed by name and mine.
+
+    The cache is filled by a list and kept up to date by a watch with
+    bookmarks. A 410 Gone triggers a single relist. Handlers are called
+    with the cached and the new version of every changed workflow, `None`
+    standing for a missing one. Cached objects are shared, treat them as
+    read only.
+    """
+
+    def __init__(
+        self: "WorkflowInformer",
+        api: kube_client.CustomObjectsApi,
+        namespace: str = "workflow",
+        cursor: Optional[WatchCursor] = None,
+        retry_interval: float = 5.0,
+    ) -> None:
+        """Initialize informer.
+
+        Args:
+            api (kube_client.CustomObjectsApi): Kubernetes custom objects api
+            namespace (str): Namespace of the workflows
+            cursor (Optional[WatchCursor]): Persisted resourceVersion, lets
+                the first list be served from the API server cache
+            retry_interval (float): Seconds to wait after a failed watch
+        """
+        self.api = api
+        self.namespace = namespace
+        self.cursor = cursor
+        self.retry_interval = retry_interval
+        self._objects: Dict[str, Dict] = {}
+        self._by_mine: Dict[str, Set[str]] = defaultdict(set)
+        self._handlers: List[Handler] = []
+        self._resource_version = cursor.resource_version if cursor else None
+        self._lock = Lock()
+        self._synced = Event()
+        self._stopped = Event()
+        self._watch: Optional[watch.Watch] = None
+
+    def add_handler(self: "WorkflowInformer", handler: Handler) -> None:
+        """Register a handler called with the old and new version of a workflow.
+
+        Args:
+            handler (Handler): Called from the informer thread
+        """
+        self._handlers.append(handler)
+
+    def get(self: "WorkflowInformer", name: str) -> Optional[Dict]:
+        """Get a cached workflow by name.
+
+        Args:
+            name (str): Workflow name
+
+        Returns:
+            Optional[Dict]: Workflow if cached
+        """
+        with self._lock:
+            return self._objects.get(name)
+
+    def list_by_mine(self: "WorkflowInformer", mine_name: str) -> List[Dict]:
+        """Get cached workflows of a mine.
+
+        Args:
+            mine_name (str): Value of the mine label
+
+        Returns:
+            List[Dict]: Workflows of the mine
+        """
+        with self._lock:
+            return [self._objects[name] for name in self._by_mine.get(mine_name, ())]
+
+    def wait_for_sync(
+        self: "WorkflowInformer", timeout: Optional[float] = None
+    ) -> bool:
+        """Wait for the first list to fill the cache.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait
+
+        Returns:
+            bool: True once synced
+        """
+        return self._synced.wait(timeout)
+
+    def _index(self: "WorkflowInformer", obj: Dict, add: bool) -> None:
+        name = obj["metadata"]["name"]
+        mine_name = (obj["metadata"].get("labels") or {}).get(MINE_LABEL)
+        if mine_name is None:
+            return
+        if add:
+            self._by_mine[mine_name].add(name)
+        else:
+            self._by_mine[mine_name].discard(name)
+            if not self._by_mine[mine_name]:
+                del self._by_mine[mine_name]
+
+    def _store(self: "WorkflowInformer", name: str, obj: Optional[Dict]) -> None:
+        with self._lock:
+            old = self._objects.pop(name, None)
+            if old is not None:
+                self._index(old, add=False)
+            if obj is not None:
+                self._objects[name] = obj
+                self._index(obj, add=True)
+        self._notify(old, obj)
+
+    def _notify(
+        self: "WorkflowInformer", old: Optional[Dict], new: Optional[Dict]
+    ) -> None:
+        for handler in self._handlers:
+            try:
+                handler(old, new)
+            except Exception as e:
+                logger.error(f"Workflow handler failed due to {e}")
+
+    def _set_resource_version(
+        self: "WorkflowInformer", resource_version: str, listed: bool = False
+    ) -> None:
+        self._resource_version = resource_version
+        if self.cursor is not None:
+            if listed:
+                self.cursor.reset(resource_version)
+            else:
+                self.cursor.update(resource_version)
+
+    def _list(self: "WorkflowInformer") -> None:
+        """Relist workflows, replacing the cache, and reset the cursor.
+
+        Workflows missing from the list are removed and their handlers called
+        with `None`, every listed one is stored and notified. The watch then
+        resumes from the resourceVersion of the list.
+
+        Raises:
+            ApiException: List failed, with status 410 Gone if the cursor is
+                older than the history retained by the API server
+
+        # noqa: DAR402 ApiException
+        """
+        kwargs = {}
+        if self._resource_version is not None:
+            # Served from the API server watch cache instead of etcd
+            kwargs["resource_version"] = self._resource_version
+        resp = self.api.list_namespaced_custom_object(
+            GROUP, VERSION, self.namespace, PLURAL, **kwargs
+        )
+        items = {item["metadata"]["name"]: item for item in resp["items"]}
+        with self._lock:
+            removed = [name for name in self._objects if name not in items]
+        for name in removed:
+            self._store(name, None)
+        for name, item in items.items():
+            self._store(name, item)
+        self._set_resource_version(resp["metadata"]["resourceVersion"], listed=True)
+        self._synced.set()
+
+    def _watch_changes(self: "WorkflowInformer") -> None:
+        self._watch = watch.Watch()
+        for event in self._watch.stream(
+            self.api.list_namespaced_custom_object,
+            GROUP,
+            VERSION,
+            self.namespace,
+            PLURAL,
+            resource_version=self._resource_version,
+            allow_watch_bookmarks=True,
+        ):
+            obj = event["raw_object"]
+            if event["type"] in ["ADDED", "MODIFIED"]:
+                self._store(obj["metadata"]["name"], obj)
+            elif event["type"] == "DELETED":
+                self._store(obj["metadata"]["name"], None)
+            self._set_resource_version(obj["metadata"]["resourceVersion"])
+
+    def run(self: "WorkflowInformer") -> None:
+        """List and watch workflows until stopped."""
+        listed = False
+        while not self._stopped.is_set():
+            try:
+                if not listed:
+                    self._list()
+                    listed = True
+                self._watch_changes()
+            except ApiException as e:
+                if e.status == HTTPStatus.GONE:
+                    # Cursor is older than the retained history, relist once
+                    logger.warning(f"Workflow cursor {self._resource_version} expired")
+                    self._resource_version = None
+                    listed = False
+                    continue
+                logger.error(f"Workflow watch failed due to {e}")
+                self._stopped.wait(self.retry_interval)
+            except Exception as e:
+                logger.error(f"Workflow watch failed due to {e}")
+                self._stopped.wait(self.retry_interval)
+
+    def start(self: "WorkflowInformer") -> "WorkflowInformer":
+        """Run the informer on a daemon thread.
+
+        Returns:
+            WorkflowInformer: Started informer
+        """
+        Thread(target=self.run, name="workflow-informer", daemon=True).start()
+        return self
+
+    def stop(self: "WorkflowInformer") -> None:
+        """Stop listing and watching."""
+        self._stopped.set()
+        if self._watch is not None:
+            self._watch.stop()
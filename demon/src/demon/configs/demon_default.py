@@ -1,7 +1,7 @@
 """Demon default config."""
 
 from blackcap.configs.default import DefaultConfig
-from xdg import xdg_data_home
+from xdg import xdg_data_home, xdg_state_home
 
 
 class DemonDefaultConfig(DefaultConfig):
@@ -19,3 +19,17 @@ class DemonDefaultConfig(DefaultConfig):
     NATS_ENDPOINT: str = "nats://0.0.0.0:4222"
     CLUSTER: str = "ARGO"
     ARGO_ENDPOINT: str = "https://localhost:2746"
+    OBSERVER_QUEUE_SIZE: int = 10000
+    OBSERVER_COALESCE_WINDOW: float = 0.5
+    OBSERVER_BATCH_SIZE: int = 100
+    OBSERVER_STATE_FILE: str = str(xdg_state_home() / "imcloud" / "argo_observer.json")
+    OBSERVER_CURSOR_INTERVAL: float = 5.0
+    WORKFLOW_SPEC_CACHE_SIZE: int = 128
+    SUBMISSION_WORKERS: int = 4
+    SUBMISSION_MAX_RETRIES: int = 5
+    SUBMISSION_BACKOFF_BASE: float = 1.0
+    SUBMISSION_BACKOFF_MAX: float = 60.0
+    SUBMISSION_STATS_INTERVAL: float = 60.0
+    ADMISSION_MAX_BUILDS: int = 4
+    ADMISSION_MAX_STORAGE: str = "40Gi"
+    ADMISSION_MAX_MEMORY: str = "32Gi"
@@ -1,118 +1,187 @@
-"""Listen to Kubernetes events, filter and publish messages related to Argo
-Workflows to NATS.
+"""Watch Argo Workflows, derive progress from their status and publish
+messages about it to NATS.
 """
 
+from datetime import datetime
+from pathlib import Path
 import re
+import time
+from typing import Dict, List, Optional
 
-# import json
-from typing import Dict, Optional
-
-from kubernetes import client, config as kube_config, watch
+from kubernetes import client, config as kube_config
+from logzero import logger
 
 from blackcap.messenger import messenger_registry
 from blackcap.configs import config_registry
 
-
-WORKFLOW_STATES = [
-    "WorkflowRunning",
-    "WorkflowSucceeded",
-    "WorkflowFailed",
-    "WorkflowTimedOut",
-]
-WORKFLOW_NODE_STATES = [
-    "WorkflowNodeRunning",
-    "WorkflowNodeSucceeded",
-    "WorkflowNodeFailed",
-    "WorkflowNodeError",
-]
-ERROR_STATES = [
-    "WorkflowFailed",
-    "WorkflowTimedOut",
-    "WorkflowNodeFailed",
-    "WorkflowNodeError",
-]
-
-
-def _parse_object(obj) -> Optional[Dict]:
-    try:
-        if obj.reason in WORKFLOW_NODE_STATES:
-            # Event is for workflow **node** state change.
-
-            # Annotations are only present for events of type ADDED.
-            # Some events are only broadcasted with type MODIFIED without
-            # annotations, so we have to read it from the message instead.
-            node_name = (
-                obj.metadata.annotations["workflows.argoproj.io/node-name"]
-                if obj.metadata.annotations
-                else obj.message.split(" ")[-1]
-            )
-
-            # This match also ensures we ignore events for
-            # build-a-mine-9l4bh[7]
-            # build-a-mine-9l4bh[0].start-postgres(0)
-            # which are redundant.
-            match = re.fullmatch(r"([\w\-]+)\[(\d+)\]\.([\w\-]+)", node_name)
-            if not match:
-                return None
-
-            msg = {
-                "message_type": "job_update",
-                "data": {
-                    "status": obj.reason,
-                    "workflow_name": obj.involved_object.name,
+from demon.cluster.workflow_informer import WorkflowInformer
+from demon.observer.cursor import WatchCursor
+from demon.observer.publisher import CoalescingPublisher
+
+
+# Workflow and node phases mapped to the published states
+WORKFLOW_STATES = {
+    "Running": "WorkflowRunning",
+    "Succeeded": "WorkflowSucceeded",
+    "Failed": "WorkflowFailed",
+    "Error": "WorkflowFailed",
+}
+WORKFLOW_NODE_STATES = {
+    "Running": "WorkflowNodeRunning",
+    "Succeeded": "WorkflowNodeSucceeded",
+    "Failed": "WorkflowNodeFailed",
+    "Error": "WorkflowNodeError",
+}
+ERROR_STATES = frozenset(
+    [
+        "WorkflowFailed",
+        "WorkflowTimedOut",
+        "WorkflowNodeFailed",
+        "WorkflowNodeError",
+    ]
+)
+
+# Phases nodes and workflows end in
+FINAL_PHASES = frozenset(["Succeeded", "Failed", "Error"])
+
+# Matches step nodes like build-a-mine-9l4bh[0].start-postgres and DAG task
+# nodes like build-a-mine-9l4bh[5].integrate-sources.integrate-uniprot, the
+# step name being the last part
+NODE_NAME_PATTERN = re.compile(r"([\w\-]+)\[(\d+)\]\.(?:[\w\-]+\.)?([\w\-]+)")
+
+
+def _message(status: str, data: Dict, message: Optional[str]) -> Dict:
+    msg = {"message_type": "job_update", "data": {"status": status, **data}}
+    if status in ERROR_STATES:
+        msg["message_type"] = "job_error"
+        msg["data"]["error_message"] = message
+    return msg
+
+
+def _reached_after(obj: Dict, phase: str, since: Optional[float]) -> bool:
+    # Whether a node or workflow status got to its phase after `since`, an
+    # epoch time. Without a time, only phases that are not final are current.
+    reached_at = obj.get("finishedAt" if phase in FINAL_PHASES else "startedAt")
+    if since is None or not reached_at:
+        return phase not in FINAL_PHASES
+    # RFC 3339, fromisoformat only takes the Z suffix from Python 3.11
+    reached = datetime.fromisoformat(reached_at.replace("Z", "+00:00"))
+    return reached.timestamp() > since
+
+
+def workflow_messages(
+    old: Optional[Dict], new: Optional[Dict], since: Optional[float] = None
+) -> List[Dict]:
+    """Derive progress messages from two versions of a workflow.
+
+    Node and workflow phases that changed produce a message each. When
+    there is no old version, i.e. on the first list after a restart, nodes
+    and workflows are reported only if they started or finished after
+    `since`. Changes from before the restart are not published again and
+    the ones missed while down are.
+
+    Args:
+        old (Optional[Dict]): Cached workflow, None if not seen before
+        new (Optional[Dict]): Current workflow, None if deleted
+        since (Optional[float]): Epoch time up to which changes were
+            published, None to report running but not finished nodes and
+            workflows without an old version
+
+    Returns:
+        List[Dict]: Messages in the order the nodes started
+    """
+    # Prior workflows get deleted when they get GC'ed, they are not in progress
+    if new is None:
+        return []
+    workflow_name = new["metadata"]["name"]
+    status = new.get("status") or {}
+    old_status = (old or {}).get("status") or {}
+    old_nodes = old_status.get("nodes") or {}
+
+    msgs = []
+    nodes = sorted(
+        (status.get("nodes") or {}).items(),
+        key=lambda item: item[1].get("startedAt") or "",
+    )
+    for node_id, node in nodes:
+        phase = node.get("phase")
+        if phase not in WORKFLOW_NODE_STATES:
+            continue
+        if old_nodes.get(node_id, {}).get("phase") == phase:
+            continue
+        if old is None and not _reached_after(node, phase, since):
+            continue
+        # This match also ensures we ignore nodes like
+        # build-a-mine-9l4bh[7]
+        # build-a-mine-9l4bh[0].start-postgres(0)
+        # which are redundant.
+        match = NODE_NAME_PATTERN.fullmatch(node.get("name", ""))
+        if not match:
+            continue
+        msgs.append(
+            _message(
+                WORKFLOW_NODE_STATES[phase],
+                {
+                    "workflow_name": workflow_name,
                     "current_step_number": int(match.group(2)),
                     "current_step_name": match.group(3),
                 },
-            }
-            if obj.reason in ERROR_STATES:
-                msg["message_type"] = "job_error"
-                msg["data"]["error_message"] = obj.message
-
-            return msg
-        elif obj.reason in WORKFLOW_STATES:
-            # Event is for workflow state change.
-
-            msg = {
-                "message_type": "job_update",
-                "data": {
-                    "status": obj.reason,
-                    "workflow_name": obj.involved_object.name,
-                },
-            }
-            if obj.reason in ERROR_STATES:
-                msg["message_type"] = "job_error"
-                msg["data"]["error_message"] = obj.message
+                node.get("message"),
+            )
+        )
 
-            return msg
-    except KeyError:
-        return None
+    phase = status.get("phase")
+    if (
+        old is None
+        and phase in WORKFLOW_STATES
+        and not _reached_after(status, phase, since)
+    ):
+        return msgs
+    if phase in WORKFLOW_STATES and old_status.get("phase") != phase:
+        msgs.append(
+            _message(
+                WORKFLOW_STATES[phase],
+                {"workflow_name": workflow_name},
+                status.get("message"),
+            )
+        )
+    return msgs
 
 
 def main(namespace: str) -> None:
     config = config_registry.get_config()
     messenger = messenger_registry.get_messenger(config.MESSENGER)
+    # Publish off the watch loop so NATS round trips never stall it
+    publisher = CoalescingPublisher(
+        messenger,
+        "mineprogress",
+        max_queue=config.OBSERVER_QUEUE_SIZE,
+        window=config.OBSERVER_COALESCE_WINDOW,
+        batch_size=config.OBSERVER_BATCH_SIZE,
+    ).start()
+
+    # Resume from the last seen resourceVersion, so restarts are cheap
+    cursor = WatchCursor(
+        Path(config.OBSERVER_STATE_FILE),
+        f"workflows/{namespace}",
+        interval=config.OBSERVER_CURSOR_INTERVAL,
+    )
+
+    # Changes older than the cursor were published before the restart, the
+    # ones newer were missed. Without a cursor only new changes are reported.
+    since = cursor.seen_at if cursor.seen_at is not None else time.time()
 
     kube_config.load_incluster_config()
-    api = client.CoreV1Api()
-    w = watch.Watch()
+    informer = WorkflowInformer(client.CustomObjectsApi(), namespace, cursor=cursor)
 
-    for event in w.stream(
-        api.list_namespaced_event,
-        namespace,
-        field_selector="involvedObject.kind=Workflow",
-    ):
-        # Prior workflows will broadcast DELETED events when they get GC'ed, so
-        # we have to filter those out so we won't publish them as being a
-        # workflow in progress.
-        if event["type"] in ["ADDED", "MODIFIED"]:
-            msg = _parse_object(event["object"])
-            if msg:
-                messenger.publish(msg, "mineprogress")
-                # print(str(event))
-            # print(str(msg))
-
-        # print(json.dumps({'type': event['type'],
-        #     'involved_object': {'name': event['object'].involved_object.name},
-        #     'message': event['object'].message,
-        #     'metadata': {'annotations': event['object'].metadata.annotations},
-        #     'reason': event['object'].reason}, indent=4))
+    def publish_progress(old: Optional[Dict], new: Optional[Dict]) -> None:
+        for msg in workflow_messages(old, new, since):
+            publisher.submit(msg)
+
+    informer.add_handler(publish_progress)
+    try:
+        informer.run()
+    finally:
+        publisher.close()
+        cursor.flush()
+        logger.info(f"Publisher stats: {publisher.stats()}")
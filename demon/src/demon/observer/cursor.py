@@ -0,0 +1,94 @@
+"""Persisted resourceVersion cursors of Kubernetes watches."""
+
+import json
+import os
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+import time
+from typing import Dict, Optional, Union
+
+
+class WatchCursor:
+    """Last seen resourceVersion of a watch, persisted in a state file.
+
+    Writes are throttled to one every `interval` seconds. The version that
+    is written is the one seen at the previous write, so every event it
+    covers has had at least `interval` seconds to be published before a
+    restart skips it. It is written with the wall clock time it was seen
+    at, `seen_at`, the time up to which changes have been handled.
+    """
+
+    def __init__(
+        self: "WatchCursor", path: Path, key: str, interval: float = 5.0
+    ) -> None:
+        """Initialize cursor.
+
+        Args:
+            path (Path): State file shared by every cursor
+            key (str): Key of this watch in the state file
+            interval (float): Min seconds between writes
+        """
+        self.path = Path(path)
+        self.key = key
+        self.interval = interval
+        saved = self._read().get(key)
+        if isinstance(saved, dict):
+            self.resource_version: Optional[str] = saved.get("resource_version")
+            self.seen_at: Optional[float] = saved.get("seen_at")
+        else:
+            # Written before seen_at was recorded
+            self.resource_version = saved
+            self.seen_at = None
+        self._settled: Optional[str] = self.resource_version
+        self._settled_at = self.seen_at
+        self._saved_at = time.monotonic()
+
+    def _read(self: "WatchCursor") -> Dict[str, Union[str, Dict]]:
+        try:
+            return json.loads(self.path.read_text())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write(
+        self: "WatchCursor", resource_version: Optional[str], seen_at: Optional[float]
+    ) -> None:
+        state = self._read()
+        if resource_version is None:
+            state.pop(self.key, None)
+        else:
+            state[self.key] = {"resource_version": resource_version, "seen_at": seen_at}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with NamedTemporaryFile("w", dir=self.path.parent, delete=False) as tmp:
+            json.dump(state, tmp)
+        os.replace(tmp.name, self.path)
+
+    def update(self: "WatchCursor", resource_version: str) -> None:
+        """Record the resourceVersion of a processed event.
+
+        Args:
+            resource_version (str): resourceVersion of the event
+        """
+        self.resource_version = resource_version
+        if time.monotonic() - self._saved_at >= self.interval:
+            if self._settled is not None:
+                self._write(self._settled, self._settled_at)
+            self._settled = resource_version
+            self._settled_at = time.time()
+            self._saved_at = time.monotonic()
+
+    def reset(self: "WatchCursor", resource_version: Optional[str] = None) -> None:
+        """Restart from a new resourceVersion, usually after a relist.
+
+        Args:
+            resource_version (Optional[str]): resourceVersion of the list
+        """
+        self.resource_version = resource_version
+        self._settled = resource_version
+        self._settled_at = time.time()
+        self._saved_at = time.monotonic()
+        self._write(resource_version, self._settled_at)
+
+    def flush(self: "WatchCursor") -> None:
+        """Write the latest resourceVersion, once pending events are published."""
+        if self.resource_version is not None:
+            self._write(self.resource_version, time.time())
@@ -0,0 +1,252 @@
+"""Batched, coalescing publisher for progress messages."""
+
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from itertools import count
+import json
+from threading import Condition, Thread
+import time
+from typing import Dict, Hashable, List, Optional
+
+from blackcap.messenger.base import BaseMessenger
+from blackcap.messenger.nats_messenger import NATSMessenger
+from blackcap.utils.json_encoders import UUIDEncoder
+from logzero import logger
+
+
+# Statuses nodes and workflows end in, published even if updates follow
+FINAL_STATUSES = frozenset(
+    [
+        "WorkflowSucceeded",
+        "WorkflowFailed",
+        "WorkflowTimedOut",
+        "WorkflowNodeSucceeded",
+        "WorkflowNodeFailed",
+        "WorkflowNodeError",
+    ]
+)
+
+
+@dataclass
+class PublisherStats:
+    """Counters of a publisher."""
+
+    queue_depth: int = 0
+    submitted: int = 0
+    published: int = 0
+    coalesced: int = 0
+    dropped: int = 0
+    failed: int = 0
+    batches: int = 0
+
+
+def message_key(msg: Dict) -> Hashable:
+    """Return the key successive updates of the same node are coalesced by.
+
+    Args:
+        msg (Dict): Progress message
+
+    Returns:
+        Hashable: Workflow name and step of node messages
+    """
+    data = msg.get("data", {})
+    return (
+        data.get("workflow_name"),
+        data.get("current_step_number"),
+        data.get("current_step_name"),
+    )
+
+
+def is_final(msg: Dict) -> bool:
+    """Return whether a message carries a terminal or error status.
+
+    Args:
+        msg (Dict): Progress message
+
+    Returns:
+        bool: True for error messages and final statuses
+    """
+    return (
+        msg.get("message_type") == "job_error"
+        or msg.get("data", {}).get("status") in FINAL_STATUSES
+    )
+
+
+class CoalescingPublisher:
+    """Publish messages from a bounded queue on a background thread.
+
+    A message is held for `window` seconds before it is published. A newer
+    message with the same key replaces the pending one, so bursts of node
+    updates collapse into the latest state. Terminal and error statuses are
+    never replaced, they are published as their own messages. Pending
+    messages are published in batches of up to `batch_size` over a single
+    connection.
+
+    When the queue is full, pending node updates are dropped to make room.
+    Workflow, terminal and error messages are never dropped.
+    """
+
+    def __init__(
+        self: "CoalescingPublisher",
+        messenger: BaseMessenger,
+        topic_id: str,
+        max_queue: int = 10000,
+        window: float = 0.5,
+        batch_size: int = 100,
+    ) -> None:
+        """Initialize publisher.
+
+        Args:
+            messenger (BaseMessenger): Messenger to publish with
+            topic_id (str): Id of the topic
+            max_queue (int): Max number of pending messages
+            window (float): Seconds a message waits for newer updates
+            batch_size (int): Max messages published per connection
+        """
+        self.messenger = messenger
+        self.topic_id = topic_id
+        self.max_queue = max_queue
+        self.window = window
+        self.batch_size = batch_size
+        # Key to (time of first submit, latest message)
+        self._pending: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # Final messages are queued under unique keys so nothing replaces them
+        self._final_keys = count()
+        self._stats = PublisherStats()
+        self._cond = Condition()
+        self._closed = False
+        self._thread = Thread(target=self._run, name="publisher", daemon=True)
+
+    def start(self: "CoalescingPublisher") -> "CoalescingPublisher":
+        """Start the flusher thread.
+
+        Returns:
+            CoalescingPublisher: Started publisher
+        """
+        self._thread.start()
+        return self
+
+    def stats(self: "CoalescingPublisher") -> Dict[str, int]:
+        """Return a snapshot of the counters.
+
+        Returns:
+            Dict[str, int]: Counters by name
+        """
+        with self._cond:
+            self._stats.queue_depth = len(self._pending)
+            return asdict(self._stats)
+
+    def _droppable(self: "CoalescingPublisher", msg: Dict) -> bool:
+        return (
+            msg.get("message_type") == "job_update"
+            and msg.get("data", {}).get("current_step_name") is not None
+            and not is_final(msg)
+        )
+
+    def submit(self: "CoalescingPublisher", msg: Dict) -> bool:
+        """Queue a message for publishing.
+
+        Args:
+            msg (Dict): Message to publish
+
+        Returns:
+            bool: False if the message was dropped
+        """
+        key = message_key(msg)
+        with self._cond:
+            self._stats.submitted += 1
+            if is_final(msg):
+                # Supersedes a pending update of the node, later updates are
+                # queued after it
+                if self._pending.pop(key, None) is not None:
+                    self._stats.coalesced += 1
+                key = (key, next(self._final_keys))
+            elif key in self._pending:
+                submitted_at, _ = self._pending[key]
+                self._pending[key] = (submitted_at, msg)
+                self._stats.coalesced += 1
+                return True
+            if len(self._pending) >= self.max_queue:
+                victim = next(
+                    (
+                        pending_key
+                        for pending_key, (_, pending) in self._pending.items()
+                        if self._droppable(pending)
+                    ),
+                    None,
+                )
+                if victim is not None:
+                    del self._pending[victim]
+                    self._stats.dropped += 1
+                elif self._droppable(msg):
+                    self._stats.dropped += 1
+                    return False
+            self._pending[key] = (time.monotonic(), msg)
+            self._cond.notify()
+            return True
+
+    def _take_batch(self: "CoalescingPublisher") -> Optional[List[Dict]]:
+        # Waits for a full batch or the oldest message to leave its window,
+        # returns None once closed and drained
+        with self._cond:
+            while True:
+                if self._pending:
+                    submitted_at, _ = next(iter(self._pending.values()))
+                    wait = submitted_at + self.window - time.monotonic()
+                    if (
+                        self._closed
+                        or wait <= 0
+                        or len(self._pending) >= self.batch_size
+                    ):
+                        batch = []
+                        while self._pending and len(batch) < self.batch_size:
+                            batch.append(self._pending.popitem(last=False)[1][1])
+                        return batch
+                    self._cond.wait(wait)
+                elif self._closed:
+                    return None
+                else:
+                    self._cond.wait()
+
+    def _publish_batch(self: "CoalescingPublisher", batch: List[Dict]) -> None:
+        if isinstance(self.messenger, NATSMessenger):
+            # Publishes are fire and forget, so a batch is a single round trip
+            client = self.messenger.client
+            try:
+                for msg in batch:
+                    client.publish(
+                        subject=self.topic_id,
+                        payload=json.dumps(msg, cls=UUIDEncoder).encode("utf-8"),
+                    )
+            finally:
+                client.close()
+        else:
+            for msg in batch:
+                self.messenger.publish(msg, self.topic_id)
+
+    def _run(self: "CoalescingPublisher") -> None:
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            try:
+                self._publish_batch(batch)
+            except Exception as e:
+                logger.error(f"Unable to publish {len(batch)} messages due to {e}")
+                with self._cond:
+                    self._stats.failed += len(batch)
+                continue
+            with self._cond:
+                self._stats.published += len(batch)
+                self._stats.batches += 1
+
+    def close(self: "CoalescingPublisher", timeout: Optional[float] = None) -> None:
+        """Publish pending messages and stop the flusher thread.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait for the flusher
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout)
@@ -0,0 +1,91 @@
+"""Workflow submission time of ArgoCluster.
+
+Submits the build job of the event.json fixture against a fake API server
+and messenger. `reparse` repeats the former path of rendering the template
+and parsing the YAML twice per submission, `cold` renders and parses once
+per submission and `warm` reuses the cached spec. Run with
+`python tests/bench_submit_workflow.py`.
+"""
+
+import argparse
+import json
+import logging
+from pathlib import Path
+import time
+from typing import Callable, Dict
+
+import logzero
+import yaml
+
+from demon.cluster.argo_cluster import ArgoCluster
+
+EVENT = Path(__file__).parent / "event.json"
+
+
+class FakeKubeApi:
+    """Accepts every workflow without a round trip."""
+
+    def create_namespaced_custom_object(self: "FakeKubeApi", **kwargs: object) -> Dict:
+        """Pretend to create the workflow."""
+        return {"metadata": {"name": "build-a-mine-bench"}}
+
+
+class FakeMessenger:
+    """Drops every message."""
+
+    def publish(self: "FakeMessenger", msg: Dict, topic_id: str) -> str:
+        """Drop the message."""
+        return "ok"
+
+
+class LocalCluster(ArgoCluster):
+    """ArgoCluster without a Kubernetes cluster or NATS."""
+
+    kube_api = FakeKubeApi()
+    messenger = FakeMessenger()
+
+
+def bench(name: str, submit: Callable[[], object], rounds: int) -> None:
+    """Print the mean time of a submission."""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        submit()
+    elapsed = time.perf_counter() - start
+    print(f"{name:>7}: {elapsed / rounds * 1e6:10.1f} us/submission")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=500)
+    args = parser.parse_args()
+    logzero.loglevel(logging.WARNING)
+
+    job = json.loads(EVENT.read_text())["job"]
+    schedule = {
+        "job": {
+            "name": job["name"],
+            "job_type": job["job_type"],
+            "specification": job["spec"],
+        }
+    }
+    cluster = LocalCluster()
+
+    def reparse() -> None:
+        """Render and parse the template twice, as before the spec cache."""
+        tmpl = cluster.jinja_env.get_template("minebuilder.yaml.template")
+        workflow_yaml = tmpl.render(**job["spec"])
+        yaml.safe_load(workflow_yaml)
+        yaml.safe_load(workflow_yaml)
+
+    def cold() -> None:
+        """Submit with an empty spec cache."""
+        cluster._specs.clear()
+        cluster.submit_job(schedule)
+
+    def warm() -> None:
+        """Submit with the spec cached."""
+        cluster.submit_job(schedule)
+
+    bench("reparse", reparse, args.rounds)
+    bench("cold", cold, args.rounds)
+    bench("warm", warm, args.rounds)
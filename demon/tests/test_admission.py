@@ -0,0 +1,145 @@
+"""AdmissionController tests."""
+
+from typing import Dict, List, Tuple
+
+from demon.cluster.admission import (
+    AdmissionController,
+    BuildResources,
+    workflow_resources,
+)
+
+GI = 1024**3
+
+
+def build(storage: int = 0, memory: int = 0) -> BuildResources:
+    """Resources of a build, in GiB."""
+    return BuildResources(1, storage * GI, memory * GI)
+
+
+def controller(
+    builds: int = 0, storage: int = 0, memory: int = 0
+) -> Tuple[AdmissionController, List[str]]:
+    """Controller with a capacity in GiB, recording dispatched schedules."""
+    dispatched: List[str] = []
+    admission = AdmissionController(
+        BuildResources(builds, storage * GI, memory * GI),
+        lambda schedule: dispatched.append(schedule["name"]),
+    )
+    return admission, dispatched
+
+
+def offer(
+    admission: AdmissionController,
+    key: str,
+    resources: BuildResources,
+    priority: int = 0,
+) -> bool:
+    """Offer a schedule named after its key."""
+    return admission.offer(key, {"name": key}, resources, priority)
+
+
+def test_builds_over_capacity_wait_for_a_release() -> None:
+    """Builds over capacity are queued until a build is released."""
+    admission, dispatched = controller(builds=2, memory=10)
+    assert offer(admission, "a", build(memory=4))
+    assert offer(admission, "b", build(memory=4))
+    assert not offer(admission, "c", build(memory=1))
+    assert dispatched == ["a", "b"]
+    assert admission.stats()["queued"] == 1
+
+    admission.bind("a", "build-a-mine-a")
+    admission.release("a")
+    assert dispatched == ["a", "b"]
+    admission.release("build-a-mine-a")
+    assert dispatched == ["a", "b", "c"]
+    stats = admission.stats()
+    assert stats["running"] == 2
+    assert stats["memory"] == 5 * GI
+    assert stats["held"] == 1
+    assert stats["released"] == 1
+
+
+def test_queue_is_served_by_priority_without_overtaking() -> None:
+    """Queued builds are admitted by priority, never ahead of the head."""
+    admission, dispatched = controller(memory=10)
+    offer(admission, "a", build(memory=8))
+    offer(admission, "big", build(memory=6))
+    offer(admission, "urgent", build(memory=5), priority=1)
+    # Fits, but must not overtake the head of the queue
+    assert not offer(admission, "small", build(memory=1))
+
+    admission.release("a")
+    assert dispatched == ["a", "urgent"]
+    admission.release("urgent")
+    assert dispatched == ["a", "urgent", "big", "small"]
+
+
+def test_build_larger_than_capacity_runs_on_an_idle_cluster() -> None:
+    """A build larger than the cluster still runs once it is idle."""
+    admission, dispatched = controller(storage=100)
+    assert offer(admission, "huge", build(storage=500))
+    assert not offer(admission, "next", build(storage=1))
+    admission.release("huge")
+    assert dispatched == ["huge", "next"]
+
+
+def test_adopted_workflows_count_against_capacity() -> None:
+    """Running workflows found at startup hold capacity once."""
+    admission, dispatched = controller(builds=1)
+    admission.adopt("build-a-mine-running", build())
+    admission.adopt("build-a-mine-running", build())
+    assert not offer(admission, "a", build())
+    admission.release("build-a-mine-running")
+    assert dispatched == ["a"]
+    assert admission.stats()["running"] == 1
+
+
+def template(memory: str, daemon: bool = False) -> Dict:
+    """Workflow template requesting memory."""
+    return {
+        "daemon": daemon,
+        "container": {"resources": {"requests": {"memory": memory}}},
+    }
+
+
+def test_workflow_resources() -> None:
+    """Storage and non daemon memory requests are summed."""
+    workflow = {
+        "spec": {
+            "volumeClaimTemplates": [
+                {"spec": {"resources": {"requests": {"storage": "20Gi"}}}},
+                {"spec": {"resources": {"requests": {"storage": "5Gi"}}}},
+            ],
+            "templates": [
+                template("2Gi", daemon=True),
+                template("1Gi", daemon=True),
+                template("8Gi"),
+                template("4Gi"),
+                {"steps": []},
+            ],
+        }
+    }
+    assert workflow_resources(workflow) == BuildResources(1, 25 * GI, 11 * GI)
+    assert workflow_resources({}) == BuildResources(1, 0, 0)
+
+
+def test_offering_a_key_again_is_ignored() -> None:
+    """Redelivered schedules don't hold capacity twice."""
+    admission, dispatched = controller(builds=2)
+    assert offer(admission, "a", build())
+    assert not offer(admission, "a", build())
+    admission.bind("a", "build-a-mine-a")
+    assert not offer(admission, "a", build())
+    assert offer(admission, "b", build())
+    assert not offer(admission, "c", build())
+    assert not offer(admission, "c", build())
+    assert admission.stats()["running"] == 2
+    assert admission.stats()["queued"] == 1
+
+    admission.release("build-a-mine-a")
+    assert dispatched == ["a", "b", "c"]
+    admission.release("b")
+    admission.release("c")
+    assert admission.stats()["running"] == 0
+    # Offered again once finished, e.g. a rebuild under the same key
+    assert offer(admission, "a", build())
@@ -0,0 +1,174 @@
+"""ArgoCluster tests."""
+
+from copy import deepcopy
+from http import HTTPStatus
+import json
+from pathlib import Path
+from typing import Dict, List
+
+from kubernetes.client.rest import ApiException
+import pytest
+
+from demon.cluster.argo_cluster import ArgoCluster, config_registry, schedule_label
+from demon.cluster.workflow_informer import MINE_LABEL, SCHEDULE_LABEL
+
+TEMPLATE = "minebuilder.yaml.template"
+SPEC = json.loads((Path(__file__).parent / "event.json").read_text())["job"]["spec"]
+
+
+class CountingTemplate:
+    """Counts the renders of a workflow template."""
+
+    def __init__(self: "CountingTemplate", template: object) -> None:
+        """Wrap a compiled template."""
+        self.template = template
+        self.renders = 0
+
+    def render(self: "CountingTemplate", **context: object) -> str:
+        """Render the wrapped template."""
+        self.renders += 1
+        return self.template.render(**context)
+
+
+@pytest.fixture()
+def cluster(monkeypatch: pytest.MonkeyPatch) -> ArgoCluster:
+    """Cluster caching two specs, counting template renders."""
+    monkeypatch.setattr(config_registry.get_config(), "WORKFLOW_SPEC_CACHE_SIZE", 2)
+    cluster = ArgoCluster()
+    cluster.templates[TEMPLATE] = CountingTemplate(cluster.templates[TEMPLATE])
+    return cluster
+
+
+def context(mine_name: str) -> Dict:
+    """Context of the event.json build for another mine."""
+    return {**SPEC, "mine_name": mine_name}
+
+
+def test_rendered_specs_are_independent_copies(cluster: ArgoCluster) -> None:
+    """Changing a rendered spec doesn't change the cached one."""
+    first = cluster.render_workflow(TEMPLATE, context("biotestmine"))
+    first["metadata"]["labels"] = {"changed": "yes"}
+    first["spec"]["templates"].clear()
+
+    second = cluster.render_workflow(TEMPLATE, context("biotestmine"))
+    assert second["spec"]["templates"]
+    assert second["metadata"].get("labels") != {"changed": "yes"}
+    assert cluster.templates[TEMPLATE].renders == 1
+
+
+def test_specs_are_keyed_on_the_context(cluster: ArgoCluster) -> None:
+    """Equal contexts share a spec, whatever their key order."""
+    cluster.render_workflow(TEMPLATE, context("biotestmine"))
+    cluster.render_workflow(
+        TEMPLATE, dict(reversed(list(context("biotestmine").items())))
+    )
+    assert cluster.templates[TEMPLATE].renders == 1
+
+    other = cluster.render_workflow(TEMPLATE, context("kittenmine"))
+    assert cluster.templates[TEMPLATE].renders == 2
+    assert "kittenmine" in json.dumps(other)
+
+
+def test_least_recently_used_spec_is_evicted(cluster: ArgoCluster) -> None:
+    """Only WORKFLOW_SPEC_CACHE_SIZE specs are kept, the least recent is dropped."""
+    for mine_name in ["a", "b", "a", "c"]:
+        cluster.render_workflow(TEMPLATE, context(mine_name))
+    assert cluster.templates[TEMPLATE].renders == 3
+    assert len(cluster._specs) == 2
+
+    cluster.render_workflow(TEMPLATE, context("a"))
+    assert cluster.templates[TEMPLATE].renders == 3
+    cluster.render_workflow(TEMPLATE, context("b"))
+    assert cluster.templates[TEMPLATE].renders == 4
+
+
+class FakeKubeApi:
+    """Creates workflows, failing the first creates with the given statuses."""
+
+    def __init__(self: "FakeKubeApi", statuses: List[int]) -> None:
+        """Fail the next creates with these statuses, after persisting them."""
+        self.statuses = statuses
+        self.workflows: List[Dict] = []
+        self.creates = 0
+
+    def create_namespaced_custom_object(self: "FakeKubeApi", **kwargs: object) -> Dict:
+        """Create a workflow with a generated name."""
+        self.creates += 1
+        status = self.statuses.pop(0) if self.statuses else None
+        if status == HTTPStatus.SERVICE_UNAVAILABLE:
+            raise ApiException(status=status)
+        workflow = deepcopy(kwargs["body"])
+        workflow["metadata"]["name"] = f"build-a-mine-{self.creates}"
+        self.workflows.append(workflow)
+        if status is not None:
+            raise ApiException(status=status)
+        return workflow
+
+    def list_namespaced_custom_object(
+        self: "FakeKubeApi", *args: object, **kwargs: object
+    ) -> Dict:
+        """List the workflows matching a label selector."""
+        label, value = kwargs["label_selector"].split("=")
+        return {
+            "items": [
+                w for w in self.workflows if w["metadata"]["labels"].get(label) == value
+            ]
+        }
+
+
+class FakeMessenger:
+    """Drops every message."""
+
+    def publish(self: "FakeMessenger", msg: Dict, topic_id: str) -> str:
+        """Drop the message."""
+        return "ok"
+
+
+def submitting_cluster(statuses: List[int]) -> ArgoCluster:
+    """Cluster creating workflows on a fake API server."""
+
+    class LocalCluster(ArgoCluster):
+        kube_api = FakeKubeApi(statuses)
+        messenger = FakeMessenger()
+
+    return LocalCluster()
+
+
+def build_schedule() -> Dict:
+    """Build schedule of the event.json job."""
+    return {
+        "schedule_id": "3f8a5c2e-9c1b-4d7e-8f0a-1b2c3d4e5f60",
+        "job": {"name": "build", "job_type": "build", "specification": SPEC},
+    }
+
+
+def test_retry_finds_workflow_created_despite_an_error() -> None:
+    """A create that failed after persisting the workflow isn't repeated."""
+    cluster = submitting_cluster([HTTPStatus.GATEWAY_TIMEOUT])
+    schedule = build_schedule()
+
+    with pytest.raises(ApiException):
+        cluster.submit_job(schedule)
+    assert cluster.submit_job(schedule) == "build-a-mine-1"
+    assert cluster.kube_api.creates == 1
+    assert cluster.kube_api.workflows[0]["metadata"]["labels"] == {
+        MINE_LABEL: SPEC["mine_name"],
+        SCHEDULE_LABEL: schedule["schedule_id"],
+    }
+
+
+def test_retry_creates_workflow_the_error_prevented() -> None:
+    """Unprocessed or lost creates are made again."""
+    cluster = submitting_cluster([HTTPStatus.SERVICE_UNAVAILABLE])
+    with pytest.raises(ApiException):
+        cluster.submit_job(build_schedule())
+    assert cluster.submit_job(build_schedule()) == "build-a-mine-2"
+    assert len(cluster.kube_api.workflows) == 1
+
+
+def test_schedule_labels_are_valid_label_values() -> None:
+    """Keys that are not valid label values are hashed."""
+    assert schedule_label("3f8a5c2e-9c1b") == "3f8a5c2e-9c1b"
+    hashed = schedule_label("build biotestmine/" + "x" * 80)
+    assert len(hashed) == 63
+    assert hashed == schedule_label("build biotestmine/" + "x" * 80)
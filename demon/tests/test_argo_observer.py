@@ -0,0 +1,139 @@
+"""Progress messages derived from workflow versions."""
+
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from demon.observer.argo_observer import workflow_messages
+
+NAME = "build-a-mine-9l4bh"
+
+# Cursor of the observer before it went down
+SINCE = datetime(2021, 10, 5, 12, 0, tzinfo=timezone.utc).timestamp()
+BEFORE = "2021-10-05T11:50:00Z"
+AFTER = "2021-10-05T12:10:00Z"
+
+
+def node(
+    step: int,
+    name: str,
+    phase: str,
+    finished_at: Optional[str] = None,
+    started_at: Optional[str] = None,
+) -> Dict:
+    """Node status of a step."""
+    return {
+        "name": f"{NAME}[{step}].{name}",
+        "phase": phase,
+        "startedAt": started_at or f"2021-10-05T11:0{step}:00Z",
+        "finishedAt": finished_at,
+        "message": "failed with exit code 1" if phase == "Failed" else None,
+    }
+
+
+def workflow(phase: str, nodes: List[Dict], finished_at: Optional[str] = None) -> Dict:
+    """Workflow with a phase and nodes."""
+    return {
+        "metadata": {"name": NAME},
+        "status": {
+            "phase": phase,
+            "startedAt": "2021-10-05T11:00:00Z",
+            "finishedAt": finished_at,
+            "nodes": {f"{NAME}-{i}": n for i, n in enumerate(nodes)},
+        },
+    }
+
+
+def statuses(msgs: List[Dict]) -> List[tuple]:
+    """Statuses and step names of messages."""
+    return [
+        (msg["data"]["status"], msg["data"].get("current_step_name")) for msg in msgs
+    ]
+
+
+def test_changed_phases_are_reported() -> None:
+    """Only nodes and workflows whose phase changed are reported."""
+    old = workflow("Running", [node(0, "start-postgres", "Running")])
+    new = workflow(
+        "Running",
+        [
+            node(0, "start-postgres", "Succeeded", AFTER),
+            node(1, "load-data", "Running"),
+        ],
+    )
+    assert statuses(workflow_messages(old, new, SINCE)) == [
+        ("WorkflowNodeSucceeded", "start-postgres"),
+        ("WorkflowNodeRunning", "load-data"),
+    ]
+
+
+def test_restart_does_not_replay_finished_workflows() -> None:
+    """Phases that ended before the cursor are not published again."""
+    new = workflow(
+        "Failed",
+        [
+            node(0, "start-postgres", "Succeeded", BEFORE),
+            node(1, "load-data", "Failed", BEFORE),
+        ],
+        finished_at=BEFORE,
+    )
+    assert workflow_messages(None, new, SINCE) == []
+    # Nothing published yet, only running nodes are current
+    assert workflow_messages(None, new) == []
+
+
+def test_restart_reports_changes_missed_while_down() -> None:
+    """Phases that ended after the cursor are published."""
+    new = workflow(
+        "Failed",
+        [
+            node(0, "start-postgres", "Succeeded", BEFORE),
+            node(1, "load-data", "Failed", AFTER),
+        ],
+        finished_at=AFTER,
+    )
+    msgs = workflow_messages(None, new, SINCE)
+    assert statuses(msgs) == [
+        ("WorkflowNodeFailed", "load-data"),
+        ("WorkflowFailed", None),
+    ]
+    assert msgs[0]["message_type"] == "job_error"
+    assert msgs[0]["data"]["error_message"] == "failed with exit code 1"
+
+
+def test_restart_does_not_replay_running_workflows() -> None:
+    """Nodes and workflows running since before the cursor are not published again."""
+    new = workflow(
+        "Running",
+        [
+            node(0, "start-postgres", "Succeeded", BEFORE),
+            node(1, "integrate", "Running"),
+        ],
+    )
+    assert workflow_messages(None, new, SINCE) == []
+
+
+def test_restart_reports_nodes_started_while_down() -> None:
+    """Nodes that started or finished after the cursor are published."""
+    new = workflow(
+        "Running",
+        [
+            node(0, "start-postgres", "Succeeded", BEFORE),
+            node(1, "load-data", "Succeeded", AFTER),
+            node(2, "integrate", "Running", started_at=AFTER),
+        ],
+    )
+    assert statuses(workflow_messages(None, new, SINCE)) == [
+        ("WorkflowNodeSucceeded", "load-data"),
+        ("WorkflowNodeRunning", "integrate"),
+    ]
+    # Nothing published yet, only running nodes and workflows are current
+    assert statuses(workflow_messages(None, new)) == [
+        ("WorkflowNodeRunning", "integrate"),
+        ("WorkflowRunning", None),
+    ]
+
+
+def test_deleted_workflows_are_not_reported() -> None:
+    """Deleted workflows produce no message."""
+    old = workflow("Succeeded", [], finished_at=BEFORE)
+    assert workflow_messages(old, None, SINCE) == []
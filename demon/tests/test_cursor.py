@@ -0,0 +1,92 @@
+"""WatchCursor tests."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from demon.observer import cursor as cursor_module
+from demon.observer.cursor import WatchCursor
+
+
+class Clock:
+    """Monotonic clock moved by hand."""
+
+    def __init__(self: "Clock") -> None:
+        """Start at 0."""
+        self.now = 0.0
+
+    def __call__(self: "Clock") -> float:
+        """Monotonic time."""
+        return self.now
+
+    def time(self: "Clock") -> float:
+        """Wall clock time."""
+        return 1633435200 + self.now
+
+
+@pytest.fixture()
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    """Clock driving the cursor."""
+    clock = Clock()
+    monkeypatch.setattr(cursor_module.time, "monotonic", clock)
+    monkeypatch.setattr(cursor_module.time, "time", clock.time)
+    return clock
+
+
+def saved(path: Path) -> dict:
+    """Content of the state file."""
+    return json.loads(path.read_text())
+
+
+def entry(resource_version: str, seen_at: float) -> dict:
+    """State file entry seen at a clock time."""
+    return {"resource_version": resource_version, "seen_at": 1633435200 + seen_at}
+
+
+def test_cursor_writes_lag_one_interval(tmp_path: Path, clock: Clock) -> None:
+    """Writes are throttled and lag one interval behind."""
+    path = tmp_path / "state.json"
+    cursor = WatchCursor(path, "workflows/workflow", interval=5)
+    cursor.reset("10")
+    assert saved(path) == {"workflows/workflow": entry("10", 0)}
+
+    cursor.update("11")
+    clock.now = 5
+    cursor.update("12")
+    # The version seen at the previous write, 12 may still be unpublished
+    assert saved(path) == {"workflows/workflow": entry("10", 0)}
+    clock.now = 10
+    cursor.update("13")
+    assert saved(path) == {"workflows/workflow": entry("12", 5)}
+    assert cursor.resource_version == "13"
+
+    clock.now = 12
+    cursor.flush()
+    assert saved(path) == {"workflows/workflow": entry("13", 12)}
+
+    restarted = WatchCursor(path, "workflows/workflow")
+    assert restarted.resource_version == "13"
+    assert restarted.seen_at == 1633435212
+
+
+def test_cursor_resumes_from_state_file(tmp_path: Path, clock: Clock) -> None:
+    """A new cursor starts from the saved entry."""
+    path = tmp_path / "state.json"
+    other = entry("7", 0)
+    # Written before seen_at was recorded
+    path.write_text(json.dumps({"workflows/other": other, "workflows/workflow": "42"}))
+    cursor = WatchCursor(path, "workflows/workflow")
+    assert cursor.resource_version == "42"
+    assert cursor.seen_at is None
+
+    cursor.reset()
+    assert saved(path) == {"workflows/other": other}
+    assert WatchCursor(path, "workflows/workflow").resource_version is None
+
+
+def test_cursor_ignores_corrupt_state_file(tmp_path: Path, clock: Clock) -> None:
+    """A corrupt state file is ignored."""
+    path = tmp_path / "state.json"
+    path.write_text("{")
+    assert WatchCursor(path, "workflows/workflow").resource_version is None
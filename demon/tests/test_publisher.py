@@ -0,0 +1,114 @@
+"""CoalescingPublisher tests."""
+
+from typing import Dict, List, Tuple
+
+from demon.observer.publisher import CoalescingPublisher
+
+
+class FakeMessenger:
+    """Records published messages."""
+
+    def __init__(self: "FakeMessenger") -> None:
+        """Start with no messages."""
+        self.published: List[Dict] = []
+
+    def publish(self: "FakeMessenger", msg: Dict, topic_id: str) -> str:
+        """Record a message."""
+        self.published.append(msg)
+        return "ok"
+
+
+def node_msg(status: str, step: int = 0, name: str = "start-postgres") -> Dict:
+    """Progress message of a node."""
+    message_type = "job_update"
+    if status in ("WorkflowNodeFailed", "WorkflowNodeError"):
+        message_type = "job_error"
+    return {
+        "message_type": message_type,
+        "data": {
+            "status": status,
+            "workflow_name": "build-a-mine-9l4bh",
+            "current_step_number": step,
+            "current_step_name": name,
+        },
+    }
+
+
+def workflow_msg(status: str) -> Dict:
+    """Progress message of a workflow."""
+    message_type = "job_error" if status == "WorkflowFailed" else "job_update"
+    return {
+        "message_type": message_type,
+        "data": {"status": status, "workflow_name": "build-a-mine-9l4bh"},
+    }
+
+
+def publish(
+    msgs: List[Dict], max_queue: int = 100
+) -> Tuple[List[Dict], Dict, List[bool]]:
+    """Publish messages, returning what was sent, the stats and what was accepted."""
+    messenger = FakeMessenger()
+    # Nothing leaves its window before close flushes the queue
+    publisher = CoalescingPublisher(
+        messenger, "mineprogress", max_queue=max_queue, window=60
+    ).start()
+    accepted = [publisher.submit(msg) for msg in msgs]
+    publisher.close(timeout=5)
+    return messenger.published, publisher.stats(), accepted
+
+
+def statuses(msgs: List[Dict]) -> List[str]:
+    """Statuses of messages."""
+    return [msg["data"]["status"] for msg in msgs]
+
+
+def test_coalesces_updates_of_a_node() -> None:
+    """Only the latest update of a node is published."""
+    published, stats, _ = publish(
+        [
+            node_msg("WorkflowNodeRunning"),
+            node_msg("WorkflowNodeRunning", step=1, name="load-data"),
+            node_msg("WorkflowNodeRunning"),
+        ]
+    )
+    assert len(published) == 2
+    assert stats["coalesced"] == 1
+    assert stats["published"] == 2
+
+
+def test_final_statuses_are_not_coalesced() -> None:
+    """Final statuses are always published."""
+    published, stats, _ = publish(
+        [
+            node_msg("WorkflowNodeRunning"),
+            node_msg("WorkflowNodeError"),
+            # Retried after the error
+            node_msg("WorkflowNodeRunning"),
+            node_msg("WorkflowNodeRunning"),
+            workflow_msg("WorkflowFailed"),
+            workflow_msg("WorkflowRunning"),
+        ]
+    )
+    assert statuses(published) == [
+        "WorkflowNodeError",
+        "WorkflowNodeRunning",
+        "WorkflowFailed",
+        "WorkflowRunning",
+    ]
+    assert stats["coalesced"] == 2
+
+
+def test_full_queue_drops_node_updates_only() -> None:
+    """A full queue drops node updates, never final statuses."""
+    published, stats, accepted = publish(
+        [
+            node_msg("WorkflowNodeRunning"),
+            node_msg("WorkflowNodeSucceeded", step=1, name="load-data"),
+            workflow_msg("WorkflowRunning"),
+            node_msg("WorkflowNodeRunning", step=2, name="integrate"),
+        ],
+        max_queue=2,
+    )
+    assert accepted == [True, True, True, False]
+    assert statuses(published) == ["WorkflowNodeSucceeded", "WorkflowRunning"]
+    assert stats["dropped"] == 2
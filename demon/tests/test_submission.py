@@ -0,0 +1,146 @@
+"""SubmissionPool tests."""
+
+from http import HTTPStatus
+from threading import Lock
+from typing import Dict, List, Optional
+
+from kubernetes.client.rest import ApiException
+import pytest
+
+from demon.cluster.submission import (
+    is_retryable,
+    LatencyHistogram,
+    retry_after,
+    schedule_tenant,
+    SubmissionPool,
+)
+
+
+def schedule(
+    name: str, user_id: Optional[str] = None, mine: str = "biotestmine"
+) -> Dict:
+    """Schedule of a tenant."""
+    return {
+        "job": {
+            "name": name,
+            "job_metadata": {"user_id": user_id},
+            "specification": {"mine_name": mine},
+        }
+    }
+
+
+def api_error(status: int, retry_after: Optional[str] = None) -> ApiException:
+    """Kubernetes API error with an optional Retry-After."""
+    error = ApiException(status=status)
+    error.headers = {"Retry-After": retry_after} if retry_after else {}
+    return error
+
+
+class FakeCluster:
+    """Records submissions, failing the first ones with the given errors."""
+
+    def __init__(
+        self: "FakeCluster", errors: Optional[Dict[str, List[Exception]]] = None
+    ) -> None:
+        """Fail submissions by job name with the given errors."""
+        self.errors = errors or {}
+        self.submitted: List[str] = []
+        self.attempts: List[str] = []
+        self._lock = Lock()
+
+    def submit(self: "FakeCluster", schedule: Dict) -> None:
+        """Record a submission, raising its next error if any."""
+        name = schedule["job"]["name"]
+        with self._lock:
+            self.attempts.append(name)
+            errors = self.errors.get(name)
+            if errors:
+                raise errors.pop(0)
+            self.submitted.append(name)
+
+
+def test_schedules_are_served_round_robin_across_tenants() -> None:
+    """A tenant with many schedules does not starve the others."""
+    cluster = FakeCluster()
+    pool = SubmissionPool(cluster.submit, workers=1)
+    for name, user in [
+        ("a1", "a"),
+        ("a2", "a"),
+        ("a3", "a"),
+        ("b1", "b"),
+        ("c1", None),
+    ]:
+        pool.enqueue(schedule(name, user, mine="covidmine"))
+    pool.start().close(timeout=5)
+
+    assert cluster.submitted == ["a1", "b1", "c1", "a2", "a3"]
+    stats = pool.stats()
+    assert stats["submitted"] == 5
+    assert stats["queue_depth"] == 0
+    assert stats["submit_latency"]["count"] == 5
+
+
+def test_throttled_submissions_are_retried() -> None:
+    """Throttled submissions are retried after Retry-After."""
+    cluster = FakeCluster(
+        {"a1": [api_error(HTTPStatus.TOO_MANY_REQUESTS, "0"), api_error(503)]}
+    )
+    pool = SubmissionPool(cluster.submit, workers=2, backoff_base=0.01)
+    pool.start()
+    pool.enqueue(schedule("a1", "a"))
+    pool.close(timeout=5)
+
+    assert cluster.attempts == ["a1", "a1", "a1"]
+    assert cluster.submitted == ["a1"]
+    stats = pool.stats()
+    assert stats["retried"] == 2
+    assert stats["failed"] == 0
+    assert stats["wait_latency"]["count"] == 1
+
+
+@pytest.mark.parametrize(
+    "errors, attempts",
+    [([api_error(HTTPStatus.BAD_REQUEST)], 1), ([api_error(500)] * 3, 2)],
+)
+def test_failed_submissions_are_reported(
+    errors: List[Exception], attempts: int
+) -> None:
+    """Submissions that fail for good are reported."""
+    cluster = FakeCluster({"a1": list(errors)})
+    failed = []
+    pool = SubmissionPool(
+        cluster.submit,
+        max_retries=1,
+        backoff_base=0.01,
+        on_failed=lambda schedule, error: failed.append((schedule, error)),
+    )
+    pool.enqueue(schedule("a1", "a"))
+    pool.start().close(timeout=5)
+
+    assert len(cluster.attempts) == attempts
+    assert [s["job"]["name"] for s, _ in failed] == ["a1"]
+    assert pool.stats()["failed"] == 1
+
+
+def test_retry_helpers() -> None:
+    """Retryable statuses and Retry-After parsing."""
+    assert is_retryable(api_error(HTTPStatus.TOO_MANY_REQUESTS))
+    assert is_retryable(api_error(HTTPStatus.BAD_GATEWAY))
+    assert not is_retryable(api_error(HTTPStatus.CONFLICT))
+    assert not is_retryable(ValueError())
+    assert retry_after(api_error(429, "2.5")) == 2.5
+    assert retry_after(api_error(429)) is None
+    assert schedule_tenant(schedule("a1", "user-1")) == "user-1"
+    assert schedule_tenant(schedule("a1")) == "biotestmine"
+    assert schedule_tenant({}) == "default"
+
+
+def test_latency_histogram_is_cumulative() -> None:
+    """Latency buckets count every faster submission."""
+    histogram = LatencyHistogram(buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(seconds)
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"0.1": 1, "1.0": 3, "+Inf": 4}
+    assert snapshot["count"] == 4
+    assert snapshot["sum"] == pytest.approx(4.25)
@@ -0,0 +1,151 @@
+"""WorkflowInformer tests."""
+
+from http import HTTPStatus
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from kubernetes.client.rest import ApiException
+import pytest
+
+from demon.cluster import workflow_informer
+from demon.cluster.workflow_informer import MINE_LABEL, WorkflowInformer
+from demon.observer.cursor import WatchCursor
+
+
+def workflow(name: str, resource_version: str, mine: Optional[str] = None) -> Dict:
+    """Workflow metadata, labelled with a mine if given."""
+    labels = {MINE_LABEL: mine} if mine else {}
+    return {
+        "metadata": {
+            "name": name,
+            "labels": labels,
+            "resourceVersion": resource_version,
+        }
+    }
+
+
+class FakeApi:
+    """Lists the workflows it holds."""
+
+    def __init__(
+        self: "FakeApi", items: List[Dict], resource_version: str = "10"
+    ) -> None:
+        """Hold workflows listed at a resourceVersion."""
+        self.items = items
+        self.resource_version = resource_version
+        self.lists: List[Dict] = []
+
+    def list_namespaced_custom_object(
+        self: "FakeApi", *args: object, **kwargs: object
+    ) -> Dict:
+        """List the workflows, recording the arguments."""
+        self.lists.append(kwargs)
+        return {
+            "items": self.items,
+            "metadata": {"resourceVersion": self.resource_version},
+        }
+
+
+class FakeWatch:
+    """Streams the events of the next batch, raises errors and calls callables."""
+
+    batches: List[List] = []
+
+    def stream(self: "FakeWatch", *args: object, **kwargs: object) -> Iterator[Dict]:
+        """Stream the next batch of events."""
+        for event in FakeWatch.batches.pop(0):
+            if isinstance(event, Exception):
+                raise event
+            if callable(event):
+                event()
+                continue
+            yield event
+
+    def stop(self: "FakeWatch") -> None:
+        """Nothing to stop."""
+        pass
+
+
+@pytest.fixture()
+def events(monkeypatch: pytest.MonkeyPatch) -> List[List]:
+    """Batches of events streamed by the next watches."""
+    monkeypatch.setattr(workflow_informer.watch, "Watch", FakeWatch)
+    FakeWatch.batches = []
+    return FakeWatch.batches
+
+
+def record(informer: WorkflowInformer) -> List[tuple]:
+    """Record the names passed to the handlers."""
+    calls = []
+    informer.add_handler(
+        lambda old, new: calls.append(
+            (old and old["metadata"]["name"], new and new["metadata"]["name"])
+        )
+    )
+    return calls
+
+
+def test_list_fills_cache_and_index(tmp_path: Path) -> None:
+    """The first list fills the cache and the mine index."""
+    cursor = WatchCursor(tmp_path / "state.json", "workflows/workflow")
+    cursor.reset("5")
+    api = FakeApi([workflow("a", "3", mine="biotestmine"), workflow("b", "4")])
+    informer = WorkflowInformer(api, cursor=cursor)
+    calls = record(informer)
+
+    informer._list()
+    assert api.lists == [{"resource_version": "5"}]
+    assert calls == [(None, "a"), (None, "b")]
+    assert informer.get("b")["metadata"]["name"] == "b"
+    assert [w["metadata"]["name"] for w in informer.list_by_mine("biotestmine")] == [
+        "a"
+    ]
+    assert informer.wait_for_sync(0)
+    assert cursor.resource_version == "10"
+
+
+def test_relist_removes_missing_workflows() -> None:
+    """A relist removes workflows missing from it."""
+    api = FakeApi([workflow("a", "3", mine="biotestmine"), workflow("b", "4")])
+    informer = WorkflowInformer(api)
+    informer._list()
+    calls = record(informer)
+
+    api.items = [workflow("b", "11")]
+    informer._list()
+    assert calls == [("a", None), ("b", "b")]
+    assert informer.get("a") is None
+    assert informer.list_by_mine("biotestmine") == []
+
+
+def test_watch_updates_cache(events: List[List]) -> None:
+    """Watch events update the cache and call the handlers."""
+    informer = WorkflowInformer(FakeApi([workflow("a", "3")]))
+    informer._list()
+    calls = record(informer)
+
+    events.append(
+        [
+            {"type": "ADDED", "raw_object": workflow("b", "11", mine="biotestmine")},
+            {"type": "MODIFIED", "raw_object": workflow("a", "12")},
+            {"type": "DELETED", "raw_object": workflow("b", "13")},
+            {"type": "BOOKMARK", "raw_object": {"metadata": {"resourceVersion": "14"}}},
+        ]
+    )
+    informer._watch_changes()
+    assert calls == [(None, "b"), ("a", "a"), ("b", None)]
+    assert informer.get("a")["metadata"]["resourceVersion"] == "12"
+    assert informer.list_by_mine("biotestmine") == []
+    assert informer._resource_version == "14"
+
+
+def test_expired_cursor_relists_once(events: List[List]) -> None:
+    """A 410 Gone relists once and resumes watching."""
+    api = FakeApi([workflow("a", "3")])
+    informer = WorkflowInformer(api, retry_interval=0)
+    informer._resource_version = "5"
+
+    events.extend([[ApiException(status=HTTPStatus.GONE)], [informer.stop]])
+    informer.run()
+    assert api.lists == [{"resource_version": "5"}, {}]
+    assert events == []